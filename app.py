@@ -1,3 +1,6 @@
+import time
+APP_IMPORT_START = time.perf_counter()
+
 import os
 import datetime
 import openai
@@ -5,25 +8,50 @@ from flask import Flask, render_template, request, jsonify, session, redirect, u
 from flask_socketio import SocketIO, emit
 from flask_cors import CORS
 from dotenv import load_dotenv
-from pipelines.question_generation_pipeline import question_generation_pipeline
 from components.voice_chat import VoiceChat
 from werkzeug.utils import secure_filename
-from services.proctor_service import ProctorService
-from services.speech_analysis import SpeechAnalyzer
 import uuid
-import sqlite3
 import queue
 import threading
-import time
 from services.validation_service import ValidationService
 from services.code_validation import CodeValidationService
 from services.question_service import QuestionService
+from utils.lazy_loader import LazyAttr, start_warmup, import_report
+from utils.admin_auth import admin_required
+from services.model_artifacts import report_unavailable_models
+from services.frame_ingestion import FrameIngestionPipeline
+from services.storage import get_storage
+from services.cohort_percentiles import get_cohort_percentiles
+from services.session_journal import get_session_journal
+from services.progress_bus import get_progress_bus
+from services.job_runner import JobCancelled, JobQueueFull, SUCCEEDED, get_job_runner
+from services.llm_scheduler import REFILL, llm_context
 import logging
 
+# Heavy subsystems (torch, mediapipe, cv2, transformers, librosa, yolov5) are
+# imported on first use or by the background warmup, not at module import.
+ProctorService = LazyAttr('services.proctor_service', 'ProctorService')
+SpeechAnalyzer = LazyAttr('services.speech_analysis', 'SpeechAnalyzer')
+question_generation_pipeline = LazyAttr('pipelines.question_generation_pipeline', 'question_generation_pipeline')
+
 load_dotenv()
 
+def load_secret_key():
+    """Session signing key that survives restarts, so cookies stay valid"""
+    key = os.getenv('NEUROPREP_SECRET_KEY')
+    if key:
+        return key
+    key_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'instance', 'secret_key')
+    if not os.path.exists(key_path):
+        os.makedirs(os.path.dirname(key_path), exist_ok=True)
+        fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(os.urandom(24))
+    with open(key_path, 'rb') as f:
+        return f.read()
+
 app = Flask(__name__)
-app.secret_key = os.urandom(24)  # Add secret key for session management
+app.secret_key = load_secret_key()  # Add secret key for session management
 CORS(app)  # Enable CORS
 socketio = SocketIO(app, cors_allowed_origins="*")
 
@@ -38,21 +66,75 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 # Initialize APIs and services
 openai.api_key = OPENAI_API_KEY
 voice_chat = VoiceChat()
-proctor_service = None  # Will be initialized per session
-speech_analyzer = None  # Will be initialized per session
+proctor_services = {}  # session id -> ProctorService, created lazily by get_proctor_service()
+proctor_services_lock = threading.Lock()
+# session id -> when monitoring ended; frames still queued for these sessions are
+# dropped instead of creating a new service, until monitoring is reopened
+released_proctor_sessions = {}
+RELEASED_MARKER_SECONDS = 60.0
+speech_analyzer = None  # Created lazily by get_speech_analyzer()
+restored_sessions = set()
 
 # Global Variable (Initializes only when accessed)
 INTERVIEW_QUESTIONS = {}
-progress_queues = {}
+ROUND_TYPES = ['introduction', 'aptitude', 'technical', 'coding', 'hr']
+
+progress_subscriptions = {}  # Socket.IO sid -> (topic, subscription id)
+# A round generated after its deadline replaces the standard questions only
+# until the candidate has been shown that round
+served_rounds = {}  # user id -> round types already shown
+question_upgrades = {}  # generation job id -> rounds replaced after the job returned
+question_upgrades_lock = threading.Lock()
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+# Services with background threads are created on first use rather than at
+# import, so the debug reloader's parent process and tools that only import
+# the app do not start them
+
+def session_journal():
+    """The session journal; the first call replays session events from before a restart"""
+    return get_session_journal()
+
+def progress_bus():
+    """Per-session progress topics, pushed to clients over Socket.IO (or SSE)"""
+    return get_progress_bus(
+        history=int(os.getenv('NEUROPREP_PROGRESS_HISTORY', '50')),
+        ttl=float(os.getenv('NEUROPREP_PROGRESS_TTL_SECONDS', '900'))
+    )
+
+def job_runner():
+    """Question generation runs as background jobs, started as soon as a resume is saved"""
+    return get_job_runner(
+        max_workers=int(os.getenv('NEUROPREP_JOB_WORKERS', '4')),
+        max_pending=int(os.getenv('NEUROPREP_JOB_MAX_PENDING', '100'))
+    )
+
+warmup_started = False
+warmup_lock = threading.Lock()
+
+def start_background_warmup():
+    """Load the heavy subsystems in the background once the first request arrives"""
+    global warmup_started
+    if warmup_started:
+        return
+    with warmup_lock:
+        if warmup_started:
+            return
+        warmup_started = True
+    report_unavailable_models()
+    if os.getenv('NEUROPREP_WARMUP', '1') == '1':
+        start_warmup(
+            [ProctorService, SpeechAnalyzer, question_generation_pipeline],
+            delay=float(os.getenv('NEUROPREP_WARMUP_DELAY', '1.0'))
+        )
+
 # Function to check if questions are loaded
 def questions_are_loaded():
     # Check both session and global variable for all question types
-    required_question_types = ['introduction', 'aptitude', 'technical', 'coding', 'hr']
+    required_question_types = ROUND_TYPES
     
     # Check global variable
     if all(q_type in INTERVIEW_QUESTIONS for q_type in required_question_types):
@@ -75,13 +157,154 @@ def require_questions(f):
 
 @app.before_request
 def initialize_session():
-    global proctor_service, speech_analyzer
+    start_background_warmup()
     if 'user_id' not in session:
         session['user_id'] = str(uuid.uuid4())
-    if proctor_service is None:
-        proctor_service = ProctorService(session_id=session['user_id'])
+    elif session['user_id'] not in restored_sessions:
+        restore_session_state(session['user_id'])
+    apply_generated_questions()
+
+def apply_generated_questions():
+    """Copy the result of a finished generation job, and any later upgrades, into the session cookie"""
+    job_id = session.get('generation_job_id')
+    upgrades = question_upgrades.get(job_id, [])
+    if not job_id or (session.get('applied_generation_job_id') == job_id
+                      and session.get('applied_upgrades', 0) == len(upgrades)):
+        return
+    job = job_runner().get(job_id)
+    if job is not None and job.status == SUCCEEDED:
+        if session.get('applied_generation_job_id') == job_id:
+            rounds = upgrades[session.get('applied_upgrades', 0):]
+        else:
+            rounds = list(job.result)
+        for round_type in rounds:
+            session[f'{round_type}_questions'] = job.result[round_type]
+        session['applied_generation_job_id'] = job_id
+        session['applied_upgrades'] = len(upgrades)
+
+def mark_round_served(round_type):
+    """Record that the candidate has seen a round, freezing its questions"""
+    with question_upgrades_lock:
+        served_rounds.setdefault(session.get('user_id'), set()).add(round_type)
+
+def journal_event(event_type, sync=False, **data):
+    """Record a session event so its state can be rebuilt after a restart"""
+    try:
+        session_journal().append(session['user_id'], event_type, data, sync=sync)
+    except Exception as e:
+        logger.error(f"Error journaling {event_type}: {str(e)}")
+
+def restore_session_state(user_id):
+    """Rebuild in-memory and cookie state from the journal, once per process"""
+    restored_sessions.add(user_id)
+    state = session_journal().get_session(user_id)
+    if not state:
+        return
+
+    questions = state.get('questions') or {}
+    if questions and not INTERVIEW_QUESTIONS:
+        INTERVIEW_QUESTIONS.update(questions)
+    for round_type, round_questions in questions.items():
+        session.setdefault(f'{round_type}_questions', round_questions)
+
+    voice = state.get('voice')
+    if voice and voice_chat.round_type is None and questions.get(voice['round_type']):
+        voice_chat.set_questions(questions[voice['round_type']], voice['round_type'])
+        voice_chat.current_question_index = voice['index']
+
+    if state.get('resume_path'):
+        session.setdefault('resume_path', state['resume_path'])
+    if state.get('db_session_id'):
+        session.setdefault('session_id', state['db_session_id'])
+    for round_type, score in (state.get('scores') or {}).items():
+        session.setdefault(f'{round_type}_score', score)
+    coding = state.get('coding')
+    if coding:
+        session.setdefault('current_coding_question', coding['current_index'])
+        session.setdefault('submissions', coding['submissions'])
+    logger.info(f"Restored session {user_id} from the journal")
+
+def get_proctor_service(session_id=None):
+    """Return the proctoring service for a session, creating it on first use.
+
+    Returns None once monitoring for the session has been released, until
+    reopen_proctor_service() is called for it.
+    """
+    session_id = session_id or session['user_id']
+    with proctor_services_lock:
+        service = proctor_services.get(session_id)
+        if service is not None or session_id in released_proctor_sessions:
+            return service
+
+    # Model setup is slow, so build outside the lock that frame workers share
+    created = ProctorService(session_id=session_id)
+    with proctor_services_lock:
+        # Monitoring may have ended while the service was being built
+        service = None if session_id in released_proctor_sessions else \
+            proctor_services.setdefault(session_id, created)
+    if service is not created:
+        created.close()
+    return service
+
+def reopen_proctor_service(session_id):
+    """Allow a released session to be monitored again"""
+    with proctor_services_lock:
+        released_proctor_sessions.pop(session_id, None)
+
+def release_proctor_service(session_id):
+    """Stop frame analysis for a session and free its proctoring resources"""
+    frame_pipeline.close_session(session_id)
+    now = time.monotonic()
+    with proctor_services_lock:
+        service = proctor_services.pop(session_id, None)
+        released_proctor_sessions[session_id] = now
+        # Queued frames expire long before this, so older markers can go
+        for stale in [sid for sid, released_at in released_proctor_sessions.items()
+                      if now - released_at > RELEASED_MARKER_SECONDS]:
+            del released_proctor_sessions[stale]
+    if service is not None:
+        service.close()
+
+def analyze_session_frame(session_id, frame):
+    """Analyze a frame with the session's service, created by its first frame; drop it if monitoring has ended"""
+    service = get_proctor_service(session_id)
+    if service is None:
+        return None
+    return service.analyze_frame(frame)
+
+def emit_incidents(sid, incidents):
+    socketio.emit('incident_detected', {'incidents': incidents}, to=sid)
+
+# Frames from the 'frame' event are decoded and analyzed on a worker pool,
+# keeping only the newest pending frame per session
+frame_pipeline = FrameIngestionPipeline(
+    analyze_fn=analyze_session_frame,
+    emit_fn=emit_incidents,
+    max_workers=int(os.getenv('NEUROPREP_FRAME_WORKERS', '8')),
+    queue_size=int(os.getenv('NEUROPREP_FRAME_QUEUE_SIZE', '1'))
+)
+
+def get_speech_analyzer():
+    """Create the speech analyzer on first use"""
+    global speech_analyzer
     if speech_analyzer is None:
         speech_analyzer = SpeechAnalyzer(session_id=session['user_id'])
+    return speech_analyzer
+
+def record_cohort_scores(round_type, overall_score, category_scores=None, metrics=None):
+    """Add a scored round to the cohort sketches and return its percentiles"""
+    # Categories without questions this round carry no signal
+    if metrics is not None:
+        category_scores = {category: score for category, score in category_scores.items()
+                           if metrics.get(category, {}).get('total')}
+    try:
+        cohort = get_cohort_percentiles()
+        cohort.record(round_type, overall_score, category_scores,
+                      session_id=session.get('session_id') or session.get('user_id'))
+        return cohort.percentiles(round_type, overall_score, category_scores)
+    except Exception as e:
+        logger.error(f"Error updating cohort percentiles: {str(e)}")
+        return None
 
 @app.route("/")
 def index():
@@ -98,10 +321,9 @@ def process_resume():
         if 'user_id' not in session:
             session['user_id'] = str(uuid.uuid4())
             
-        # Initialize progress queue for this user
+        # Start a fresh progress topic so an earlier run is not replayed
         user_id = session['user_id']
-        if user_id not in progress_queues:
-            progress_queues[user_id] = queue.Queue()
+        progress_bus().reset(user_id)
             
         if 'resume' not in request.files:
             print("No resume file in request")  # Debug log
@@ -132,15 +354,26 @@ def process_resume():
                 
                 # Store the file path in session
                 session['resume_path'] = file_path
+                journal_event('resume_uploaded', resume_path=file_path)
                 print(f"File saved successfully at: {file_path}")  # Debug log
                 
                 # Add initial progress message
-                progress_queues[user_id].put("Resume uploaded successfully")
+                progress_bus().publish(user_id, "Resume uploaded successfully")
+                
+                # Start generating right away; /preparing only subscribes to progress
+                job = start_question_generation(user_id, file_path)
+                session['generation_job_id'] = job.id
                 
                 return jsonify({
                     "success": True,
-                    "redirect": "/preparing"
+                    "redirect": "/preparing",
+                    "job_id": job.id
                 })
+            except JobQueueFull:
+                return jsonify({
+                    "success": False,
+                    "error": "Server is busy, please try again shortly"
+                }), 503
             except Exception as save_error:
                 print(f"Error saving file: {str(save_error)}")  # Debug log
                 return jsonify({
@@ -163,76 +396,107 @@ def process_resume():
 
 @app.route('/progress-stream')
 def progress_stream():
+    """SSE fallback for progress; waits on a per-connection queue fed by the bus"""
     try:
-        # Initialize user session if not exists
-        if 'user_id' not in session:
-            session['user_id'] = str(uuid.uuid4())
-            
         user_id = session.get('user_id')
         if not user_id:
             print("No user_id in session for progress stream")  # Debug log
             return "data: ERROR:User session not found\n\n", 200, {'Content-Type': 'text/event-stream'}
-            
-        # Initialize progress queue if not exists
-        if user_id not in progress_queues:
-            progress_queues[user_id] = queue.Queue()
-            progress_queues[user_id].put("Initializing progress tracking...")
+
+        after_seq = request.headers.get('Last-Event-ID', request.args.get('last_seq', 0), type=int) or 0
 
         def generate():
+            events = queue.Queue()
+            subscription_id = progress_bus().subscribe(user_id, events.put, after_seq=after_seq)
             try:
-                queue_obj = progress_queues[user_id]
-                last_message_time = time.time()
-                
                 while True:
                     try:
-                        # Send heartbeat every 15 seconds if no message
-                        current_time = time.time()
-                        if current_time - last_message_time >= 15:
-                            yield "data: heartbeat\n\n"
-                            last_message_time = current_time
-                            
-                        # Try to get a message from the queue
-                        try:
-                            message = queue_obj.get(timeout=1)
-                            last_message_time = time.time()
-                            
-                            # Handle different message types
-                            if message.startswith('ERROR:'):
-                                yield f"data: {message}\n\n"
-                                break
-                            elif message.startswith('REDIRECT:'):
-                                yield f"data: {message}\n\n"
-                                break
-                            else:
-                                yield f"data: {message}\n\n"
-                                
-                        except queue.Empty:
-                            continue
-                            
-                    except Exception as e:
-                        print(f"Error in progress stream loop: {str(e)}")  # Debug log
-                        yield f"data: ERROR:Internal server error: {str(e)}\n\n"
+                        event = events.get(timeout=15)
+                    except queue.Empty:
+                        yield "data: heartbeat\n\n"
+                        continue
+                    yield f"id: {event['seq']}\ndata: {event['message']}\n\n"
+                    if event['message'].startswith(('ERROR:', 'REDIRECT:')):
                         break
-                        
-            except Exception as e:
-                print(f"Error in progress stream generator: {str(e)}")  # Debug log
-                yield f"data: ERROR:Stream error: {str(e)}\n\n"
-                
             finally:
-                # Only remove the queue if we're stopping due to completion or error
-                if user_id in progress_queues:
-                    last_message = queue_obj.get() if not queue_obj.empty() else None
-                    if last_message and (last_message.startswith('ERROR:') or last_message.startswith('REDIRECT:')):
-                        del progress_queues[user_id]
-                    
+                progress_bus().unsubscribe(user_id, subscription_id)
+
         return Response(generate(), mimetype='text/event-stream')
         
     except Exception as e:
         print(f"Error setting up progress stream: {str(e)}")  # Debug log
         return "data: ERROR:Failed to setup progress stream\n\n", 200, {'Content-Type': 'text/event-stream'}
 
-@app.route("/generate-questions")
+def run_question_generation(job, user_id, resume_path):
+    """Background job: generate the questions for every round for one candidate"""
+    questions = {}  # also the job result, so late upgrades show up in it
+
+    def publish(message):
+        job.check_cancelled()
+        progress_bus().publish(user_id, message)
+
+    def upgrade(round_type, round_questions):
+        # Called from a pipeline worker when a round that fell back finishes late
+        with question_upgrades_lock:
+            if job.cancel_requested or round_type in served_rounds.get(user_id, ()):
+                logger.info(f"Keeping standard {round_type} questions for {user_id}")
+                return
+            questions[round_type] = round_questions
+            INTERVIEW_QUESTIONS[round_type] = round_questions
+            question_upgrades.setdefault(job.id, []).append(round_type)
+            if len(questions) == len(ROUND_TYPES):
+                session_journal().append(user_id, 'questions_assigned', {'questions': dict(questions)}, sync=True)
+        logger.info(f"Upgraded {round_type} questions for {user_id}")
+
+    try:
+        with question_upgrades_lock:
+            served_rounds.pop(user_id, None)
+
+        # Coding questions come from the pipeline's coding stage, matched to the resume;
+        # its LLM calls queue behind interactive grading, sharing fairly with other candidates
+        with llm_context(REFILL, user_id):
+            generated = question_generation_pipeline(
+                resume_path,
+                progress_callback=publish,
+                on_late_result=upgrade
+            )
+        job.check_cancelled()
+        
+        with question_upgrades_lock:
+            # An upgrade may already have landed for a round; keep it
+            for round_type, round_questions in zip(ROUND_TYPES, generated):
+                questions.setdefault(round_type, round_questions)
+            # The session cookie picks these up on the candidate's next request
+            INTERVIEW_QUESTIONS.update(questions)
+            session_journal().append(user_id, 'questions_assigned', {'questions': dict(questions)}, sync=True)
+        
+        progress_bus().publish(user_id, "Questions generated successfully")
+        
+        # Send redirect message
+        progress_bus().publish(user_id, "REDIRECT:/introduction")
+        print(f"Sent redirect message for user {user_id}")  # Debug log
+        return questions
+        
+    except Exception as e:
+        # The pipeline wraps errors from its callback, so check the flag itself;
+        # a cancelled run stays quiet because its replacement owns the topic now
+        if job.cancel_requested:
+            raise JobCancelled(str(e))
+        print(f"Error in generate_questions: {str(e)}")
+        progress_bus().publish(user_id, f"ERROR:{str(e)}")
+        raise
+
+def start_question_generation(user_id, resume_path):
+    """Enqueue question generation, replacing any run still in progress"""
+    previous = job_runner().find(user_id, kind='generate_questions', active_only=False)
+    if previous is not None:
+        job_runner().cancel(previous.id)
+        question_upgrades.pop(previous.id, None)
+    return job_runner().submit('generate_questions', run_question_generation, user_id, resume_path, owner=user_id)
+
+@app.route("/generate-questions", methods=["GET", "POST"])
 def generate_questions():
+    """Start (or retry) question generation; progress arrives over the progress bus"""
     try:
         # Get user ID from session
         user_id = session.get('user_id')
@@ -243,59 +507,36 @@ def generate_questions():
         resume_path = session.get('resume_path')
         if not resume_path:
             return jsonify({'success': False, 'error': 'No resume uploaded'})
-            
-        # Initialize progress queue for this user
-        if user_id not in progress_queues:
-            progress_queues[user_id] = queue.Queue()
-            
-        # Initialize question service for LeetCode integration
-        question_service = QuestionService()
-        
-        # Get coding questions from LeetCode first
-        progress_queues[user_id].put("Fetching coding questions from LeetCode...")
-        coding_questions = question_service.get_questions_by_difficulty([], 'beginner')
-        
-        if not coding_questions:
-            progress_queues[user_id].put("ERROR:Failed to fetch coding questions")
-            return jsonify({'success': False, 'error': 'Failed to fetch coding questions'})
-            
-        # Log the fetched questions for debugging
-        print(f"Fetched {len(coding_questions)} coding questions")
-        for q in coding_questions:
-            print(f"Question: {q['title']}, Difficulty: {q['difficulty']}")
-        
-        # Generate other questions using the pipeline
-        progress_queues[user_id].put("Generating other questions...")
-        intro_questions, aptitude_questions, technical_questions, _, hr_questions = question_generation_pipeline(
-            resume_path,
-            progress_callback=lambda msg: progress_queues[user_id].put(msg)
-        )
         
-        # Store all questions in both session and global variable
-        session['introduction_questions'] = intro_questions
-        session['aptitude_questions'] = aptitude_questions
-        session['technical_questions'] = technical_questions
-        session['coding_questions'] = coding_questions
-        session['hr_questions'] = hr_questions
+        job = job_runner().find(user_id, kind='generate_questions')
+        if job is None:
+            # A retry starts from a clean topic so the previous error is not replayed
+            progress_bus().reset(user_id)
+            job = start_question_generation(user_id, resume_path)
+            session['generation_job_id'] = job.id
         
-        INTERVIEW_QUESTIONS['introduction'] = intro_questions
-        INTERVIEW_QUESTIONS['aptitude'] = aptitude_questions
-        INTERVIEW_QUESTIONS['technical'] = technical_questions
-        INTERVIEW_QUESTIONS['coding'] = coding_questions
-        INTERVIEW_QUESTIONS['hr'] = hr_questions
-        
-        progress_queues[user_id].put("Questions generated successfully")
-        
-        # Send redirect message
-        progress_queues[user_id].put("REDIRECT:/introduction")
-        print(f"Sent redirect message for user {user_id}")  # Debug log
-        
-        return jsonify({'success': True})
+        return jsonify({'success': True, 'job_id': job.id})
         
+    except JobQueueFull:
+        return jsonify({'success': False, 'error': 'Server is busy, please try again shortly'}), 503
     except Exception as e:
         print(f"Error in generate_questions: {str(e)}")
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route("/jobs/<job_id>")
+def job_status(job_id):
+    job = job_runner().get(job_id)
+    if job is None or job.owner != session.get('user_id'):
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job.to_dict()})
+
+@app.route("/jobs/<job_id>/cancel", methods=["POST"])
+def cancel_job(job_id):
+    job = job_runner().get(job_id)
+    if job is None or job.owner != session.get('user_id'):
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify({'success': job_runner().cancel(job_id), 'job': job.to_dict()})
+
 @app.route("/introduction")
 @require_questions
 def introduction_instructions():
@@ -338,8 +579,14 @@ def coding_test():
         # Initialize session if not exists
         if 'session_id' not in session:
             session['session_id'] = str(uuid.uuid4())
+            journal_event('session_started', db_session_id=session['session_id'])
+            # Incidents and speech metrics are keyed by user_id; analytics joins through this
+            get_storage().execute_write(
+                "INSERT OR IGNORE INTO session_users (session_id, user_id) VALUES (?, ?)",
+                (session['session_id'], session['user_id']))
             
         # Initialize coding questions if not in session
+        mark_round_served('coding')
         if 'coding_questions' not in session:
             session['coding_questions'] = INTERVIEW_QUESTIONS.get('coding', [])
             
@@ -380,6 +627,9 @@ def start_interview():
                 "error": "Round type not specified"
             })
             
+        if round_type in ("introduction", "hr"):
+            mark_round_served(round_type)
+
         if round_type == "introduction":
             # Get introduction questions from session or global variable
             questions = session.get('introduction_questions') or INTERVIEW_QUESTIONS.get('introduction', [])
@@ -399,6 +649,7 @@ def start_interview():
                     "success": False,
                     "error": "No questions available"
                 })
+            journal_event('voice_cursor', round_type=round_type, index=voice_chat.current_question_index)
                 
             return jsonify({
                 "success": True,
@@ -424,6 +675,7 @@ def start_interview():
                     "success": False,
                     "error": "No questions available"
                 })
+            journal_event('voice_cursor', round_type=round_type, index=voice_chat.current_question_index)
                 
             return jsonify({
                 "success": True,
@@ -458,11 +710,16 @@ def process_response():
             })
 
         # Process the response using voice chat
+        answered_index = voice_chat.current_question_index
         result = voice_chat.process_response(text_response)
         print(f"Processing result: {result}")  # Debug log
+        journal_event('answer', round_type=voice_chat.round_type, question_number=answered_index,
+                      answer=text_response)
+        journal_event('voice_cursor', round_type=voice_chat.round_type, index=voice_chat.current_question_index)
         
         # If the round is complete, store the results
         if result.get("is_complete"):
+            journal_event('round_completed', round_type=voice_chat.round_type)
             session_id = session.get("session_id")
             if session_id:
                 validation_service = ValidationService(session_id)
@@ -478,15 +735,22 @@ def process_response():
             "error": str(e)
         })
 
+def option_list(options):
+    """MCQ options as a list; sets journaled before JSON generation hold a comma-separated string"""
+    if isinstance(options, str):
+        return [opt.strip() for opt in options.split(",")]
+    return list(options)
+
 @app.route("/get-aptitude-questions")
 @require_questions
 def get_aptitude_questions():
     try:
+        mark_round_served('aptitude')
         aptitude_questions = INTERVIEW_QUESTIONS.get("aptitude", {})
         formatted_questions = []
         
-        for question, (options_str, answer) in aptitude_questions.items():
-            options = [opt.strip() for opt in options_str.split(",")]
+        for question, (options, answer) in aptitude_questions.items():
+            options = option_list(options)
             formatted_questions.append({
                 "question": question,
                 "options": options,
@@ -507,6 +771,7 @@ def get_aptitude_questions():
 @require_questions
 def get_technical_questions():
     try:
+        mark_round_served('technical')
         technical_questions = INTERVIEW_QUESTIONS.get("technical", {})
         if not technical_questions:
             return jsonify({
@@ -517,7 +782,7 @@ def get_technical_questions():
         # Format questions for the frontend
         formatted_questions = []
         for question, data in technical_questions.items():
-            options = [opt.strip() for opt in data[0].split(",")]  # Split options string into list
+            options = option_list(data[0])
             correct_answer = data[1]  # Get the correct answer
             formatted_questions.append({
                 "question": question,
@@ -580,7 +845,9 @@ def submit_aptitude():
                 is_correct = validation_service.validate_aptitude_answer(
                     question_text,
                     answer,
-                    correct_answer
+                    correct_answer,
+                    category=category,
+                    question_number=i + 1
                 )
                 
                 if is_correct:
@@ -614,12 +881,15 @@ def submit_aptitude():
             'metrics': metrics,
             'question_results': question_results
         }
+        journal_event('round_scored', sync=True, round_type='aptitude', score=session['aptitude_score'])
+        percentiles = record_cohort_scores('aptitude', overall_score, category_scores, metrics)
         
         return jsonify({
             "success": True,
             "overall_score": overall_score,
             "category_scores": category_scores,
             "metrics": metrics,
+            "percentiles": percentiles,
             "correct_answers": correct_answers,
             "total_questions": total_questions,
             "question_results": question_results,
@@ -674,7 +944,9 @@ def submit_technical():
                 is_correct = validation_service.validate_technical_answer(
                     question_text,
                     answer,
-                    correct_answer
+                    correct_answer,
+                    category=category,
+                    question_number=i + 1
                 )
                 
                 if is_correct:
@@ -708,12 +980,15 @@ def submit_technical():
             'metrics': metrics,
             'question_results': question_results
         }
+        journal_event('round_scored', sync=True, round_type='technical', score=session['technical_score'])
+        percentiles = record_cohort_scores('technical', overall_score, category_scores, metrics)
         
         return jsonify({
             "success": True,
             "overall_score": overall_score,
             "category_scores": category_scores,
             "metrics": metrics,
+            "percentiles": percentiles,
             "correct_answers": correct_answers,
             "total_questions": total_questions,
             "question_results": question_results,
@@ -788,11 +1063,21 @@ def view_scores():
         technical_score = session.get('technical_score', {})
         coding_score = session.get('coding_score', {})
         
+        # Percentiles are looked up now so they reflect the current cohort
+        cohort = get_cohort_percentiles()
+        percentiles = {}
+        for round_type, score in (('aptitude', aptitude_score), ('technical', technical_score),
+                                  ('coding', coding_score)):
+            if score:
+                percentiles[round_type] = cohort.percentiles(
+                    round_type, score.get('overall_score'), score.get('category_scores'))
+        
         return render_template(
             "scores.html",
             aptitude_score=aptitude_score,
             technical_score=technical_score,
-            coding_score=coding_score
+            coding_score=coding_score,
+            percentiles=percentiles
         )
     except Exception as e:
         print(f"Error viewing scores: {str(e)}")
@@ -801,33 +1086,47 @@ def view_scores():
 @socketio.on('connect')
 def handle_connect():
     session['monitoring'] = True
+    reopen_proctor_service(session.get('user_id'))
     emit('connection_response', {'data': 'Connected'})
 
 @socketio.on('disconnect')
 def handle_disconnect():
     session['monitoring'] = False
-    proctor_service.end_monitoring(session.get('user_id'))
+    release_proctor_service(session.get('user_id'))
+    subscription = progress_subscriptions.pop(request.sid, None)
+    if subscription is not None:
+        progress_bus().unsubscribe(*subscription)
+
+@socketio.on('subscribe_progress')
+def handle_subscribe_progress(data=None):
+    """Push this session's progress events to the socket, replaying any after last_seq"""
+    sid = request.sid
+    topic = session.get('user_id')
+    if not topic:
+        emit('progress', {'seq': 0, 'message': 'ERROR:User session not found'})
+        return
+    previous = progress_subscriptions.pop(sid, None)
+    if previous is not None:
+        progress_bus().unsubscribe(*previous)
+    after_seq = int((data or {}).get('last_seq') or 0)
+    subscription_id = progress_bus().subscribe(
+        topic, lambda event: socketio.emit('progress', event, to=sid), after_seq=after_seq)
+    progress_subscriptions[sid] = (topic, subscription_id)
 
 @socketio.on('frame')
 def handle_frame(frame_data):
     if not session.get('monitoring'):
         return
     
-    incidents = proctor_service.analyze_frame(
-        frame_data,
-        session.get('user_id'),
-        session.get('current_question')
-    )
-    
-    if incidents:
-        emit('incident_detected', {'incidents': incidents})
+    # Only enqueue here; decoding and analysis run on the frame worker pool
+    frame_pipeline.submit(session.get('user_id'), frame_data, sid=request.sid)
 
 @socketio.on('audio')
 def handle_audio(audio_data):
     if not session.get('monitoring'):
         return
     
-    metrics = speech_analyzer.analyze_audio(
+    metrics = get_speech_analyzer().analyze_audio(
         audio_data,
         session.get('user_id'),
         session.get('current_question')
@@ -836,20 +1135,45 @@ def handle_audio(audio_data):
     if metrics:
         emit('speech_metrics', {'metrics': metrics})
 
+@app.route('/proctoring-stats')
+@admin_required
+def proctoring_stats():
+    from services.phone_detection import get_phone_detection_stats
+    cascade = {}
+    with proctor_services_lock:
+        for service in proctor_services.values():
+            for key, value in service.cascade_stats.items():
+                cascade[key] = cascade.get(key, 0) + value
+    return jsonify({
+        'frame_ingestion': frame_pipeline.get_stats(),
+        'phone_detection': get_phone_detection_stats(),
+        'cascade': cascade
+    })
+
+@app.route('/llm-stats')
+@admin_required
+def llm_stats():
+    from services.llm_client import get_llm_client
+    from services.model_router import get_model_router
+    stats = get_llm_client().get_stats()
+    stats['routing'] = get_model_router().get_stats()
+    return jsonify(stats)
+
 @app.route('/start-monitoring', methods=['POST'])
 def start_monitoring():
     user_id = session.get('user_id')
     question_id = request.json.get('question_id')
     
     session['current_question'] = question_id
-    proctor_service.start_monitoring(user_id)
+    reopen_proctor_service(user_id)
+    get_proctor_service().start_monitoring()
     
     return jsonify({'status': 'success'})
 
 @app.route('/end-monitoring', methods=['POST'])
 def end_monitoring():
     user_id = session.get('user_id')
-    proctor_service.end_monitoring(user_id)
+    release_proctor_service(user_id)
     session['monitoring'] = False
     
     return jsonify({'status': 'success'})
@@ -1031,6 +1355,7 @@ def submit_coding():
         
         # Move to next question
         session['current_coding_question'] = current_index + 1
+        journal_event('coding_progress', current_index=current_index + 1, submissions=session['submissions'])
         
         # Check if all questions are completed
         if session['current_coding_question'] >= len(questions):
@@ -1049,11 +1374,14 @@ def submit_coding():
                 'total_tests': total_tests,
                 'submissions': session['submissions']
             }
+            journal_event('round_scored', sync=True, round_type='coding', score=session['coding_score'])
+            percentiles = record_cohort_scores('coding', score)
             
             return jsonify({
                 'success': True,
                 'completed': True,
-                'score': score
+                'score': score,
+                'percentiles': percentiles
             })
         else:
             return jsonify({
@@ -1113,41 +1441,83 @@ def start_coding_round():
         print(f"Error starting coding round: {str(e)}")  # Debug log
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route("/sessions/<session_id>/record")
+@admin_required
+def session_record(session_id):
+    from services.maintenance import get_session_record
+    record = get_session_record(session_id)
+    if record is None:
+        return jsonify({'success': False, 'error': 'Session not found'}), 404
+    return jsonify({'success': True, 'record': record})
+
+@app.route("/export/<table>")
+@admin_required
+def export_results(table):
+    """Stream one results table as Arrow IPC or Parquet, chunk by chunk"""
+    from services.export import EXPORT_TABLES, FORMATS, stream_table
+    fmt = request.args.get('format', 'arrow')
+    if table not in EXPORT_TABLES or fmt not in FORMATS:
+        return jsonify({'success': False, 'error': 'Unknown table or format'}), 400
+
+    chunks = stream_table(
+        table,
+        fmt=fmt,
+        start=request.args.get('start'),
+        end=request.args.get('end'),
+        rounds=request.args.getlist('round') or None,
+        chunk_size=request.args.get('chunk_size', 50000, type=int)
+    )
+    mimetype = 'application/vnd.apache.parquet' if fmt == 'parquet' else 'application/vnd.apache.arrow.stream'
+    return Response(chunks, mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename={table}{FORMATS[fmt]}'
+    })
+
+@app.route("/analytics/cohort")
+@admin_required
+def cohort_analytics():
+    """Cohort statistics for recruiter dashboards, cached until the data changes"""
+    from services.analytics import get_cohort_analytics
+    analytics = get_cohort_analytics(float(os.getenv('NEUROPREP_ANALYTICS_REFRESH_SECONDS', '30')))
+    round_type = request.args.get('round')
+    min_attempts = request.args.get('min_attempts', 5, type=int)
+
+    report = analytics.report(round_type, min_attempts)
+    etag = analytics.etag(round_type, min_attempts)
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers={'ETag': f'"{etag}"'})
+    response = jsonify({'success': True, 'analytics': report})
+    response.set_etag(etag)
+    response.cache_control.max_age = int(analytics.refresh_interval)
+    return response
+
+@app.route("/startup-report")
+@admin_required
+def startup_report():
+    report = import_report()
+    report['app_import_seconds'] = APP_IMPORT_SECONDS
+    # Phone detection and emotion analysis quietly turn off without their models
+    report['models'] = report_unavailable_models()
+    return jsonify(report)
+
+APP_IMPORT_SECONDS = time.perf_counter() - APP_IMPORT_START
+logger.info(f"app module imported in {APP_IMPORT_SECONDS:.2f}s")
+
 if __name__ == '__main__':
     # Create the uploads directory if it doesn't exist
     if not os.path.exists(app.config['UPLOAD_FOLDER']):
         os.makedirs(app.config['UPLOAD_FOLDER'])
     
-    # Create the database tables
-    with app.app_context():
-        conn = sqlite3.connect('interview.db')
-        cursor = conn.cursor()
-        
-        # Create proctoring_incidents table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS proctoring_incidents (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id TEXT NOT NULL,
-                timestamp DATETIME NOT NULL,
-                incident_type TEXT NOT NULL,
-                confidence_score FLOAT NOT NULL,
-                details TEXT
-            )
-        ''')
-        
-        # Create round_completions table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS round_completions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                session_id INTEGER,
-                round_type TEXT NOT NULL,
-                completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (session_id) REFERENCES interview_sessions(id)
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+    # Create or upgrade the database schema (database/migrations)
+    get_storage()
+    
+    # Say up front if proctoring or speech features will run without their models
+    report_unavailable_models()
+    
+    # Periodic archival of old sessions and incremental VACUUM
+    maintenance_hours = float(os.getenv('NEUROPREP_MAINTENANCE_INTERVAL_HOURS', '0'))
+    if maintenance_hours > 0:
+        from services.maintenance import MaintenanceScheduler
+        MaintenanceScheduler(interval_hours=maintenance_hours).start()
     
     # Configure for immediate output
     import sys
@@ -1156,4 +1526,13 @@ if __name__ == '__main__':
     
     # Run the Flask app with SocketIO and force output to be unbuffered
     app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0
-    socketio.run(app, debug=True, host='0.0.0.0', port=5000, log_output=True)
+    port = int(os.getenv('PORT', '5000'))
+    # The Werkzeug debugger runs arbitrary code for whoever can reach it, so it
+    # is opt-in. Flask-SocketIO refuses the Werkzeug server when stdout is not
+    # a terminal (systemd, docker, benchmarks) unless NEUROPREP_ALLOW_WERKZEUG=1
+    # accepts it; that flag never enables the debugger.
+    debug = os.getenv('NEUROPREP_DEBUG', '0') == '1'
+    allow_werkzeug = debug or os.getenv('NEUROPREP_ALLOW_WERKZEUG', '0') == '1'
+    host = os.getenv('NEUROPREP_HOST', '127.0.0.1' if debug else '0.0.0.0')
+    socketio.run(app, debug=debug, host=host, port=port, log_output=True,
+                 allow_unsafe_werkzeug=allow_werkzeug)
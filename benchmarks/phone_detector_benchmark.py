@@ -0,0 +1,134 @@
+"""Compare phone detector backends for latency and agreement on recorded frames.
+
+The torch backend at 640px is the reference; every other configuration is
+scored against its detections. Usage:
+
+    python benchmarks/phone_detector_benchmark.py recorded_frames/ \
+        --configs torch:640 onnx:640 onnx:416 onnx:320:int8 --threads 1
+"""
+import argparse
+import glob
+import json
+import os
+import statistics
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.phone_detection import load_phone_detector_batch_fn
+
+
+def load_frames(directory, limit):
+    paths = sorted(glob.glob(os.path.join(directory, '*.jpg')) + glob.glob(os.path.join(directory, '*.png')))
+    frames = [cv2.imread(path) for path in paths[:limit]]
+    return [frame for frame in frames if frame is not None]
+
+
+def parse_config(spec):
+    parts = spec.split(':')
+    return {
+        'name': spec,
+        'backend': parts[0],
+        'img_size': int(parts[1]) if len(parts) > 1 else 640,
+        'int8': len(parts) > 2 and parts[2] == 'int8'
+    }
+
+
+def box_iou(a, b):
+    inter_w = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    inter_h = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = inter_w * inter_h
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def compare(reference, candidate, conf_threshold=0.5, iou_threshold=0.5):
+    """Precision/recall of candidate detections against the reference backend"""
+    true_positive = false_positive = false_negative = 0
+    frame_agreement = 0
+    for ref_dets, cand_dets in zip(reference, candidate):
+        ref_boxes = [d[:4] for d in ref_dets if d[4] > conf_threshold]
+        cand_boxes = [d[:4] for d in cand_dets if d[4] > conf_threshold]
+        frame_agreement += bool(ref_boxes) == bool(cand_boxes)
+        unmatched = list(ref_boxes)
+        for box in cand_boxes:
+            match = max(unmatched, key=lambda ref: box_iou(ref, box), default=None)
+            if match is not None and box_iou(match, box) >= iou_threshold:
+                unmatched.remove(match)
+                true_positive += 1
+            else:
+                false_positive += 1
+        false_negative += len(unmatched)
+    return {
+        'precision': true_positive / (true_positive + false_positive) if true_positive + false_positive else 1.0,
+        'recall': true_positive / (true_positive + false_negative) if true_positive + false_negative else 1.0,
+        'incident_agreement': frame_agreement / len(reference) if reference else 1.0
+    }
+
+
+def run_config(config, frames, batch_size, threads):
+    batch_fn = load_phone_detector_batch_fn(
+        backend=config['backend'], img_size=config['img_size'],
+        int8=config['int8'], intra_op_threads=threads
+    )
+    batch_fn(frames[:batch_size])  # warm up
+
+    detections, batch_times = [], []
+    for start in range(0, len(frames), batch_size):
+        batch = frames[start:start + batch_size]
+        began = time.perf_counter()
+        detections.extend(batch_fn(batch))
+        batch_times.append((time.perf_counter() - began) / len(batch))
+    return detections, batch_times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('frames_dir', help="Directory of recorded .jpg/.png frames")
+    parser.add_argument('--configs', nargs='+', default=['torch:640', 'onnx:640', 'onnx:416', 'onnx:320:int8'],
+                        help="backend:img_size[:int8] entries; the first is the reference")
+    parser.add_argument('--limit', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=8)
+    parser.add_argument('--threads', type=int, default=1, help="Inference threads (1 = per-core numbers)")
+    parser.add_argument('--json', dest='json_path', help="Write results to this file")
+    args = parser.parse_args(argv)
+
+    import torch
+    torch.set_num_threads(args.threads)
+    cv2.setNumThreads(args.threads)
+
+    frames = load_frames(args.frames_dir, args.limit)
+    if not frames:
+        print(f"No frames found in {args.frames_dir}")
+        return 1
+
+    results, reference = [], None
+    for spec in args.configs:
+        config = parse_config(spec)
+        detections, per_frame = run_config(config, frames, args.batch_size, args.threads)
+        if reference is None:
+            reference = detections
+        row = {
+            'config': spec,
+            'ms_per_frame_median': statistics.median(per_frame) * 1000,
+            'ms_per_frame_p95': float(np.percentile(per_frame, 95)) * 1000,
+            'fps_per_thread': 1.0 / statistics.mean(per_frame) / args.threads
+        }
+        row.update(compare(reference, detections))
+        results.append(row)
+        print(f"{spec:16} {row['ms_per_frame_median']:7.1f} ms/frame  {row['fps_per_thread']:6.1f} fps/thread  "
+              f"precision {row['precision']:.3f}  recall {row['recall']:.3f}  "
+              f"agreement {row['incident_agreement']:.3f}")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump({'frames': len(frames), 'threads': args.threads, 'results': results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""Measure cold-start time-to-first-byte of the Flask app.
+
+Each run spawns a fresh ``python app.py`` process and polls a route until the
+first byte of the response arrives. Usage:
+
+    python benchmarks/startup_benchmark.py --runs 5 --path /
+"""
+import argparse
+import json
+import os
+import secrets
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def measure_once(path, timeout, warmup):
+    port = _free_port()
+    # The child's stdout is not a terminal, so the Werkzeug server must be allowed explicitly
+    # /startup-report is an admin route, so the child gets a one-off admin token
+    admin_token = secrets.token_urlsafe(16)
+    env = dict(os.environ, PORT=str(port), NEUROPREP_DEBUG='0', NEUROPREP_ALLOW_WERKZEUG='1',
+               NEUROPREP_ADMIN_TOKEN=admin_token, NEUROPREP_WARMUP='1' if warmup else '0')
+    url = f"http://127.0.0.1:{port}{path}"
+
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, 'app.py'], cwd=BASE_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            if process.poll() is not None:
+                raise RuntimeError(f"app.py exited with code {process.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=timeout) as response:
+                    response.read(1)
+                    ttfb = time.perf_counter() - start
+                report = None
+                try:
+                    request = urllib.request.Request(f"http://127.0.0.1:{port}/startup-report",
+                                                     headers={'Authorization': f'Bearer {admin_token}'})
+                    with urllib.request.urlopen(request) as r:
+                        report = json.loads(r.read())
+                except (urllib.error.URLError, ValueError):
+                    pass
+                return ttfb, report
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.05)
+        raise TimeoutError(f"No response from {url} within {timeout}s")
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--path', default='/')
+    parser.add_argument('--timeout', type=float, default=120.0)
+    parser.add_argument('--no-warmup', action='store_true', help="Disable background warmup")
+    parser.add_argument('--json', dest='json_path', help="Write results to this file")
+    args = parser.parse_args(argv)
+
+    samples = []
+    last_report = None
+    for run in range(args.runs):
+        ttfb, last_report = measure_once(args.path, args.timeout, not args.no_warmup)
+        samples.append(ttfb)
+        print(f"run {run + 1}: time-to-first-byte {ttfb * 1000:.0f} ms")
+
+    samples.sort()
+    results = {
+        'path': args.path,
+        'runs': len(samples),
+        'ttfb_median_ms': statistics.median(samples) * 1000,
+        'ttfb_min_ms': samples[0] * 1000,
+        'ttfb_max_ms': samples[-1] * 1000,
+        'startup_report': last_report
+    }
+    print(f"median {results['ttfb_median_ms']:.0f} ms, "
+          f"min {results['ttfb_min_ms']:.0f} ms, max {results['ttfb_max_ms']:.0f} ms")
+    if last_report:
+        print(f"app module import: {last_report.get('app_import_seconds', 0):.2f}s")
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
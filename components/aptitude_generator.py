@@ -0,0 +1,565 @@
+import math
+import random
+
+# Procedural aptitude MCQs: every item comes from a parameterised template
+# with a computed answer and distractors built from the mistakes people
+# actually make (inverted ratios, percentage of the wrong base, ...).
+# No LLM is involved, so items are instant, reproducible for a seed and
+# effectively unlimited.
+
+CATEGORIES = ['numerical_ability', 'logical_reasoning', 'verbal_ability', 'data_interpretation']
+# Resume experience level -> base template difficulty (1 easy .. 3 hard)
+LEVEL_DIFFICULTY = {'beginner': 1, 'intermediate': 2, 'advanced': 3}
+OPTION_COUNT = 4
+
+_TEMPLATES = {category: [] for category in CATEGORIES}
+
+
+def _template(category):
+    def register(func):
+        _TEMPLATES[category].append(func)
+        return func
+    return register
+
+
+def _fmt(value):
+    """Integers without a decimal point, anything else to at most two places"""
+    return ('%.2f' % value).rstrip('0').rstrip('.')
+
+
+def _numeric(rng, answer, mistakes, unit='{}', step=None):
+    """
+    Format a numeric answer and three distractors
+
+    Distractors are drawn from the template's likely mistakes first, then
+    from near misses one or more steps away, always with the answer's sign.
+    """
+    step = step or max(1, round(abs(answer) / 10))
+    candidates = [m for m in mistakes if m is not None]
+    rng.shuffle(candidates)
+    offsets = [1, 2, 3, 4]
+    rng.shuffle(offsets)
+    candidates += [answer + sign * k * step for k in offsets for sign in rng.sample((1, -1), 2)]
+
+    answer_text = unit.format(_fmt(answer))
+    distractors, seen = [], {answer_text}
+    for value in candidates:
+        text = unit.format(_fmt(value))
+        if text in seen or (value > 0) != (answer > 0):
+            continue
+        seen.add(text)
+        distractors.append(text)
+        if len(distractors) == OPTION_COUNT - 1:
+            break
+    return answer_text, distractors
+
+
+# --- Numerical ability ------------------------------------------------------
+
+@_template('numerical_ability')
+def _percent_of(rng, difficulty):
+    percent = rng.choice([[10, 20, 25, 50], [5, 15, 30, 35, 45], [7.5, 12.5, 17.5, 22.5, 37.5]][difficulty - 1])
+    base = 40 * rng.randint(2, 10 * difficulty)
+    answer = base * percent / 100
+    return (f"Calculate {_fmt(percent)}% of {base}.",
+            *_numeric(rng, answer, [base * percent / 10, base * (percent + 5) / 100, base - answer]))
+
+
+@_template('numerical_ability')
+def _discount(rng, difficulty):
+    discount = rng.choice([[10, 20, 25, 50], [15, 20, 30, 40], [12.5, 35, 37.5, 45]][difficulty - 1])
+    original = 80 * rng.randint(5, 25 * difficulty)
+    price = original * (100 - discount) / 100
+    item = rng.choice(['jacket', 'phone', 'watch', 'bicycle', 'lamp', 'backpack'])
+    return (f"After a {_fmt(discount)}% discount a {item} sells for {_fmt(price)}. What was its original price?",
+            *_numeric(rng, original, [price * (100 + discount) / 100, price + discount,
+                                      original * (100 + discount) / 100], step=original / 20))
+
+
+@_template('numerical_ability')
+def _work(rng, difficulty):
+    first, second = rng.sample(range(2, 4 + 2 * difficulty), 2)
+    unit = rng.randint(1, 2 + difficulty)
+    days, answer = second * unit, first * unit
+    return (f"If {first} workers can finish a job in {days} days, how many days will "
+            f"{second} workers take working at the same rate?",
+            *_numeric(rng, answer, [days * second / first, days + first - second, days], unit='{} days'))
+
+
+@_template('numerical_ability')
+def _speed(rng, difficulty):
+    if difficulty < 3:
+        speed, hours = 5 * rng.randint(6, 24), rng.randint(2, 3 + difficulty)
+        return (f"A train covers {speed * hours} km in {hours} hours. What is its average speed?",
+                *_numeric(rng, speed, [speed * hours / (hours + 1), speed + hours, speed * 2],
+                          unit='{} km/h', step=5))
+    # Round trip: the average speed is the harmonic mean, not the arithmetic one
+    slow, fast = rng.choice([(30, 60), (40, 60), (20, 30), (60, 90), (45, 90), (36, 45), (40, 120), (30, 70)])
+    answer = 2 * slow * fast / (slow + fast)
+    return (f"A car goes to a town at {slow} km/h and returns along the same road at {fast} km/h. "
+            f"What is its average speed for the whole journey?",
+            *_numeric(rng, answer, [(slow + fast) / 2, fast - slow, answer + 5], unit='{} km/h', step=2))
+
+
+@_template('numerical_ability')
+def _interest(rng, difficulty):
+    principal = 1000 * rng.randint(2, 5 * difficulty)
+    if difficulty < 3:
+        rate, years = rng.randint(4, 12), rng.randint(2, 5)
+        answer = principal * rate * years / 100
+        return (f"Calculate the simple interest on {principal} at {rate}% per annum for {years} years.",
+                *_numeric(rng, answer, [principal * rate / 100, principal * rate * (years + 1) / 100,
+                                        principal + answer]))
+    rate = rng.choice([10, 20])
+    answer = principal * ((1 + rate / 100) ** 2 - 1)
+    return (f"Calculate the compound interest on {principal} at {rate}% per annum for 2 years, compounded yearly.",
+            *_numeric(rng, answer, [principal * rate * 2 / 100, principal * (1 + rate / 100) ** 2,
+                                    principal * rate / 100]))
+
+
+@_template('numerical_ability')
+def _ratio(rng, difficulty):
+    first, second = rng.sample(range(1, 3 + 2 * difficulty), 2)
+    share = rng.randint(2, 5 * difficulty)
+    total = (first + second) * share
+    return (f"The ratio of boys to girls in a school club is {first}:{second}. "
+            f"If the club has {total} members, what number of them are girls?",
+            *_numeric(rng, second * share, [first * share, total / second, total - first]))
+
+
+@_template('numerical_ability')
+def _average(rng, difficulty):
+    size = 3 + difficulty
+    values = [rng.randint(5, 20 * difficulty) for _ in range(size)]
+    values[-1] += -sum(values) % size
+    answer = sum(values) / size
+    ordered = sorted(values)
+    return (f"Calculate the average of {', '.join(map(str, values))}.",
+            *_numeric(rng, answer, [sum(values) / (size - 1), ordered[size // 2], sum(values) / (size + 1)]))
+
+
+@_template('numerical_ability')
+def _profit(rng, difficulty):
+    percent = rng.choice([[10, 20, 25, 50], [5, 15, 30, 40], [12.5, 35, 37.5, 60]][difficulty - 1])
+    cost = 40 * rng.randint(3, 15 * difficulty)
+    price = cost * (100 + percent) / 100
+    return (f"An article bought for {cost} is sold for {_fmt(price)}. What is the profit percentage?",
+            # The usual slip is taking the profit as a percentage of the selling price
+            *_numeric(rng, percent, [100 * (price - cost) / price, percent / 2, percent + 10],
+                      unit='{}%', step=5))
+
+
+# --- Logical reasoning ------------------------------------------------------
+
+def _series(rng, difficulty):
+    """(shown terms, next term, wrong continuations)"""
+    kind = rng.choice([['arithmetic'], ['arithmetic', 'geometric', 'growing'],
+                       ['geometric', 'growing', 'alternating', 'affine']][difficulty - 1])
+    if kind == 'arithmetic':
+        start, step = rng.randint(1, 30), rng.randint(2, 9 + 3 * difficulty)
+        terms = [start + step * i for i in range(6)]
+        wrong = [terms[4] + step + 1, terms[4] + 2 * step, terms[4] + step - 1]
+    elif kind == 'geometric':
+        start, ratio = rng.randint(1, 5), rng.randint(2, 3)
+        terms = [start * ratio ** i for i in range(6)]
+        wrong = [terms[4] + (terms[4] - terms[3]), terms[4] * ratio + ratio, terms[4] * (ratio + 1)]
+    elif kind == 'growing':
+        # Differences grow by a fixed amount each term
+        start, first, growth = rng.randint(1, 10), rng.randint(1, 5), rng.randint(1, 3)
+        terms = [start]
+        for i in range(5):
+            terms.append(terms[-1] + first + growth * i)
+        wrong = [2 * terms[4] - terms[3], terms[5] + growth, terms[5] - growth]
+    elif kind == 'alternating':
+        # Two interleaved arithmetic series
+        a, b = rng.randint(1, 10), rng.randint(20, 40)
+        da, db = rng.randint(2, 5), -rng.randint(1, 4)
+        terms = [a + da * (i // 2) if i % 2 == 0 else b + db * (i // 2) for i in range(6)]
+        wrong = [terms[4] + db, terms[3] + da, terms[4] + da + 1]
+    else:
+        start, mult, add = rng.randint(1, 4), rng.randint(2, 3), rng.choice([-1, 1, 2])
+        terms = [start]
+        for _ in range(5):
+            terms.append(terms[-1] * mult + add)
+        wrong = [terms[4] * mult, terms[4] * mult - add, terms[5] + mult]
+    return terms[:5], terms[5], wrong
+
+
+@_template('logical_reasoning')
+def _next_in_series(rng, difficulty):
+    shown, answer, wrong = _series(rng, difficulty)
+    return (f"What comes next in the sequence: {', '.join(map(str, shown))}, ?",
+            *_numeric(rng, answer, wrong))
+
+
+_PRIMES = [n for n in range(11, 300) if all(n % d for d in range(2, int(n ** 0.5) + 1))]
+# Odd composites that look prime at a glance
+_PRIME_LOOKALIKES = [n for n in range(21, 300, 2) if n % 5 and n not in _PRIMES]
+
+
+def _stands_out(numbers, candidate):
+    """Whether candidate differs from all the other numbers by parity or by a common factor"""
+    others = [n for n in numbers if n != candidate]
+    if len({n % 2 for n in others}) == 1 and candidate % 2 != others[0] % 2:
+        return True
+    common = math.gcd(*others)
+    return common > 1 and candidate % common != 0
+
+
+@_template('logical_reasoning')
+def _odd_one_out(rng, difficulty):
+    if difficulty == 1:
+        # Redraw until the non-multiple is the only number that stands out
+        while True:
+            factor = rng.randint(3, 9)
+            members = [factor * k for k in rng.sample(range(2, 13), 3)]
+            odd = factor * rng.randint(2, 12) + rng.randint(1, factor - 1)
+            numbers = members + [odd]
+            if not any(_stands_out(numbers, n) for n in members):
+                break
+    else:
+        limit = 100 * difficulty
+        members = rng.sample([p for p in _PRIMES if p < limit], 3)
+        odd = rng.choice([n for n in _PRIME_LOOKALIKES if n < limit])
+    options = [str(n) for n in members + [odd]]
+    rng.shuffle(options)
+    return (f"Which one is the odd one out: {', '.join(options)}?", str(odd), [str(n) for n in members])
+
+
+_CODE_WORDS = ['CAT', 'DOG', 'SUN', 'MILK', 'TREE', 'BOOK', 'LAMP', 'ROAD', 'FISH', 'GOLD',
+               'RAIN', 'SHIP', 'DESK', 'WIND', 'STAR', 'PLAN', 'CODE', 'BEAM', 'FROG', 'KITE']
+
+
+def _shift(word, offset):
+    return ''.join(chr((ord(c) - 65 + offset) % 26 + 65) for c in word)
+
+
+@_template('logical_reasoning')
+def _letter_code(rng, difficulty):
+    example, word = rng.sample(_CODE_WORDS, 2)
+    offset = rng.choice([[1, 2], [2, 3, -1], [3, 4, -2]][difficulty - 1])
+    encode = (lambda w: _shift(w, offset)[::-1]) if difficulty == 3 else (lambda w: _shift(w, offset))
+    answer = encode(word)
+    wrong = [_shift(word, offset + 1), _shift(word, -offset), answer[::-1], _shift(word, offset)[1:] + answer[0]]
+    distractors = []
+    for candidate in wrong:
+        if candidate != answer and candidate not in distractors:
+            distractors.append(candidate)
+    return (f"If in a certain code {example} is written as {encode(example)}, how is {word} written in that code?",
+            answer, distractors[:OPTION_COUNT - 1])
+
+
+_NAMES = ['Asha', 'Ravi', 'Meera', 'Karan', 'Neha', 'Arjun', 'Priya', 'Vikram', 'Sara', 'Dev']
+
+
+@_template('logical_reasoning')
+def _ages(rng, difficulty):
+    older, younger = rng.sample(_NAMES, 2)
+    age, gap = rng.randint(8, 20 + 5 * difficulty), rng.randint(2, 4 + 3 * difficulty)
+    total = 2 * age + gap
+    if difficulty < 3:
+        return (f"The sum of the ages of {older} and {younger} is {total} years. "
+                f"{older} is {gap} years older than {younger}. How old is {younger}?",
+                *_numeric(rng, age, [age + gap, total / 2, (total + gap) / 2], unit='{} years'))
+    later = rng.randint(3, 8)
+    return (f"In {later} years the sum of the ages of {older} and {younger} will be {total + 2 * later} years. "
+            f"{older} is {gap} years older than {younger}. How old is {younger} now?",
+            *_numeric(rng, age, [age + later, age + gap, (total + 2 * later - gap) / 2], unit='{} years'))
+
+
+_GROUPS = ['pilots', 'doctors', 'artists', 'engineers', 'singers', 'runners', 'teachers',
+           'writers', 'chefs', 'dancers', 'farmers', 'poets']
+
+
+@_template('logical_reasoning')
+def _syllogism(rng, difficulty):
+    a, b, c = rng.sample(_GROUPS, 3)
+    form = rng.choice([['all'], ['all', 'some'], ['some', 'none']][difficulty - 1])
+    if form == 'all':
+        premise = f"All {a} are {b}. All {b} are {c}."
+        answer = f"All {a} are {c}"
+        wrong = [f"All {c} are {a}", f"No {a} is {c}", f"Some {c} are not {b}"]
+    elif form == 'some':
+        premise = f"Some {a} are {b}. All {b} are {c}."
+        answer = f"Some {a} are {c}"
+        wrong = [f"All {a} are {c}", f"All {c} are {b}", f"No {a} is {c}"]
+    else:
+        premise = f"No {a} is {b}. All {c} are {b}."
+        answer = f"No {c} is {a}"
+        wrong = [f"Some {c} are {a}", f"All {a} are {c}", f"All {b} are {c}"]
+    return f"{premise} Which conclusion logically follows?", answer, wrong
+
+
+@_template('logical_reasoning')
+def _directions(rng, difficulty):
+    legs = rng.choice([(3, 4, 5), (6, 8, 10), (5, 12, 13), (8, 15, 17), (9, 12, 15), (12, 16, 20)])
+    scale = rng.randint(1, difficulty)
+    first, second, answer = (n * scale for n in legs)
+    start = rng.choice(['north', 'south', 'east', 'west'])
+    turn = rng.choice(['left', 'right'])
+    name = rng.choice(_NAMES)
+    return (f"{name} walks {first} km {start}, then turns {turn} and walks {second} km. "
+            f"How far is {name} from the starting point?",
+            *_numeric(rng, answer, [first + second, abs(second - first), answer + scale], unit='{} km'))
+
+
+# --- Verbal ability ---------------------------------------------------------
+
+# word, synonym, antonym, difficulty
+_LEXICON = [
+    ('Abundant', 'Plentiful', 'Scarce', 1), ('Brave', 'Courageous', 'Cowardly', 1),
+    ('Ancient', 'Old', 'Modern', 1), ('Rapid', 'Quick', 'Slow', 1),
+    ('Generous', 'Giving', 'Stingy', 1), ('Fragile', 'Delicate', 'Sturdy', 1),
+    ('Visible', 'Apparent', 'Hidden', 1), ('Expand', 'Enlarge', 'Shrink', 1),
+    ('Transparent', 'Clear', 'Opaque', 2), ('Diligent', 'Industrious', 'Lazy', 2),
+    ('Candid', 'Frank', 'Evasive', 2), ('Obscure', 'Vague', 'Evident', 2),
+    ('Prudent', 'Wise', 'Reckless', 2), ('Hostile', 'Unfriendly', 'Amicable', 2),
+    ('Meticulous', 'Thorough', 'Careless', 2), ('Concise', 'Brief', 'Verbose', 2),
+    ('Tranquil', 'Calm', 'Agitated', 2), ('Lethargic', 'Sluggish', 'Energetic', 2),
+    ('Benevolent', 'Kind', 'Malevolent', 3), ('Ephemeral', 'Fleeting', 'Permanent', 3),
+    ('Gregarious', 'Sociable', 'Reclusive', 3), ('Obstinate', 'Stubborn', 'Compliant', 3),
+    ('Pragmatic', 'Practical', 'Idealistic', 3), ('Lucid', 'Intelligible', 'Confusing', 3),
+    ('Frugal', 'Thrifty', 'Extravagant', 3), ('Ambiguous', 'Equivocal', 'Explicit', 3),
+    ('Mitigate', 'Alleviate', 'Aggravate', 3), ('Austere', 'Severe', 'Lavish', 3)
+]
+
+
+# Entries close enough in meaning that one's synonym or antonym could also
+# answer another's question (Lucid/Clear, Frugal/Lavish); distractors are
+# never drawn from the question word's own group
+_LEXICON_GROUPS = [
+    {'Abundant', 'Frugal', 'Austere'},
+    {'Brave'},
+    {'Ancient', 'Ephemeral', 'Concise'},
+    {'Rapid', 'Lethargic', 'Diligent', 'Meticulous', 'Prudent', 'Pragmatic'},
+    {'Generous', 'Benevolent', 'Hostile', 'Gregarious'},
+    {'Fragile'},
+    {'Visible', 'Transparent', 'Obscure', 'Lucid', 'Ambiguous', 'Candid'},
+    {'Expand'},
+    {'Obstinate'},
+    {'Tranquil'},
+    {'Mitigate'}
+]
+_LEXICON_GROUP = {word: index for index, group in enumerate(_LEXICON_GROUPS) for word in group}
+
+
+def _lexicon_entry(rng, difficulty):
+    """A question entry and the entries its distractors may come from"""
+    entries = [entry for entry in _LEXICON if entry[3] <= difficulty]
+    entry = rng.choice(entries)
+    unrelated = [other for other in entries if _LEXICON_GROUP[other[0]] != _LEXICON_GROUP[entry[0]]]
+    return entry, unrelated
+
+
+@_template('verbal_ability')
+def _synonym(rng, difficulty):
+    (word, synonym, antonym, _), unrelated = _lexicon_entry(rng, difficulty)
+    others = [entry[1] for entry in rng.sample(unrelated, 2)]
+    # The antonym is the classic trap option
+    return f"Choose the word closest in meaning to {word}", synonym, [antonym] + others
+
+
+@_template('verbal_ability')
+def _antonym(rng, difficulty):
+    (word, synonym, antonym, _), unrelated = _lexicon_entry(rng, difficulty)
+    others = [entry[2] for entry in rng.sample(unrelated, 2)]
+    return f"Choose the word opposite in meaning to {word}", antonym, [synonym] + others
+
+
+# relation -> (a, b) pairs; "a is to b as c is to ?"
+_ANALOGIES = {
+    'tool and use': [('Pen', 'Writing'), ('Knife', 'Cutting'), ('Broom', 'Sweeping'), ('Needle', 'Sewing'),
+                     ('Spade', 'Digging'), ('Oven', 'Baking'), ('Fork', 'Eating'), ('Brush', 'Painting')],
+    'worker and workplace': [('Doctor', 'Hospital'), ('Teacher', 'School'), ('Chef', 'Kitchen'),
+                             ('Pilot', 'Cockpit'), ('Judge', 'Court'), ('Farmer', 'Field'), ('Actor', 'Stage')],
+    'young and adult': [('Puppy', 'Dog'), ('Kitten', 'Cat'), ('Calf', 'Cow'), ('Cub', 'Lion'),
+                        ('Foal', 'Horse'), ('Tadpole', 'Frog'), ('Caterpillar', 'Butterfly')],
+    'part and whole': [('Page', 'Book'), ('Petal', 'Flower'), ('Wheel', 'Car'), ('Key', 'Keyboard'),
+                       ('Brick', 'Wall'), ('Leaf', 'Tree'), ('Chapter', 'Novel')]
+}
+
+
+@_template('verbal_ability')
+def _analogy(rng, difficulty):
+    relation = rng.choice(list(_ANALOGIES))
+    (a, b), (c, d) = rng.sample(_ANALOGIES[relation], 2)
+    # Easy distractors come from other relations; harder ones share the relation
+    pool = ([pair[1] for pair in _ANALOGIES[relation] if pair[1] not in (b, d)] if difficulty > 1 else
+            [pair[1] for other, pairs in _ANALOGIES.items() if other != relation for pair in pairs])
+    return f"{a} is to {b} as {c} is to?", d, rng.sample(pool, OPTION_COUNT - 1)
+
+
+_SPELLINGS = ['Accommodate', 'Necessary', 'Separate', 'Definitely', 'Occurrence', 'Embarrass',
+              'Maintenance', 'Recommend', 'Millennium', 'Conscientious', 'Entrepreneur', 'Questionnaire',
+              'Acquaintance', 'Committee', 'Guarantee', 'Perseverance', 'Privilege', 'Occurred',
+              'Bureaucracy', 'Liaison', 'Mischievous', 'Occasionally', 'Possession', 'Threshold']
+
+
+def _misspellings(word):
+    """Plausible wrong spellings: undoubled or doubled letters, swapped vowels"""
+    variants = []
+    for i in range(1, len(word)):
+        if word[i] == word[i - 1]:
+            variants.append(word[:i] + word[i + 1:])
+        elif word[i] not in 'aeiou' and word[i - 1] in 'aeiou' and i < len(word) - 1:
+            variants.append(word[:i] + word[i] + word[i:])
+    for i in range(1, len(word) - 1):
+        if word[i] in 'aeiou' and word[i + 1] in 'aeiou' and word[i] != word[i + 1]:
+            variants.append(word[:i] + word[i + 1] + word[i] + word[i + 2:])
+    for wrong, right in (('a', 'e'), ('e', 'a'), ('i', 'e'), ('e', 'i')):
+        index = word.find(wrong, 1)
+        if index > 0:
+            variants.append(word[:index] + right + word[index + 1:])
+    return [variant for variant in dict.fromkeys(variants) if variant != word]
+
+
+@_template('verbal_ability')
+def _spelling(rng, difficulty):
+    word = rng.choice(_SPELLINGS[:8 * difficulty])
+    wrong = rng.sample(_misspellings(word), OPTION_COUNT - 1)
+    # Listing the spellings keeps each question's text (the round's dict key) distinct
+    listed = wrong + [word]
+    rng.shuffle(listed)
+    return f"Choose the correctly spelled word: {', '.join(listed)}", word, wrong
+
+
+_GRAMMAR = [
+    ("She has lived in {city} ___ {year}.", 'since', ['for', 'from', 'by']),
+    ("He has worked at the {place} ___ {number} years.", 'for', ['since', 'from', 'until']),
+    ("Each of the {plural} ___ ready for the inspection.", 'is', ['are', 'were', 'have']),
+    ("Neither the manager nor the {plural} ___ aware of the change.", 'were', ['was', 'is', 'has']),
+    ("The report was written ___ the {role} last week.", 'by', ['from', 'with', 'of']),
+    ("If I ___ you, I would accept the offer from the {place}.", 'were', ['was', 'am', 'be']),
+    ("The {role} insisted that the plan ___ reviewed again.", 'be', ['is', 'was', 'being'])
+]
+
+
+@_template('verbal_ability')
+def _grammar(rng, difficulty):
+    sentence, answer, wrong = rng.choice(_GRAMMAR[:3 + 2 * difficulty])
+    text = sentence.format(city=rng.choice(['Pune', 'Delhi', 'Chennai', 'Jaipur', 'Kochi']),
+                           year=rng.randint(2010, 2022), number=rng.randint(2, 12),
+                           place=rng.choice(['bank', 'hospital', 'startup', 'library', 'factory']),
+                           plural=rng.choice(['students', 'reports', 'machines', 'players', 'rooms']),
+                           role=rng.choice(['manager', 'auditor', 'committee', 'director', 'analyst']))
+    return f"Fill in the blank: {text}", answer, list(wrong)
+
+
+# --- Data interpretation ----------------------------------------------------
+
+_MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+
+@_template('data_interpretation')
+def _sales_table(rng, difficulty):
+    size = 3 + difficulty
+    start = rng.randrange(12 - size + 1)
+    months = _MONTHS[start:start + size]
+    values = [10 * rng.randint(6, 30 * difficulty) for _ in months]
+    product = rng.choice(['laptops', 'phones', 'bicycles', 'printers', 'tablets', 'cameras'])
+    question = rng.choice(['change', 'average', 'total', 'range'][:2 + difficulty])
+
+    if question == 'change':
+        # Percentage change between two months, chosen to come out exact
+        first, second = sorted(rng.sample(range(size), 2))
+        percent = rng.choice([-50, -25, -20, 10, 20, 25, 40, 50, 75])
+        values[first] = 20 * rng.randint(3, 10 * difficulty)
+        values[second] = values[first] * (100 + percent) // 100
+    elif question == 'average':
+        values[-1] += 10 * (-sum(values) // 10 % size)
+
+    table = ', '.join(f"{month} {value}" for month, value in zip(months, values))
+    intro = f"Monthly sales of {product} (units): {table}."
+    if question == 'change':
+        old, new = values[first], values[second]
+        return (f"{intro} What is the percentage change in sales from {months[first]} to {months[second]}?",
+                *_numeric(rng, percent, [100 * (new - old) / new, new - old, -percent],
+                          unit='{}%', step=5))
+    if question == 'average':
+        return (f"{intro} What is the average monthly sales figure?",
+                *_numeric(rng, sum(values) / size, [sorted(values)[size // 2], sum(values) / (size - 1)], step=10))
+    if question == 'total':
+        return (f"{intro} What are the total sales over these months?",
+                *_numeric(rng, sum(values), [sum(values) - values[-1], sum(values) + values[0]], step=10))
+    return (f"{intro} What is the difference between the highest and lowest monthly sales?",
+            *_numeric(rng, max(values) - min(values), [max(values) - values[0], max(values), values[-1] - values[0]],
+                      step=10))
+
+
+@_template('data_interpretation')
+def _pie_chart(rng, difficulty):
+    shares = rng.choice([[('Rent', 90), ('Food', 72), ('Transport', 54), ('Savings', 108), ('Other', 36)],
+                         [('Salaries', 135), ('Marketing', 45), ('Rent', 72), ('Research', 72), ('Other', 36)],
+                         [('Fees', 108), ('Books', 36), ('Hostel', 126), ('Travel', 54), ('Other', 36)]])
+    budget = 4000 * rng.randint(2, 10 * difficulty)
+    segment, degrees = rng.choice(shares)
+    chart = ', '.join(f"{name} {deg}°" for name, deg in shares)
+    intro = f"A pie chart divides a budget of {budget} as follows: {chart}."
+    if difficulty < 3:
+        answer = budget * degrees / 360
+        return (f"{intro} How much is spent on {segment}?",
+                *_numeric(rng, answer, [budget * degrees / 100, budget / len(shares), budget * (degrees + 18) / 360],
+                          step=budget / 40))
+    other, other_degrees = rng.choice([share for share in shares if share[1] != degrees])
+    answer = budget * abs(degrees - other_degrees) / 360
+    return (f"{intro} By how much does spending on {segment} differ from spending on {other}?",
+            *_numeric(rng, answer, [budget * degrees / 360, budget * other_degrees / 360,
+                                                   abs(degrees - other_degrees)], step=budget / 40))
+
+
+def level_difficulty(level):
+    """Base difficulty for an experience level such as 'beginner'; 2 if unknown"""
+    return LEVEL_DIFFICULTY.get(str(level or '').split(':')[0].strip().lower(), 2)
+
+
+def generate_aptitude_items(count: int, seed=None, difficulty=None, categories=None) -> list:
+    """
+    Synthesize aptitude MCQs from the templates
+
+    Categories are tried in turn so the round stays balanced until one
+    runs out of distinct questions (verbal templates draw on fixed word
+    lists), after which the others fill the remaining slots. With a base
+    difficulty, each item is drawn at that level or one either side;
+    without one, levels are mixed evenly. The same seed always yields the
+    same items.
+
+    Args:
+        count (int): Number of items
+        seed: Any hashable seed for the random generator
+        difficulty (int, optional): Base difficulty from 1 (easy) to 3 (hard)
+        categories (list, optional): Subset of CATEGORIES
+
+    Returns:
+        list: dicts with question, options, answer, category, difficulty and template
+    """
+    rng = random.Random(seed)
+    categories = list(categories or CATEGORIES)
+    items, seen = [], set()
+    attempts = 0
+    while len(items) < count and attempts < 20 * count + 100:
+        category = categories[attempts % len(categories)]
+        attempts += 1
+        template = rng.choice(_TEMPLATES[category])
+        level = rng.randint(1, 3) if difficulty is None else \
+            min(3, max(1, difficulty + rng.choice([-1, 0, 0, 1])))
+        question, answer, distractors = template(rng, level)
+        if question in seen or len(distractors) < OPTION_COUNT - 1:
+            continue
+        options = [answer] + list(distractors[:OPTION_COUNT - 1])
+        rng.shuffle(options)
+        seen.add(question)
+        items.append({
+            'question': question,
+            'options': options,
+            'answer': answer,
+            'category': category,
+            'difficulty': level,
+            'template': template.__name__.lstrip('_')
+        })
+    return items
+
+
+def generate_aptitude_questions(count: int, seed=None, level=None) -> dict:
+    """Procedural aptitude round in the generator's format: question -> [options, answer]"""
+    items = generate_aptitude_items(count, seed=seed, difficulty=level_difficulty(level) if level else None)
+    return {item['question']: [item['options'], item['answer']] for item in items}
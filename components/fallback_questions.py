@@ -0,0 +1,68 @@
+import copy
+
+# Standard questions served when a round cannot be generated in time.
+# MCQ entries use the generator's format: question -> [options, answer].
+# Aptitude has no fixed bank: it is synthesized by components.aptitude_generator.
+
+APTITUDE_FALLBACK_COUNT = 30
+
+INTRODUCTION_QUESTIONS = [
+    "Hello, how are you?",
+    "Could you briefly introduce yourself?",
+    "What made you interested in this position?",
+    "What are your career goals?",
+    "Why do you think you would be a good fit for this role?"
+]
+
+TECHNICAL_QUESTIONS = {
+    "What is the primary key in a database?": [["A unique identifier", "A duplicate record", "A null value", "A foreign key"], "A unique identifier"],
+    "Which normal form removes partial dependencies?": [["1NF", "2NF", "3NF", "BCNF"], "2NF"],
+    "Which SQL clause filters groups after aggregation?": [["WHERE", "HAVING", "ORDER BY", "LIMIT"], "HAVING"],
+    "What does the I in ACID stand for?": [["Integrity", "Isolation", "Indexing", "Inheritance"], "Isolation"],
+    "Which index structure do most relational databases use by default?": [["Hash table", "B+ tree", "Linked list", "Heap"], "B+ tree"],
+    "What does an operating system scheduler decide?": [["Which process runs next", "Which file to open", "Which port to listen on", "Which user logs in"], "Which process runs next"],
+    "Which condition is NOT required for deadlock?": [["Mutual exclusion", "Hold and wait", "Preemption", "Circular wait"], "Preemption"],
+    "What is thrashing in an operating system?": [["Excessive paging", "CPU overheating", "Disk fragmentation", "Cache coherence"], "Excessive paging"],
+    "Which page replacement algorithm can suffer from Belady's anomaly?": [["LRU", "FIFO", "Optimal", "LFU"], "FIFO"],
+    "What is the main difference between a process and a thread?": [["Threads share an address space", "Processes share registers", "Threads cannot run in parallel", "Processes have no stack"], "Threads share an address space"],
+    "Which layer of the OSI model handles routing?": [["Data link", "Network", "Transport", "Session"], "Network"],
+    "Which protocol guarantees ordered and reliable delivery?": [["UDP", "TCP", "IP", "ICMP"], "TCP"],
+    "What does DNS resolve?": [["Domain names to IP addresses", "MAC addresses to IP addresses", "IP addresses to ports", "URLs to file paths"], "Domain names to IP addresses"],
+    "What is the default port for HTTPS?": [["80", "443", "8080", "22"], "443"],
+    "Which HTTP status code means the resource was not found?": [["200", "301", "404", "500"], "404"],
+    "What does a load balancer do?": [["Distributes traffic across servers", "Encrypts database rows", "Compiles source code", "Stores session cookies"], "Distributes traffic across servers"],
+    "What does the CAP theorem say a distributed system cannot fully provide at once?": [["Consistency and availability under partition", "Caching and paging", "Compression and parsing", "Concurrency and atomicity"], "Consistency and availability under partition"],
+    "Which technique splits a large database table across multiple servers?": [["Sharding", "Indexing", "Normalization", "Denormalization"], "Sharding"],
+    "Why is a cache placed in front of a database?": [["To reduce read latency", "To enforce foreign keys", "To replace backups", "To encrypt queries"], "To reduce read latency"],
+    "What is horizontal scaling?": [["Adding more machines", "Adding more CPU to one machine", "Adding more columns", "Adding more indexes"], "Adding more machines"]
+}
+
+HR_QUESTIONS = [
+    "Tell me about a challenging project you worked on.",
+    "How do you handle conflicts in a team?",
+    "Describe a situation where you demonstrated leadership.",
+    "What are your salary expectations?",
+    "Where do you see yourself in five years?",
+    "How do you handle work pressure?",
+    "What questions do you have for us?"
+]
+
+_BANK = {
+    'introduction': INTRODUCTION_QUESTIONS,
+    'technical': TECHNICAL_QUESTIONS,
+    'hr': HR_QUESTIONS
+}
+
+
+def get_fallback_questions(round_type: str):
+    """Return a copy of the standard questions for a round"""
+    if round_type == 'coding':
+        from services.question_service import QuestionService
+        return QuestionService()._get_default_questions()
+    if round_type == 'aptitude':
+        from components.aptitude_generator import generate_aptitude_questions
+        # Unseeded, so candidates who both fall back still get different questions
+        return generate_aptitude_questions(APTITUDE_FALLBACK_COUNT)
+    if round_type not in _BANK:
+        raise KeyError(f"No fallback questions for round: {round_type}")
+    return copy.deepcopy(_BANK[round_type])
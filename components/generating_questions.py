@@ -1,176 +1,239 @@
-from components.model_configuration import model_config
-import markdown
+from services.llm_client import LLMError
+from services.model_router import get_model_router
+from services.question_index import get_question_index
+from components.aptitude_generator import generate_aptitude_questions
+from components.fallback_questions import INTRODUCTION_QUESTIONS, HR_QUESTIONS
+from components.prompt_builder import build_prompt, compact_metrics
+import hashlib
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+INTRODUCTION_COUNT = 5
+MCQ_COUNT = 30
+HR_COUNT = 7
+MCQ_OPTION_COUNT = 4
+# Follow-up requests for items that were missing or invalid, after the first
+REPAIR_ROUNDS = 2
+# 'llm': ask the model and fill any shortfall procedurally; 'procedural': no LLM call
+APTITUDE_SOURCE = os.getenv('NEUROPREP_APTITUDE_SOURCE', 'llm')
+# Bank questions at least this similar to the candidate are used as-is; the LLM writes the rest
+RETRIEVAL_MIN_SCORE = float(os.getenv('NEUROPREP_RETRIEVAL_MIN_SCORE', '0.2'))
+# Keeps one strong skill from filling the technical round with a single topic
+RETRIEVAL_MAX_PER_CATEGORY = 10
+
+# Gemini response schemas (OpenAPI subset) for JSON output mode
+TEXT_LIST_SCHEMA = {'type': 'ARRAY', 'items': {'type': 'STRING'}}
+MCQ_SCHEMA = {
+    'type': 'ARRAY',
+    'items': {
+        'type': 'OBJECT',
+        'properties': {
+            'question': {'type': 'STRING'},
+            'options': {'type': 'ARRAY', 'items': {'type': 'STRING'}},
+            'answer': {'type': 'STRING'}
+        },
+        'required': ['question', 'options', 'answer']
+    }
+}
+
+
+def _json_config(schema):
+    return {'response_mime_type': 'application/json', 'response_schema': schema}
+
+
+def _parse_json_array(text):
+    """Decode a JSON array from the model, tolerating a wrapping object; [] if unusable"""
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return []
+    if isinstance(data, dict):
+        data = next((value for value in data.values() if isinstance(value, list)), [])
+    return data if isinstance(data, list) else []
+
+
+def _validate_text(item):
+    """A question string, or None if the item is not one"""
+    if not isinstance(item, str) or not item.strip():
+        return None
+    return item.strip()
+
+
+def _validate_mcq(item):
+    """(question, [options, answer]) for a well-formed MCQ item, else None"""
+    if not isinstance(item, dict):
+        return None
+    question, options, answer = item.get('question'), item.get('options'), item.get('answer')
+    if not isinstance(question, str) or not question.strip():
+        return None
+    if not isinstance(options, list) or len(options) != MCQ_OPTION_COUNT:
+        return None
+    if not all(isinstance(option, str) and option.strip() for option in options):
+        return None
+    options = [option.strip() for option in options]
+    if len({option.casefold() for option in options}) != len(options):
+        return None
+    if not isinstance(answer, str):
+        return None
+    # The answer must be one of the options; keep the option's exact spelling
+    matches = [option for option in options if option.casefold() == answer.strip().casefold()]
+    if not matches:
+        return None
+    return question.strip(), [options, matches[0]]
+
+
+def _generate_items(build_prompt, count, schema, validate, label):
+    """
+    Ask for count items as JSON, keeping the valid ones
+
+    Only the shortfall is requested again, for up to REPAIR_ROUNDS more
+    calls, with the accepted questions listed so they are not repeated.
+    Calls are routed and recorded as the task 'generate_<label>'.
+    An LLM failure on the first call propagates; on a repair call the
+    items accepted so far are returned.
+
+    Returns:
+        list: validated items, at most count
+    """
+    accepted = {}
+    for round_number in range(1 + REPAIR_ROUNDS):
+        missing = count - len(accepted)
+        if missing <= 0:
+            break
+        prompt = build_prompt(missing, list(accepted))
+        try:
+            response_text = get_model_router().generate(f'generate_{label}', prompt,
+                                                        generation_config=_json_config(schema))
+        except LLMError:
+            if round_number == 0:
+                raise
+            logger.warning(f"Stopping {label} repair after an LLM failure")
+            break
+        items = _parse_json_array(response_text)
+        rejected = 0
+        for item in items:
+            parsed = validate(item)
+            key = parsed[0] if isinstance(parsed, tuple) else parsed
+            if parsed is None or key.casefold() in (existing.casefold() for existing in accepted):
+                rejected += 1
+                continue
+            accepted[key] = parsed
+            if len(accepted) == count:
+                break
+        if rejected or len(items) < missing:
+            logger.info(f"{label}: {len(accepted)}/{count} valid after call {round_number + 1} "
+                        f"({rejected} rejected, {max(missing - len(items), 0)} missing)")
+    return list(accepted.values())
+
+
+def _introduction_prompt(metrics_dict, count, existing):
+    greeting = '' if existing else '\nThe first question must be a greeting, e.g. "Hello, how are you?".'
+    return build_prompt(metrics_dict, f"""Introduction round: write {count} questions as a JSON array of strings.{greeting}
+Professional and progressive, to put the candidate at ease; no technical topics.""", existing)
+
 
 def generate_Introduction(metrics_dict:dict)->list:
-    prompt = f"""You are an AI interviewer generating introduction questions for a job interview.
-
-    ### STRICT OUTPUT FORMAT RULES:
-    1. Generate EXACTLY 5 questions (no more, no less)
-    2. Each question must be separated by exactly "||"
-    3. First question MUST be a greeting
-    4. NO explanations, NO comments, NO numbering
-    5. NO empty questions or extra spaces
-    6. NO quotation marks around questions
-
-    ### QUESTION GUIDELINES:
-    - Start with "Hello, how are you?"
-    - Keep questions professional and progressive
-    - Focus on making the candidate comfortable
-    - Avoid technical topics
-    - Treat this as a real interview (don't mention it being a mock interview)
-
-    ### EXAMPLE OUTPUT FORMAT:
-    Hello, how are you? || Could you briefly introduce yourself? || What made you interested in this position? || What are your career goals? || Why do you think you would be a good fit for this role?
-
-    ### CONTEXT:
-    {metrics_dict}
-
-    Generate exactly 5 questions following the format strictly:"""
-    
-    model = model_config()
-    response = model.generate_content(prompt)
-    questions_list = response.text.strip().split("||")
-    questions_list = [question.strip() for question in questions_list]
-    
-    # Ensure exactly 5 questions
-    if len(questions_list) < 5:
-        default_questions = [
-            "Hello, how are you?",
-            "Could you briefly introduce yourself?",
-            "What made you interested in this position?",
-            "What are your career goals?",
-            "Why do you think you would be a good fit for this role?"
-        ]
-        questions_list = default_questions[:5]
-    elif len(questions_list) > 5:
-        questions_list = questions_list[:5]
-    
+    questions_list = _generate_items(
+        lambda count, existing: _introduction_prompt(metrics_dict, count, existing),
+        INTRODUCTION_COUNT, TEXT_LIST_SCHEMA, _validate_text, 'introduction')
+
+    # Only slots the model never filled get standard questions; the standard greeting only leads
+    for question in INTRODUCTION_QUESTIONS[1 if questions_list else 0:]:
+        if len(questions_list) >= INTRODUCTION_COUNT:
+            break
+        if question not in questions_list:
+            questions_list.append(question)
     return questions_list
 
+
+def _aptitude_prompt(metrics_dict, count, existing):
+    return build_prompt(metrics_dict, f"""Aptitude round: write {count} MCQs as a JSON array of objects with "question", "options" ({MCQ_OPTION_COUNT} distinct strings) and "answer" (copied exactly from "options").
+Categories only: Numerical Ability (arithmetic, percentages, ratios), Logical Reasoning (patterns, sequences, analogies), Verbal Ability (vocabulary, grammar, comprehension), Data Interpretation (graphs, tables, charts). No programming or technical questions.""", existing)
+
+
 def generate_Aptitude(metrics_dict:dict)->dict:
-    prompt = f"""You are an AI generating MCQ-based aptitude questions for a mock interview exam.  
-
-    **Instructions:**  
-    - Use only the provided **metrics** to create **30 MCQ aptitude questions**.  
-    - Questions MUST be from these categories ONLY:
-        * Numerical Ability (arithmetic, percentages, ratios)
-        * Logical Reasoning (patterns, sequences, analogies)
-        * Verbal Ability (vocabulary, grammar, comprehension)
-        * Data Interpretation (graphs, tables, charts)
-    - NO programming or technical questions
-    - Format the output **exactly** as shown below, with `||` separating each question.  
-    - Each question **must** follow this structure:  
-      **Question text // option1, option2, option3, option4&answer**  
-    - No explanations, no extra text, just the formatted questions.  
-
-    **Example Output:**  
-    If 2 workers can complete a task in 6 days, how many days will it take 3 workers? // 2 days, 3 days, 4 days, 5 days&4 days || What comes next in the sequence: 2,4,8,16,? // 24, 32, 36, 40&32  
-
-    **Metrics for generating questions:**  
-    {metrics_dict}  
-
-    **Output the questions now:**"""
-    model = model_config()
-    response = model.generate_content(prompt)
-    questions = response.text.strip().split("||")
-    aptitude_questions_dict = {}
-    for line in questions:
-        try:
-            question_list = line.strip().split("//")
-            if len(question_list) == 2:
-                question = question_list[0].strip()
-                options_and_answer = question_list[1].strip()
-                options = options_and_answer.split("&")[0].strip()
-                answer = options_and_answer.split("&")[1].strip()
-                aptitude_questions_dict[question] = [options, answer]
-        except:
-            continue
-    return aptitude_questions_dict
-
-def generate_Technical(metrics_dict:dict)->dict:
-    prompt = f"""You are an AI assistant generating **30 multiple-choice questions (MCQs)** for a **mock technical interview**.
-
-    ### **Important Instructions:**
-    - Only generate questions related to **System Design, OS, DBMS, and Computer Networks**.
-    - **Strictly follow the output format** with **no extra explanations, no numbering, and no missing values**.
-    - Each question **must have exactly four answer options**.
-    - Separate each question using `||` (double pipe).
-    - Each question must follow this format: Question text // option1, option2, option3, option4&answer
-    - Use `//` (double forward slashes) to separate the question text from the choices.
-
-    ---
-
-    ### **Output Format Example:**
-    What is the primary key in a database? // A unique identifier, A duplicate record, A null value, A foreign key&A unique identifier||
-    What does an operating system do? // Manages hardware, Compiles code, Runs JavaScript, Controls database records&Manages hardware
-
-    ### **Here are the question generation metrics:**
-    {metrics_dict}
-
-    Now, generate exactly **30 MCQs** following the format strictly. Ensure all questions and answers are complete and correctly formatted."""
-    model = model_config()
-    response = model.generate_content(prompt)
-    questions = response.text.strip().split("||")
-    technical_questions_dict = {}
-    for line in questions:
-        try:
-            question_list = line.strip().split("//")
-            if len(question_list) == 2:
-                question = question_list[0].strip()
-                options_and_answer = question_list[1].strip()
-                options = options_and_answer.split("&")[0].strip()
-                answer = options_and_answer.split("&")[1].strip()
-                technical_questions_dict[question] = [options, answer]
-        except:
-            continue
-    return technical_questions_dict
+    # Seeded by the profile, so the same resume always gets the same procedural items
+    seed = hashlib.sha256(compact_metrics(metrics_dict).encode('utf-8')).hexdigest()
+    level = metrics_dict.get('experience_level_categorization')
+    if APTITUDE_SOURCE == 'procedural':
+        return generate_aptitude_questions(MCQ_COUNT, seed=seed, level=level)
+
+    questions = dict(_generate_items(
+        lambda count, existing: _aptitude_prompt(metrics_dict, count, existing),
+        MCQ_COUNT, MCQ_SCHEMA, _validate_mcq, 'aptitude'))
+
+    # Only slots the model never filled get procedural questions
+    if len(questions) < MCQ_COUNT:
+        for question, value in generate_aptitude_questions(MCQ_COUNT, seed=seed, level=level).items():
+            if len(questions) >= MCQ_COUNT:
+                break
+            questions.setdefault(question, value)
+    return questions
+
+
+def _technical_prompt(metrics_dict, count, existing):
+    return build_prompt(metrics_dict, f"""Technical round: write {count} MCQs as a JSON array of objects with "question", "options" ({MCQ_OPTION_COUNT} distinct strings) and "answer" (copied exactly from "options").
+Topics only: System Design, Operating Systems, DBMS, Computer Networks.""", existing)
+
+
+def _rank_bank_questions(metrics_dict, resume_text):
+    """[(score, question, [options, answer])] from the technical bank, most relevant first"""
+    index = get_question_index()
+    if index is None:
+        return []
+    profile = json.loads(compact_metrics(metrics_dict))
+    skills = ', '.join(profile.get('skills', []) + profile.get('tools', []))
+    started = time.perf_counter()
+    ranked = index.for_candidate(skills, resume_text, max_per_category=RETRIEVAL_MAX_PER_CATEGORY)
+    logger.info(f"Ranked {len(ranked)} bank questions in {(time.perf_counter() - started) * 1000:.1f} ms")
+    return [(score, item['question'], [list(item['options']), item['answer']]) for score, item in ranked]
+
+
+def generate_Technical(metrics_dict:dict, resume_text:str=None)->dict:
+    ranked = _rank_bank_questions(metrics_dict, resume_text)
+    questions = {question: value for score, question, value in ranked[:MCQ_COUNT]
+                 if score >= RETRIEVAL_MIN_SCORE}
+    missing = MCQ_COUNT - len(questions)
+    if missing <= 0:
+        return questions
+
+    # The LLM only writes the questions the bank has no close match for
+    try:
+        generated = _generate_items(
+            lambda count, existing: _technical_prompt(metrics_dict, count, list(questions) + existing),
+            missing, MCQ_SCHEMA, _validate_mcq, 'technical')
+    except LLMError:
+        if not ranked:
+            raise
+        logger.warning("LLM unavailable, filling the technical round with less similar bank questions")
+        generated = []
+    questions.update(generated)
+
+    for score, question, value in ranked:
+        if len(questions) >= MCQ_COUNT:
+            break
+        questions.setdefault(question, value)
+    return questions
+
+
+def _hr_prompt(metrics_dict, count, existing):
+    return build_prompt(metrics_dict, f"""HR round: write {count} questions as a JSON array of strings.
+Behavioral and situational: past experiences, problem solving, team collaboration, conflict resolution, future aspirations; relevant to the candidate's experience.""", existing)
+
 
 def generate_HR(metrics_dict:dict)->list:
-    prompt = f"""You are an AI interviewer generating HR questions for the final round of a job interview.
-
-    ### STRICT OUTPUT FORMAT RULES:
-    1. Generate EXACTLY 7 questions (no more, no less)
-    2. Each question must be separated by exactly "||"
-    3. NO explanations, NO comments, NO numbering
-    4. NO empty questions or extra spaces
-    5. NO quotation marks around questions
-
-    ### QUESTION GUIDELINES:
-    - Focus on behavioral and situational questions
-    - Include questions about:
-      * Past experiences
-      * Problem-solving abilities
-      * Team collaboration
-      * Conflict resolution
-      * Future aspirations
-    - Keep questions professional and relevant to the candidate's experience
-
-    ### EXAMPLE OUTPUT FORMAT:
-    Tell me about a challenging project you worked on. || How do you handle conflicts in a team? || Describe a situation where you demonstrated leadership. || What are your salary expectations? || Where do you see yourself in five years? || How do you handle work pressure? || What questions do you have for us?
-
-    ### CONTEXT:
-    {metrics_dict}
-
-    Generate exactly 7 questions following the format strictly:"""
-    
-    model = model_config()
-    response = model.generate_content(prompt)
-    questions_list = response.text.strip().split("||")
-    questions_list = [question.strip() for question in questions_list]
-    
-    # Ensure exactly 7 questions
-    if len(questions_list) < 7:
-        default_questions = [
-            "Tell me about a challenging project you worked on.",
-            "How do you handle conflicts in a team?",
-            "Describe a situation where you demonstrated leadership.",
-            "What are your salary expectations?",
-            "Where do you see yourself in five years?",
-            "How do you handle work pressure?",
-            "What questions do you have for us?"
-        ]
-        questions_list = default_questions[:7]
-    elif len(questions_list) > 7:
-        questions_list = questions_list[:7]
-    
-    return questions_list
\ No newline at end of file
+    questions_list = _generate_items(
+        lambda count, existing: _hr_prompt(metrics_dict, count, existing),
+        HR_COUNT, TEXT_LIST_SCHEMA, _validate_text, 'hr')
+
+    # Only slots the model never filled get standard questions
+    for question in HR_QUESTIONS:
+        if len(questions_list) >= HR_COUNT:
+            break
+        if question not in questions_list:
+            questions_list.append(question)
+    return questions_list
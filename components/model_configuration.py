@@ -2,8 +2,9 @@ import google.generativeai as genai
 import os
 from dotenv import load_dotenv
 load_dotenv()
-def model_config():
+DEFAULT_MODEL = "gemini-2.0-flash"
+def model_config(model_name=DEFAULT_MODEL):
     GEMINI_API_KEY=os.getenv("GEMINI_API_KEY")
     genai.configure(api_key=GEMINI_API_KEY)
-    model = genai.GenerativeModel("gemini-2.0-flash")
+    model = genai.GenerativeModel(model_name)
     return model
\ No newline at end of file
@@ -0,0 +1,73 @@
+import json
+
+# Longest list kept per profile field; more adds tokens but not signal
+MAX_LIST_ITEMS = 20
+
+# Identical for every generator and candidate except the profile, and placed
+# first, so the provider can reuse its cached prefix across the four calls
+PREFIX_TEMPLATE = """You are an AI interviewer preparing one candidate's job interview.
+Rules for every task:
+- Treat this as a real interview; never mention that it is a mock interview
+- Output only the JSON requested, with no explanations, numbering or extra text
+- Every question must be self-contained and unambiguous
+
+Candidate profile (JSON):
+{profile}
+
+"""
+
+
+def _unique(values):
+    """Strip, drop empties and case-insensitive duplicates, keep first spelling, sort"""
+    seen = {}
+    for value in values:
+        value = str(value).strip()
+        if value and value.casefold() not in seen:
+            seen[value.casefold()] = value
+    return sorted(seen.values(), key=str.casefold)
+
+
+def compact_metrics(metrics_dict: dict) -> str:
+    """
+    Canonical, compact JSON for the resume metrics
+
+    Languages and the technical skill emphasis repeat the skills list, and
+    tools overlap it, so they are merged or de-duplicated; empty fields are
+    dropped and keys sorted so the same resume always yields the same bytes.
+    """
+    metrics = dict(metrics_dict or {})
+    skills = _unique(list(metrics.pop('skills', []) or [])
+                     + list(metrics.pop('languages', []) or [])
+                     + str(metrics.pop('technical_skill_emphasis', '') or '').split(','))
+    known = {skill.casefold() for skill in skills}
+    tools = [tool for tool in _unique(metrics.pop('tools', []) or []) if tool.casefold() not in known]
+
+    profile = {}
+    level = metrics.pop('experience_level_categorization', None)
+    if level:
+        profile['level'] = str(level).split(':')[0].strip().lower()
+    years = metrics.pop('experience_years', None)
+    if years:
+        profile['years'] = years
+    if skills:
+        profile['skills'] = skills[:MAX_LIST_ITEMS]
+    if tools:
+        profile['tools'] = tools[:MAX_LIST_ITEMS]
+    # Anything else the extractor adds is kept, compacted the same way
+    for key, value in metrics.items():
+        if isinstance(value, (list, tuple, set)):
+            value = _unique(value)[:MAX_LIST_ITEMS]
+        elif isinstance(value, str):
+            value = value.strip()
+        if value not in (None, '', [], {}):
+            profile[key] = value
+    return json.dumps(profile, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+def build_prompt(metrics_dict: dict, task: str, existing=None) -> str:
+    """Shared prefix with the candidate profile, then the task, then questions to avoid"""
+    prompt = PREFIX_TEMPLATE.format(profile=compact_metrics(metrics_dict)) + "Task:\n" + task.strip()
+    if existing:
+        listed = "\n".join(f"- {question}" for question in existing)
+        prompt += f"\n\nAlready chosen (do not repeat or paraphrase):\n{listed}"
+    return prompt
@@ -43,12 +43,24 @@ CREATE TABLE IF NOT EXISTS behavioral_metrics (
 -- Proctoring incidents table
 CREATE TABLE IF NOT EXISTS proctoring_incidents (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
-    session_id INTEGER,
-    timestamp TIMESTAMP,
+    session_id TEXT NOT NULL,
+    timestamp TIMESTAMP NOT NULL,
     incident_type TEXT NOT NULL,  -- 'eye_distraction', 'phone_detected', etc.
-    confidence_score FLOAT,
-    details TEXT,
-    FOREIGN KEY (session_id) REFERENCES interview_sessions(id)
+    confidence_score FLOAT NOT NULL,
+    details TEXT
+);
+
+-- Proctoring incidents merged into intervals of consecutive detections
+CREATE TABLE IF NOT EXISTS proctoring_incident_intervals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    incident_type TEXT NOT NULL,
+    started_at TIMESTAMP NOT NULL,
+    ended_at TIMESTAMP NOT NULL,
+    peak_confidence FLOAT,
+    mean_confidence FLOAT,
+    frame_count INTEGER NOT NULL,
+    details TEXT
 );
 
 -- Detailed question responses
@@ -0,0 +1,15 @@
+-- Per-session lookups are the hot path for every summary and export
+CREATE INDEX IF NOT EXISTS idx_question_responses_session_round
+    ON question_responses (session_id, round_type);
+
+CREATE INDEX IF NOT EXISTS idx_speech_metrics_session_round
+    ON speech_metrics (session_id, round_type);
+
+CREATE INDEX IF NOT EXISTS idx_proctoring_incidents_session_type
+    ON proctoring_incidents (session_id, incident_type);
+
+CREATE INDEX IF NOT EXISTS idx_incident_intervals_session_type
+    ON proctoring_incident_intervals (session_id, incident_type);
+
+CREATE INDEX IF NOT EXISTS idx_round_completions_session_round
+    ON round_completions (session_id, round_type);
@@ -0,0 +1,115 @@
+-- Per-session summaries maintained by triggers on insert, so summary reads
+-- are a primary-key lookup instead of a GROUP BY over the detail tables
+
+CREATE TABLE IF NOT EXISTS round_summary (
+    session_id TEXT NOT NULL,
+    round_type TEXT NOT NULL,
+    total_questions INTEGER NOT NULL DEFAULT 0,
+    correct_answers INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (session_id, round_type)
+);
+
+CREATE TABLE IF NOT EXISTS speech_round_summary (
+    session_id TEXT NOT NULL,
+    round_type TEXT NOT NULL,
+    samples INTEGER NOT NULL DEFAULT 0,
+    avg_confidence FLOAT,
+    avg_speech_rate FLOAT,
+    avg_clarity FLOAT,
+    avg_volume_variation FLOAT,
+    PRIMARY KEY (session_id, round_type)
+);
+
+CREATE TABLE IF NOT EXISTS speech_emotion_counts (
+    session_id TEXT NOT NULL,
+    emotion TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (session_id, emotion)
+);
+
+CREATE TABLE IF NOT EXISTS incident_summary (
+    session_id TEXT NOT NULL,
+    incident_type TEXT NOT NULL,
+    intervals INTEGER NOT NULL DEFAULT 0,
+    frames INTEGER NOT NULL DEFAULT 0,
+    peak_confidence FLOAT,
+    avg_confidence FLOAT,
+    duration_seconds FLOAT NOT NULL DEFAULT 0,
+    PRIMARY KEY (session_id, incident_type)
+);
+
+-- Backfill from existing rows
+INSERT OR REPLACE INTO round_summary (session_id, round_type, total_questions, correct_answers)
+SELECT session_id, round_type, COUNT(*), SUM(CASE WHEN is_correct = 1 THEN 1 ELSE 0 END)
+FROM question_responses
+GROUP BY session_id, round_type;
+
+INSERT OR REPLACE INTO speech_round_summary
+    (session_id, round_type, samples, avg_confidence, avg_speech_rate, avg_clarity, avg_volume_variation)
+SELECT session_id, round_type, COUNT(*), AVG(confidence_level), AVG(speech_rate),
+       AVG(clarity_score), AVG(volume_variation)
+FROM speech_metrics
+GROUP BY session_id, round_type;
+
+INSERT OR REPLACE INTO speech_emotion_counts (session_id, emotion, count)
+SELECT session_id, emotion, COUNT(*)
+FROM speech_metrics
+WHERE emotion IS NOT NULL
+GROUP BY session_id, emotion;
+
+INSERT OR REPLACE INTO incident_summary
+    (session_id, incident_type, intervals, frames, peak_confidence, avg_confidence, duration_seconds)
+SELECT session_id, incident_type, COUNT(*), SUM(frame_count), MAX(peak_confidence),
+       SUM(mean_confidence * frame_count) / SUM(frame_count),
+       SUM((julianday(ended_at) - julianday(started_at)) * 86400.0)
+FROM proctoring_incident_intervals
+GROUP BY session_id, incident_type;
+
+-- Incremental maintenance: counts and sums are added, means are updated as
+-- running means (mean += (x - mean) / n)
+
+CREATE TRIGGER IF NOT EXISTS trg_round_summary_insert
+AFTER INSERT ON question_responses
+BEGIN
+    INSERT INTO round_summary (session_id, round_type, total_questions, correct_answers)
+    VALUES (NEW.session_id, NEW.round_type, 1, CASE WHEN NEW.is_correct = 1 THEN 1 ELSE 0 END)
+    ON CONFLICT (session_id, round_type) DO UPDATE SET
+        total_questions = total_questions + 1,
+        correct_answers = correct_answers + excluded.correct_answers;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_speech_round_summary_insert
+AFTER INSERT ON speech_metrics
+BEGIN
+    INSERT INTO speech_round_summary
+        (session_id, round_type, samples, avg_confidence, avg_speech_rate, avg_clarity, avg_volume_variation)
+    VALUES (NEW.session_id, NEW.round_type, 1, NEW.confidence_level, NEW.speech_rate,
+            NEW.clarity_score, NEW.volume_variation)
+    ON CONFLICT (session_id, round_type) DO UPDATE SET
+        samples = samples + 1,
+        avg_confidence = avg_confidence + (excluded.avg_confidence - avg_confidence) / (samples + 1),
+        avg_speech_rate = avg_speech_rate + (excluded.avg_speech_rate - avg_speech_rate) / (samples + 1),
+        avg_clarity = avg_clarity + (excluded.avg_clarity - avg_clarity) / (samples + 1),
+        avg_volume_variation = avg_volume_variation
+            + (excluded.avg_volume_variation - avg_volume_variation) / (samples + 1);
+
+    INSERT INTO speech_emotion_counts (session_id, emotion, count)
+    SELECT NEW.session_id, NEW.emotion, 1 WHERE NEW.emotion IS NOT NULL
+    ON CONFLICT (session_id, emotion) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_incident_summary_insert
+AFTER INSERT ON proctoring_incident_intervals
+BEGIN
+    INSERT INTO incident_summary
+        (session_id, incident_type, intervals, frames, peak_confidence, avg_confidence, duration_seconds)
+    VALUES (NEW.session_id, NEW.incident_type, 1, NEW.frame_count, NEW.peak_confidence, NEW.mean_confidence,
+            (julianday(NEW.ended_at) - julianday(NEW.started_at)) * 86400.0)
+    ON CONFLICT (session_id, incident_type) DO UPDATE SET
+        intervals = intervals + 1,
+        avg_confidence = (avg_confidence * frames + excluded.avg_confidence * excluded.frames)
+            / (frames + excluded.frames),
+        frames = frames + excluded.frames,
+        peak_confidence = MAX(peak_confidence, excluded.peak_confidence),
+        duration_seconds = duration_seconds + excluded.duration_seconds;
+END;
@@ -0,0 +1,59 @@
+-- Last activity per session, used by the retention job to find old sessions
+CREATE TABLE IF NOT EXISTS session_activity (
+    session_id TEXT PRIMARY KEY,
+    first_seen TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_seen TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_session_activity_last_seen
+    ON session_activity (last_seen);
+
+-- Where each archived session went, for read-through lookups
+CREATE TABLE IF NOT EXISTS archived_sessions (
+    session_id TEXT PRIMARY KEY,
+    archive_file TEXT NOT NULL,
+    last_seen TIMESTAMP,
+    archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Backfill: use the latest timestamp we have, otherwise now, so sessions
+-- without timestamps age out one retention window after this migration
+INSERT OR IGNORE INTO session_activity (session_id, first_seen, last_seen)
+SELECT session_id, MIN(ts), MAX(ts) FROM (
+    SELECT session_id, completed_at AS ts FROM round_completions
+    UNION ALL SELECT session_id, timestamp FROM proctoring_incidents
+    UNION ALL SELECT session_id, ended_at FROM proctoring_incident_intervals
+) WHERE session_id IS NOT NULL AND ts IS NOT NULL
+GROUP BY session_id;
+
+INSERT OR IGNORE INTO session_activity (session_id)
+SELECT session_id FROM question_responses WHERE session_id IS NOT NULL
+UNION SELECT session_id FROM speech_metrics WHERE session_id IS NOT NULL;
+
+CREATE TRIGGER IF NOT EXISTS trg_activity_question_responses
+AFTER INSERT ON question_responses
+BEGIN
+    INSERT INTO session_activity (session_id) VALUES (NEW.session_id)
+    ON CONFLICT (session_id) DO UPDATE SET last_seen = CURRENT_TIMESTAMP;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_activity_speech_metrics
+AFTER INSERT ON speech_metrics
+BEGIN
+    INSERT INTO session_activity (session_id) VALUES (NEW.session_id)
+    ON CONFLICT (session_id) DO UPDATE SET last_seen = CURRENT_TIMESTAMP;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_activity_incident_intervals
+AFTER INSERT ON proctoring_incident_intervals
+BEGIN
+    INSERT INTO session_activity (session_id) VALUES (NEW.session_id)
+    ON CONFLICT (session_id) DO UPDATE SET last_seen = CURRENT_TIMESTAMP;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_activity_round_completions
+AFTER INSERT ON round_completions
+BEGIN
+    INSERT INTO session_activity (session_id) VALUES (NEW.session_id)
+    ON CONFLICT (session_id) DO UPDATE SET last_seen = CURRENT_TIMESTAMP;
+END;
@@ -0,0 +1,10 @@
+-- Serialized KLL quantile sketches of cohort scores, one per round and
+-- category ('overall' for the round score), used for percentile lookups
+CREATE TABLE IF NOT EXISTS score_sketches (
+    round_type TEXT NOT NULL,
+    category TEXT NOT NULL,
+    sketch TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (round_type, category)
+);
@@ -0,0 +1,19 @@
+-- One row per LLM request, hedged duplicates included, for token and
+-- latency accounting by label (generation round or grading step)
+CREATE TABLE IF NOT EXISTS llm_calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    label TEXT NOT NULL,
+    model TEXT,
+    priority TEXT,
+    session_id TEXT,
+    input_tokens INTEGER,
+    output_tokens INTEGER,
+    cached_tokens INTEGER,
+    latency_ms REAL NOT NULL,
+    ok INTEGER NOT NULL,
+    hedge INTEGER NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_llm_calls_label_created
+    ON llm_calls (label, created_at);
@@ -0,0 +1,17 @@
+-- One row per routed LLM task: which tiers were tried, which model's
+-- answer was used and why the cascade stopped or escalated
+CREATE TABLE IF NOT EXISTS model_routing (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task TEXT NOT NULL,
+    session_id TEXT,
+    models_tried TEXT NOT NULL,
+    model TEXT,
+    confidence REAL,
+    escalated INTEGER NOT NULL DEFAULT 0,
+    reason TEXT,
+    latency_ms REAL NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_model_routing_task_created
+    ON model_routing (task, created_at);
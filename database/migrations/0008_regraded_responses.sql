@@ -0,0 +1,13 @@
+-- Answers stored ungraded (is_correct NULL) count as incorrect in
+-- round_summary until they are graded; keep the summary in step when a
+-- response's verdict is updated later
+
+CREATE TRIGGER IF NOT EXISTS trg_round_summary_regrade
+AFTER UPDATE OF is_correct ON question_responses
+BEGIN
+    UPDATE round_summary
+    SET correct_answers = correct_answers
+        + (CASE WHEN NEW.is_correct = 1 THEN 1 ELSE 0 END)
+        - (CASE WHEN OLD.is_correct = 1 THEN 1 ELSE 0 END)
+    WHERE session_id = NEW.session_id AND round_type = NEW.round_type;
+END;
@@ -0,0 +1,8 @@
+-- Sessions whose round result is already in score_sketches, so scoring a
+-- round again (a resubmit or a retried request) does not count it twice
+CREATE TABLE IF NOT EXISTS cohort_samples (
+    session_id TEXT NOT NULL,
+    round_type TEXT NOT NULL,
+    recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (session_id, round_type)
+);
@@ -0,0 +1,12 @@
+-- Interview session id (question_responses, round_completions) -> the Flask
+-- user id that keys proctoring incidents and speech metrics for the same
+-- candidate, so analytics can join the two
+CREATE TABLE IF NOT EXISTS session_users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL UNIQUE,
+    user_id TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_session_users_user_id
+    ON session_users (user_id);
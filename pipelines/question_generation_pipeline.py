@@ -1,6 +1,10 @@
 import concurrent.futures
+import hashlib
+import os
+import time
 from components.parse_resume import parse_to_text
 from components.extract_metrics import extract_metrics
+from components.fallback_questions import get_fallback_questions
 from components.generating_questions import (
     generate_Introduction,
     generate_Aptitude,
@@ -8,104 +12,222 @@ from components.generating_questions import (
     generate_HR
 )
 from services.question_service import QuestionService
+from pipelines.stage_graph import StageCache, StageGraph
 import sys
 import logging
 
 logger = logging.getLogger(__name__)
 
-def question_generation_pipeline(path: str, progress_callback=None) -> list:
+ROUNDS = ['introduction', 'aptitude', 'technical', 'coding', 'hr']
+# One budget for the whole run; rounds still pending then use the fallback bank
+GENERATION_DEADLINE = float(os.getenv('NEUROPREP_GENERATION_DEADLINE', '90'))
+# How long after the deadline a late round may still replace its fallback
+UPGRADE_WINDOW = float(os.getenv('NEUROPREP_UPGRADE_WINDOW', '300'))
+
+STAGE_MESSAGES = {
+    'metrics': "Resume and Metrics extraction Completed",
+    'introduction': "✓ Introduction questions generation completed",
+    'aptitude': "✓ Aptitude questions generation completed",
+    'technical': "✓ Technical questions generation completed",
+    'coding': "✓ Coding questions fetched from LeetCode",
+    'hr': "✓ HR questions generation completed"
+}
+
+# Stage outputs are memoized by input hash, so a retry for the same resume
+# reuses every stage that already succeeded
+question_graph = StageGraph(
+    StageCache(
+        max_entries=int(os.getenv('NEUROPREP_STAGE_CACHE_SIZE', '256')),
+        ttl=float(os.getenv('NEUROPREP_STAGE_CACHE_TTL', str(6 * 3600)))
+    ),
+    max_workers=int(os.getenv('NEUROPREP_STAGE_WORKERS', '8')),
+    name='question-stage'
+)
+
+
+def _require(questions, round_type):
+    # Raising keeps an empty result out of the stage cache so a retry regenerates it
+    if not questions:
+        raise ValueError(f"No {round_type} questions were generated")
+    return questions
+
+
+@question_graph.stage('resume_text', deps=['resume_path'])
+def parse_stage(resume_path):
+    try:
+        resume_content = parse_to_text(resume_path)
+        if not resume_content:
+            raise ValueError("Failed to extract text from resume")
+        return resume_content
+    except Exception as e:
+        logger.error(f"Error parsing resume: {str(e)}")
+        raise ValueError(f"Failed to parse resume: {str(e)}")
+
+
+@question_graph.stage('metrics', deps=['resume_text'])
+def metrics_stage(resume_text):
+    try:
+        metrics_dict = extract_metrics(resume_text)
+        if not metrics_dict:
+            raise ValueError("Failed to extract metrics from resume")
+        return metrics_dict
+    except Exception as e:
+        logger.error(f"Error extracting metrics: {str(e)}")
+        raise ValueError(f"Failed to extract metrics: {str(e)}")
+
+
+@question_graph.stage('introduction', deps=['metrics'])
+def introduction_stage(metrics):
+    return _require(generate_Introduction(metrics), 'introduction')
+
+
+@question_graph.stage('aptitude', deps=['metrics'])
+def aptitude_stage(metrics):
+    return _require(generate_Aptitude(metrics), 'aptitude')
+
+
+@question_graph.stage('technical', deps=['metrics', 'resume_text'])
+def technical_stage(metrics, resume_text):
+    # Bank questions are matched against the full resume, not only the extracted skills
+    return _require(generate_Technical(metrics, resume_text), 'technical')
+
+
+@question_graph.stage('coding', deps=['metrics'])
+def coding_stage(metrics):
+    # LeetCode questions matched to the resume's skills and experience level
+    return _require(QuestionService().get_questions_by_difficulty(
+        metrics.get('technical_skill_emphasis', '').split(','),
+        metrics.get('experience_level_categorization', 'beginner').split(':')[0].lower()
+    ), 'coding')
+
+
+@question_graph.stage('hr', deps=['metrics'])
+def hr_stage(metrics):
+    return _require(generate_HR(metrics), 'hr')
+
+
+def _file_fingerprint(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def run_question_stages(path: str, targets=ROUNDS, progress_callback=None,
+                        deadline=GENERATION_DEADLINE, on_late_result=None):
     """
-    Generate questions for all interview rounds
-    
+    Run the stages needed for the requested rounds within one time budget
+
+    Stages already computed for the same resume content are taken from the
+    cache, and stages in flight for another caller are shared, so no stage
+    runs twice per candidate. A round that fails or is still running when
+    the deadline passes gets questions from the local fallback bank; if a
+    late round later succeeds within UPGRADE_WINDOW, ``on_late_result`` is
+    called with (round, questions) so the caller can swap it in.
+
     Args:
         path (str): Path to the resume file
+        targets (list): Rounds to produce
         progress_callback (callable, optional): Function to call with progress updates
-        
+        deadline (float): Seconds to wait for all targets
+        on_late_result (callable, optional): Called from a worker thread with upgraded rounds
+
     Returns:
-        tuple: (introduction_questions, aptitude_questions, technical_questions, coding_questions, hr_questions)
+        tuple: (round -> questions, set of rounds served from the fallback bank)
     """
     def log_progress(message):
         if progress_callback:
             progress_callback(message)
         logger.info(message)
 
+    started = time.monotonic()
+    log_progress("Resume and Metrics extraction Initiated")
+    futures = question_graph.run(
+        targets,
+        inputs={'resume_path': path},
+        input_keys={'resume_path': _file_fingerprint(path)}
+    )
+
+    # Report stages in the order they finish; metrics is absent when every round is cached
+    pending = {future: name for name, future in futures.items()
+               if name in targets or name == 'metrics'}
+    outputs, failed = {}, set()
+    try:
+        for future in concurrent.futures.as_completed(pending, timeout=deadline):
+            name = pending[future]
+            error = future.exception()
+            if name == 'metrics':
+                if error is not None:
+                    # Without metrics no round can be personalised; the resume itself is the problem
+                    raise error if isinstance(error, ValueError) else ValueError(str(error))
+                log_progress(STAGE_MESSAGES[name])
+                log_progress("\nInitiating Question Generation")
+            elif error is not None:
+                logger.error(f"{name} stage failed: {str(error)}")
+                failed.add(name)
+            else:
+                outputs[name] = future.result()
+                log_progress(STAGE_MESSAGES[name])
+    except concurrent.futures.TimeoutError:
+        logger.warning(f"Question generation deadline of {deadline}s passed")
+
+    fallbacks = set()
+    upgrade_until = started + deadline + UPGRADE_WINDOW
+    for name in targets:
+        if name in outputs:
+            continue
+        outputs[name] = get_fallback_questions(name)
+        fallbacks.add(name)
+        log_progress(f"⚠ Using standard {name} questions")
+        if name not in failed and on_late_result is not None:
+            futures[name].add_done_callback(
+                lambda future, name=name: _deliver_late(name, future, upgrade_until, on_late_result))
+    return outputs, fallbacks
+
+
+def _deliver_late(name, future, upgrade_until, on_late_result):
+    if future.exception() is not None:
+        logger.error(f"Late {name} stage failed: {str(future.exception())}")
+        return
+    if time.monotonic() > upgrade_until:
+        logger.info(f"Late {name} questions arrived after the upgrade window")
+        return
+    try:
+        on_late_result(name, future.result())
+    except Exception as e:
+        logger.error(f"Error applying late {name} questions: {str(e)}")
+
+
+def question_generation_pipeline(path: str, progress_callback=None, on_late_result=None) -> list:
+    """
+    Generate questions for all interview rounds
+
+    Finishes within GENERATION_DEADLINE; rounds that are not ready by then
+    use standard questions (see run_question_stages).
+
+    Args:
+        path (str): Path to the resume file
+        progress_callback (callable, optional): Function to call with progress updates
+        on_late_result (callable, optional): Called with (round, questions) when a
+            round that fell back to standard questions finishes later
+
+    Returns:
+        tuple: (introduction_questions, aptitude_questions, technical_questions, coding_questions, hr_questions)
+    """
     try:
-        log_progress("Resume and Metrics extraction Initiated")
-        
-        # Parse resume
-        try:
-            resume_content = parse_to_text(path)
-            if not resume_content:
-                raise ValueError("Failed to extract text from resume")
-        except Exception as e:
-            logger.error(f"Error parsing resume: {str(e)}")
-            raise ValueError(f"Failed to parse resume: {str(e)}")
-            
-        # Extract metrics
-        try:
-            metrics_dict = extract_metrics(resume_content)
-            if not metrics_dict:
-                raise ValueError("Failed to extract metrics from resume")
-        except Exception as e:
-            logger.error(f"Error extracting metrics: {str(e)}")
-            raise ValueError(f"Failed to extract metrics: {str(e)}")
-            
-        log_progress("Resume and Metrics extraction Completed")
-        
-        log_progress("\nInitiating Question Generation")
-        
-        # Initialize question service for LeetCode integration
-        question_service = QuestionService()
-        
-        # Create a thread pool
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            try:
-                # Submit all tasks
-                intro_future = executor.submit(generate_Introduction, metrics_dict)
-                aptitude_future = executor.submit(generate_Aptitude, metrics_dict)
-                technical_future = executor.submit(generate_Technical, metrics_dict)
-                hr_future = executor.submit(generate_HR, metrics_dict)
-                
-                # Get coding questions from LeetCode
-                coding_future = executor.submit(
-                    question_service.get_questions_by_difficulty,
-                    metrics_dict.get('technical_skill_emphasis', '').split(','),
-                    metrics_dict.get('experience_level_categorization', 'beginner').split(':')[0].lower()
-                )
-                
-                # Wait for all tasks to complete with timeout
-                introduction_questions_list = intro_future.result(timeout=60)
-                log_progress("✓ Introduction questions generation completed")
-                
-                aptitude_questions_dict = aptitude_future.result(timeout=60)
-                log_progress("✓ Aptitude questions generation completed")
-                
-                technical_questions_dict = technical_future.result(timeout=60)
-                log_progress("✓ Technical questions generation completed")
-                
-                coding_questions = coding_future.result(timeout=60)
-                log_progress("✓ Coding questions fetched from LeetCode")
-                
-                hr_questions_list = hr_future.result(timeout=60)
-                log_progress("✓ HR questions generation completed")
-                
-            except concurrent.futures.TimeoutError as e:
-                logger.error("Question generation timed out")
-                raise ValueError("Question generation timed out. Please try again.")
-            except Exception as e:
-                logger.error(f"Error in question generation: {str(e)}")
-                raise ValueError(f"Failed to generate questions: {str(e)}")
-        
-        # Validate results
-        if not all([introduction_questions_list, aptitude_questions_dict, 
-                   technical_questions_dict, coding_questions, hr_questions_list]):
-            raise ValueError("Some questions failed to generate")
-            
-        log_progress("\nAll questions generated successfully!")
+        outputs, fallbacks = run_question_stages(path, ROUNDS, progress_callback,
+                                                 on_late_result=on_late_result)
+
+        if fallbacks:
+            logger.warning(f"Serving standard questions for: {', '.join(sorted(fallbacks))}")
+        if progress_callback:
+            progress_callback("\nAll questions generated successfully!")
+        logger.info("All questions generated successfully!")
         sys.stdout.flush()
-        
-        return introduction_questions_list, aptitude_questions_dict, technical_questions_dict, coding_questions, hr_questions_list
-        
+
+        return tuple(outputs[round_type] for round_type in ROUNDS)
+
     except Exception as e:
         logger.error(f"Error in question generation pipeline: {str(e)}")
-        raise
\ No newline at end of file
+        raise
@@ -0,0 +1,207 @@
+import contextvars
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class StageCache:
+    """Memoized stage outputs keyed by input hash.
+
+    Entries are Futures, so a stage that is still running is shared by every
+    caller asking for the same key instead of being started again. Failed
+    stages are evicted so a retry recomputes them; successful ones live for
+    ``ttl`` seconds, at most ``max_entries`` at a time.
+    """
+
+    def __init__(self, max_entries=256, ttl=6 * 3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (future, created_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_reserve(self, key):
+        """Return (future, owner); the owner must resolve the future"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                future, created_at = entry
+                expired = future.done() and time.time() - created_at > self.ttl
+                if not expired:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return future, False
+            self.misses += 1
+            future = Future()
+            self._entries[key] = (future, time.time())
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                if not self._entries[oldest][0].done():
+                    break  # never drop a stage that others may be waiting on
+                self._entries.popitem(last=False)
+            return future, True
+
+    def is_ready(self, key):
+        """True if a successful, unexpired output is cached for key"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return False
+        future, created_at = entry
+        return (future.done() and future.exception() is None
+                and time.time() - created_at <= self.ttl)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def get_stats(self):
+        with self._lock:
+            size = len(self._entries)
+        return {'entries': size, 'hits': self.hits, 'misses': self.misses}
+
+
+class Stage:
+    __slots__ = ('name', 'fn', 'deps', 'version')
+
+    def __init__(self, name, fn, deps, version):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.version = version
+
+
+class StageGraph:
+    """A DAG of named stages with memoized outputs.
+
+    A stage is ``fn(**outputs_of_deps)``; a dependency is either another
+    stage or a named input passed to ``run``. Each stage's cache key hashes
+    its name, version and the keys of its dependencies, so it changes
+    exactly when some upstream input changes. ``run`` schedules only the
+    stages the requested targets need, each as soon as its dependencies
+    are done.
+    """
+
+    def __init__(self, cache=None, max_workers=8, name='stage'):
+        self.stages = {}
+        self.cache = cache or StageCache()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+
+    def stage(self, name, deps=(), version=1):
+        """Decorator registering fn as a stage"""
+        def register(fn):
+            self.stages[name] = Stage(name, fn, deps, version)
+            return fn
+        return register
+
+    def _closure(self, targets, inputs):
+        order, seen = [], set()
+
+        def visit(name, path=()):
+            if name in seen or name in inputs:
+                return
+            if name in path:
+                raise ValueError(f"Stage cycle: {' -> '.join(path + (name,))}")
+            if name not in self.stages:
+                raise KeyError(f"Unknown stage or input: {name}")
+            for dep in self.stages[name].deps:
+                visit(dep, path + (name,))
+            seen.add(name)
+            order.append(name)
+
+        for target in targets:
+            visit(target)
+        return order
+
+    def run(self, targets, inputs, input_keys=None, on_stage_done=None):
+        """Start the stages needed for targets; returns {stage: Future}.
+
+        ``input_keys`` maps input names to fingerprints (e.g. a file hash);
+        inputs without one are hashed by their repr. ``on_stage_done`` is
+        called as ``(name, cached, error)`` when each stage settles. Stages
+        run in a copy of the caller's context, so context variables (such
+        as the LLM priority) carry over to them.
+        """
+        input_keys = dict(input_keys or {})
+        for name, value in inputs.items():
+            input_keys.setdefault(name, hashlib.sha256(repr(value).encode('utf-8')).hexdigest())
+
+        order = self._closure(targets, inputs)
+        keys = dict(input_keys)
+        for name in order:
+            stage = self.stages[name]
+            digest = hashlib.sha256(f"{name}:{stage.version}".encode('utf-8'))
+            for dep in stage.deps:
+                digest.update(f"|{dep}={keys[dep]}".encode('utf-8'))
+            keys[name] = digest.hexdigest()
+
+        # Upstream stages are only needed by consumers that are not cached
+        needed = set(targets)
+        for name in reversed(order):
+            if name in needed and not self.cache.is_ready(keys[name]):
+                needed.update(self.stages[name].deps)
+
+        context = contextvars.copy_context()
+        futures = {}
+        for name in order:
+            if name in needed:
+                futures[name] = self._schedule(name, keys, inputs, futures, on_stage_done, context)
+        return futures
+
+    def _schedule(self, name, keys, inputs, futures, on_stage_done, context):
+        stage, key = self.stages[name], keys[name]
+        result, owner = self.cache.get_or_reserve(key)
+        if not owner:
+            if on_stage_done is not None:
+                result.add_done_callback(
+                    lambda f: on_stage_done(stage.name, True, f.exception()))
+            return result
+
+        # A cached output may have expired since planning; run what it needs now
+        for dep in stage.deps:
+            if dep not in inputs and dep not in futures:
+                futures[dep] = self._schedule(dep, keys, inputs, futures, on_stage_done, context)
+        dep_futures = [futures[dep] for dep in stage.deps if dep in futures]
+        remaining = [len(dep_futures)]
+        lock = threading.Lock()
+
+        def finish(future):
+            error = future.exception()
+            if error is not None:
+                self.cache.discard(key)
+                result.set_exception(error)
+            else:
+                result.set_result(future.result())
+            if on_stage_done is not None:
+                on_stage_done(stage.name, False, error)
+
+        def start():
+            try:
+                kwargs = {dep: inputs[dep] if dep in inputs else futures[dep].result() for dep in stage.deps}
+            except Exception as e:
+                self.cache.discard(key)
+                result.set_exception(e)
+                if on_stage_done is not None:
+                    on_stage_done(stage.name, False, e)
+                return
+            # A context can only be entered by one thread at a time, so each stage gets its own copy
+            self._executor.submit(context.copy().run, stage.fn, **kwargs).add_done_callback(finish)
+
+        def dep_done(_):
+            with lock:
+                remaining[0] -= 1
+                ready = remaining[0] == 0
+            if ready:
+                start()
+
+        if not dep_futures:
+            start()
+        for dep_future in dep_futures:
+            dep_future.add_done_callback(dep_done)
+        return result
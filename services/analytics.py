@@ -0,0 +1,320 @@
+import hashlib
+import logging
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from services.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+# Columns loaded into memory per table; every table has an increasing id
+TABLE_COLUMNS = {
+    'question_responses': ['id', 'session_id', 'round_type', 'question_number', 'question_text',
+                           'category', 'is_correct'],
+    'speech_metrics': ['id', 'session_id', 'round_type', 'emotion', 'confidence_level',
+                       'speech_rate', 'clarity_score', 'volume_variation'],
+    'proctoring_incident_intervals': ['id', 'session_id', 'incident_type', 'started_at',
+                                      'frame_count', 'peak_confidence'],
+    'round_completions': ['id', 'session_id', 'round_type', 'completed_at'],
+    'session_users': ['id', 'session_id', 'user_id']
+}
+
+# Low-cardinality text columns held as categoricals so group-bys work on integer codes
+CATEGORICAL_COLUMNS = {'session_id', 'user_id', 'round_type', 'question_text', 'category', 'emotion', 'incident_type'}
+
+SCORE_BINS = np.arange(0, 101, 10)
+
+
+class TableFrame:
+    """A table cached as a DataFrame and refreshed incrementally by id.
+
+    Only rows with an id above the last one seen are fetched. If rows were
+    deleted (archival), the counts stop adding up and the table is reloaded.
+    """
+
+    def __init__(self, table, columns):
+        self.table = table
+        self.columns = columns
+        self.frame = pd.DataFrame(columns=columns)
+        self.last_id = 0
+
+    def _read(self, conn, where='', params=()):
+        sql = f"SELECT {', '.join(self.columns)} FROM {self.table} {where} ORDER BY id"
+        frame = pd.read_sql_query(sql, conn, params=params)
+        for column in CATEGORICAL_COLUMNS.intersection(frame.columns):
+            frame[column] = frame[column].astype(str).where(frame[column].notna()).astype('category')
+        return frame
+
+    def _append(self, fresh):
+        if self.frame.empty:
+            return fresh
+        combined = pd.concat([self.frame, fresh], ignore_index=True)
+        for column in CATEGORICAL_COLUMNS.intersection(combined.columns):
+            combined[column] = union_categoricals([self.frame[column], fresh[column]])
+        return combined
+
+    def refresh(self, conn):
+        """Pull new rows; returns True when the frame changed"""
+        count, max_id = conn.execute(
+            f"SELECT COUNT(*), COALESCE(MAX(id), 0) FROM {self.table}").fetchone()
+        if count == len(self.frame) and max_id == self.last_id:
+            return False
+
+        new_rows = conn.execute(
+            f"SELECT COUNT(*) FROM {self.table} WHERE id > ?", (self.last_id,)).fetchone()[0]
+        if len(self.frame) + new_rows != count:
+            logger.info(f"Reloading {self.table}: rows were removed since the last refresh")
+            self.frame = self._read(conn)
+        else:
+            self.frame = self._append(self._read(conn, "WHERE id > ?", (self.last_id,)))
+        self.last_id = max_id
+        return True
+
+
+def _records(frame):
+    """DataFrame to JSON-safe records (NaN becomes None)"""
+    return frame.astype(object).where(frame.notna(), None).to_dict('records')
+
+
+class CohortAnalytics:
+    """Vectorized cohort statistics over responses, speech and incidents.
+
+    Tables are held as pandas frames and refreshed at most every
+    ``refresh_interval`` seconds; computed reports are cached per filter
+    until the underlying data changes.
+    """
+
+    def __init__(self, refresh_interval=30.0):
+        self.refresh_interval = refresh_interval
+        self.tables = {table: TableFrame(table, columns) for table, columns in TABLE_COLUMNS.items()}
+        self.version = 0
+        self._refreshed_at = 0.0
+        self._reports = {}
+        self._lock = threading.Lock()
+
+    def refresh(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._refreshed_at < self.refresh_interval:
+            return False
+        storage = get_storage()
+        storage.flush()
+        with storage.reader() as conn:
+            changed = [table.refresh(conn) for table in self.tables.values()]
+        self._refreshed_at = now
+        if any(changed):
+            self.version += 1
+            self._reports.clear()
+        return any(changed)
+
+    def etag(self, round_type=None, min_attempts=5):
+        key = f"{self.version}:{round_type}:{min_attempts}:" + ':'.join(
+            f"{name}={table.last_id}/{len(table.frame)}" for name, table in self.tables.items())
+        return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+    def report(self, round_type=None, min_attempts=5):
+        """Cohort statistics as a JSON-serializable dict"""
+        with self._lock:
+            self.refresh()
+            key = (round_type, min_attempts)
+            if key not in self._reports:
+                start = time.perf_counter()
+                responses = self._frame('question_responses', round_type)
+                speech = self._frame('speech_metrics', round_type)
+                report = {
+                    'round': round_type,
+                    'sessions': int(responses['session_id'].nunique()),
+                    'responses': int(len(responses)),
+                    'question_stats': self.question_stats(responses, min_attempts),
+                    'category_distributions': self.category_distributions(responses),
+                    'speech': self.speech_stats(speech),
+                    'incident_rates': self.incident_rates(round_type)
+                }
+                report['compute_ms'] = round((time.perf_counter() - start) * 1000.0, 1)
+                self._reports[key] = report
+            return self._reports[key]
+
+    def _frame(self, table, round_type=None):
+        frame = self.tables[table].frame
+        if round_type is not None and 'round_type' in frame.columns:
+            frame = frame[frame['round_type'] == round_type]
+        return frame
+
+    @staticmethod
+    def question_stats(responses, min_attempts=5):
+        """Pass rate, calibrated difficulty and discrimination per question.
+
+        Difficulty is the Laplace-smoothed failure rate (and its logit);
+        discrimination is the correlation between getting the question right
+        and the candidate's score on the rest of that round.
+        """
+        if responses.empty:
+            return []
+        df = responses[['session_id', 'round_type', 'question_text', 'is_correct']].dropna(
+            subset=['question_text', 'is_correct'])
+        x = df['is_correct'].astype(float)
+        session_groups = df.groupby(['session_id', 'round_type'], observed=True)['is_correct']
+        session_total = session_groups.transform('sum').astype(float)
+        session_count = session_groups.transform('count').astype(float)
+        # Rest score excludes the item itself so it does not inflate the correlation
+        y = ((session_total - x) / (session_count - 1).where(session_count > 1)).fillna(0.0)
+
+        moments = pd.DataFrame({
+            'round_type': df['round_type'],
+            'question_text': df['question_text'],
+            'x': x, 'y': y, 'xy': x * y, 'yy': y * y
+        }).groupby(['round_type', 'question_text'], observed=True)
+        stats = moments.agg(attempts=('x', 'size'), correct=('x', 'sum'),
+                            mx=('x', 'mean'), my=('y', 'mean'), mxy=('xy', 'mean'), myy=('yy', 'mean'))
+        stats = stats[stats['attempts'] >= min_attempts]
+        if stats.empty:
+            return []
+
+        stats['pass_rate'] = stats['mx']
+        p = (stats['attempts'] - stats['correct'] + 1) / (stats['attempts'] + 2)
+        stats['difficulty'] = p
+        stats['difficulty_logit'] = np.log(p / (1 - p))
+        var_x = stats['mx'] * (1 - stats['mx'])
+        var_y = stats['myy'] - stats['my'] ** 2
+        denominator = np.sqrt(var_x * var_y)
+        stats['discrimination'] = ((stats['mxy'] - stats['mx'] * stats['my']) /
+                                   denominator.where(denominator > 1e-12))
+
+        stats = stats.reset_index().sort_values(['attempts', 'difficulty'], ascending=[False, False])
+        return _records(stats[['round_type', 'question_text', 'attempts', 'pass_rate',
+                               'difficulty', 'difficulty_logit', 'discrimination']].round(4))
+
+    @staticmethod
+    def category_distributions(responses):
+        """Distribution of per-session category scores (0-100)"""
+        df = responses.dropna(subset=['category', 'is_correct'])
+        if df.empty:
+            return []
+        scores = (df.assign(is_correct=df['is_correct'].astype(float))
+                  .groupby(['round_type', 'category', 'session_id'], observed=True)['is_correct'].mean() * 100.0)
+        grouped = scores.groupby(level=['round_type', 'category'], observed=True)
+        summary = grouped.agg(['count', 'mean', 'std'])
+        quantiles = grouped.quantile([0.1, 0.25, 0.5, 0.75, 0.9]).unstack()
+        quantiles.columns = [f"p{int(q * 100)}" for q in quantiles.columns]
+
+        bins = np.clip(np.digitize(scores.to_numpy(), SCORE_BINS[1:-1]), 0, len(SCORE_BINS) - 2)
+        histogram = (pd.Series(1, index=scores.index).groupby(
+            [scores.index.get_level_values('round_type'), scores.index.get_level_values('category'), bins],
+            observed=True).sum().unstack(fill_value=0).reindex(columns=range(len(SCORE_BINS) - 1), fill_value=0))
+
+        summary = summary.join(quantiles).round(2).reset_index()
+        summary['histogram'] = [histogram.loc[key].tolist() if key in histogram.index else []
+                                for key in zip(summary['round_type'], summary['category'])]
+        summary = summary.rename(columns={'count': 'sessions'})
+        return _records(summary)
+
+    @staticmethod
+    def speech_stats(speech):
+        if speech.empty:
+            return []
+        grouped = speech.groupby('round_type', observed=True)
+        stats = grouped[['confidence_level', 'speech_rate', 'clarity_score', 'volume_variation']].mean()
+        stats['samples'] = grouped.size()
+        stats['sessions'] = grouped['session_id'].nunique()
+        emotions = speech.groupby(['round_type', 'emotion'], observed=True).size().unstack(fill_value=0)
+        emotion_share = emotions.div(emotions.sum(axis=1), axis=0).round(4)
+        stats = stats.round(4).reset_index()
+        stats['emotions'] = [emotion_share.loc[round_type].to_dict() if round_type in emotion_share.index else {}
+                             for round_type in stats['round_type']]
+        return _records(stats)
+
+    def _by_interview_session(self, frame):
+        """Re-key rows stored under the Flask user id by interview session id.
+
+        Incidents and speech metrics are written under ``user_id`` while
+        responses and round completions use the interview session id; rows
+        of a user with several sessions appear once per session, and rows
+        with no known session keep their user id.
+        """
+        users = self.tables['session_users'].frame
+        frame = frame.assign(session_id=frame['session_id'].astype(object))
+        if users.empty:
+            return frame
+        mapping = pd.DataFrame({'user_id': users['user_id'].astype(object),
+                                'interview_session': users['session_id'].astype(object)})
+        joined = frame.merge(mapping, left_on='session_id', right_on='user_id', how='left')
+        joined['session_id'] = joined['interview_session'].fillna(joined['session_id'])
+        return joined.drop(columns=['user_id', 'interview_session'])
+
+    def incident_rates(self, round_type=None):
+        """Incidents per session for each round.
+
+        Incidents carry no round, so each one is attributed to the first
+        round its session completed after the incident started; incidents
+        after the last recorded completion are reported as 'unattributed'.
+        """
+        incidents = self.tables['proctoring_incident_intervals'].frame
+        completions = self.tables['round_completions'].frame
+        responses = self.tables['question_responses'].frame
+        if incidents.empty:
+            return []
+
+        # Plain strings here: the join keys' categories differ between tables
+        incidents = self._by_interview_session(incidents)
+        incidents = incidents.assign(started_at=pd.to_datetime(incidents['started_at'], errors='coerce'))
+        incidents = incidents.dropna(subset=['started_at']).sort_values('started_at')
+        completions = completions.assign(session_id=completions['session_id'].astype(object),
+                                         round_type=completions['round_type'].astype(object),
+                                         completed_at=pd.to_datetime(completions['completed_at'], errors='coerce'))
+        completions = completions.dropna(subset=['completed_at']).sort_values('completed_at')
+
+        if completions.empty:
+            attributed = incidents.drop_duplicates('id').assign(round_type='unattributed')
+        else:
+            attributed = pd.merge_asof(
+                incidents, completions[['session_id', 'round_type', 'completed_at']],
+                left_on='started_at', right_on='completed_at', by='session_id', direction='forward')
+            # An incident of a user with several sessions belongs to the earliest round it precedes
+            attributed = (attributed.sort_values('completed_at', na_position='last')
+                          .drop_duplicates('id').sort_values('started_at'))
+            attributed['round_type'] = attributed['round_type'].fillna('unattributed')
+        if round_type is not None:
+            attributed = attributed[attributed['round_type'] == round_type]
+        if attributed.empty:
+            return []
+
+        # Sessions that took part in each round, from any table that knows it
+        participants = pd.concat([
+            completions[['session_id', 'round_type']],
+            responses[['session_id', 'round_type']],
+            self._by_interview_session(self.tables['speech_metrics'].frame[['session_id', 'round_type']])
+        ]).astype(object).drop_duplicates()
+        sessions_per_round = participants.groupby('round_type', observed=True)['session_id'].nunique()
+        sessions_per_round['unattributed'] = incidents.drop_duplicates('id')['session_id'].nunique()
+
+        grouped = attributed.groupby('round_type', observed=True)
+        stats = pd.DataFrame({
+            'incidents': grouped.size(),
+            'sessions_with_incidents': grouped['session_id'].nunique(),
+            'flagged_frames': grouped['frame_count'].sum()
+        })
+        stats['sessions'] = sessions_per_round.reindex(stats.index).fillna(0).astype(int)
+        sessions = stats['sessions'].where(stats['sessions'] > 0)
+        stats['incidents_per_session'] = (stats['incidents'] / sessions).round(4)
+        stats['share_of_sessions_flagged'] = (stats['sessions_with_incidents'] / sessions).round(4)
+
+        by_type = attributed.groupby(['round_type', 'incident_type'], observed=True).size().unstack(fill_value=0)
+        stats = stats.reset_index()
+        stats['by_type'] = [{k: int(v) for k, v in by_type.loc[rt].items() if v} for rt in stats['round_type']]
+        return _records(stats)
+
+
+_analytics = None
+_analytics_lock = threading.Lock()
+
+
+def get_cohort_analytics(refresh_interval=30.0):
+    """Return the process-wide CohortAnalytics"""
+    global _analytics
+    with _analytics_lock:
+        if _analytics is None:
+            _analytics = CohortAnalytics(refresh_interval)
+    return _analytics
@@ -0,0 +1,222 @@
+import bisect
+import json
+import logging
+import math
+import random
+import threading
+
+from services.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+OVERALL = 'overall'
+
+
+class KLLSketch:
+    """Mergeable streaming quantile sketch (Karnin, Lang, Liberty).
+
+    Items live in a stack of compactors; level h items each stand for 2**h
+    inputs. When a level overflows it is sorted and every other item (from a
+    random offset) is promoted, so memory stays O(k) for any stream length
+    with rank error around 1.7/k.
+    """
+
+    def __init__(self, k=200, c=2.0 / 3.0):
+        self.k = k
+        self.c = c
+        self.n = 0
+        self.compactors = [[]]
+        self._cdf = None
+
+    def _capacity(self, level):
+        depth = len(self.compactors) - level - 1
+        return int(math.ceil(self.k * self.c ** depth)) + 1
+
+    def update(self, value):
+        self.compactors[0].append(float(value))
+        self.n += 1
+        self._cdf = None
+        self._compress()
+
+    def merge(self, other):
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for level, items in enumerate(other.compactors):
+            self.compactors[level].extend(items)
+        self.n += other.n
+        self._cdf = None
+        self._compress()
+        return self
+
+    def _compress(self):
+        while sum(len(items) for items in self.compactors) > sum(
+                self._capacity(level) for level in range(len(self.compactors))):
+            for level, items in enumerate(self.compactors):
+                if len(items) >= self._capacity(level):
+                    if level + 1 == len(self.compactors):
+                        self.compactors.append([])
+                    items.sort()
+                    # An odd leftover stays at this level so no weight is lost
+                    leftover = [items.pop()] if len(items) % 2 else []
+                    self.compactors[level + 1].extend(items[random.randint(0, 1)::2])
+                    self.compactors[level] = leftover
+                    break
+
+    def _weighted_cdf(self):
+        if self._cdf is None:
+            weighted = sorted((value, 1 << level)
+                              for level, items in enumerate(self.compactors) for value in items)
+            values, cumulative, total = [], [], 0
+            for value, weight in weighted:
+                total += weight
+                values.append(value)
+                cumulative.append(total)
+            self._cdf = (values, cumulative, total)
+        return self._cdf
+
+    def rank(self, value):
+        """Approximate fraction of inputs below value (ties count half)"""
+        values, cumulative, total = self._weighted_cdf()
+        if not total:
+            return None
+        lo = bisect.bisect_left(values, value)
+        hi = bisect.bisect_right(values, value)
+        below = cumulative[lo - 1] if lo else 0
+        through = cumulative[hi - 1] if hi else 0
+        return (below + (through - below) / 2.0) / total
+
+    def quantile(self, q):
+        values, cumulative, total = self._weighted_cdf()
+        if not total:
+            return None
+        index = bisect.bisect_left(cumulative, q * total)
+        return values[min(index, len(values) - 1)]
+
+    def to_json(self):
+        return json.dumps({'k': self.k, 'c': self.c, 'n': self.n, 'compactors': self.compactors})
+
+    @classmethod
+    def from_json(cls, data):
+        data = json.loads(data)
+        sketch = cls(k=data['k'], c=data['c'])
+        sketch.n = data['n']
+        sketch.compactors = data['compactors'] or [[]]
+        return sketch
+
+
+class CohortPercentiles:
+    """Per-round and per-category score distributions backed by KLL sketches.
+
+    Sketches are loaded from ``score_sketches`` on first use and kept in
+    memory for lookups, so a percentile never scans historical scores. A new
+    result is merged into the stored sketch inside a write transaction, so
+    processes sharing the database add to each other's sketches instead of
+    overwriting them, and each session's round is counted at most once.
+    """
+
+    def __init__(self, k=200):
+        self.k = k
+        self._sketches = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._sketches is None:
+            self._sketches = {}
+            for round_type, category, data in get_storage().query(
+                    "SELECT round_type, category, sketch FROM score_sketches", wait_for_writes=True):
+                try:
+                    self._sketches[(round_type, category)] = KLLSketch.from_json(data)
+                except (ValueError, KeyError) as e:
+                    logger.error(f"Discarding unreadable sketch for {round_type}/{category}: {str(e)}")
+        return self._sketches
+
+    def _merge_stored(self, conn, session_id, round_type, scores):
+        """Add scores to the stored sketches; runs on the storage writer thread"""
+        if session_id is not None and not conn.execute(
+                "INSERT OR IGNORE INTO cohort_samples (session_id, round_type) VALUES (?, ?)",
+                (str(session_id), round_type)).rowcount:
+            return None
+        merged = {}
+        for category, score in scores.items():
+            row = conn.execute("SELECT sketch FROM score_sketches WHERE round_type = ? AND category = ?",
+                               (round_type, category)).fetchone()
+            try:
+                sketch = KLLSketch.from_json(row[0]) if row else KLLSketch(self.k)
+            except (ValueError, KeyError) as e:
+                logger.error(f"Replacing unreadable sketch for {round_type}/{category}: {str(e)}")
+                sketch = KLLSketch(self.k)
+            sketch.update(score)
+            conn.execute("""
+                INSERT INTO score_sketches (round_type, category, sketch, count, updated_at)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT (round_type, category) DO UPDATE SET
+                    sketch = excluded.sketch,
+                    count = excluded.count,
+                    updated_at = excluded.updated_at
+            """, (round_type, category, sketch.to_json(), sketch.n))
+            merged[(round_type, category)] = sketch
+        return merged
+
+    def record(self, round_type, overall_score, category_scores=None, session_id=None):
+        """
+        Add one candidate's round result to the cohort
+
+        Args:
+            session_id (optional): With an id, a round the session already
+                recorded is not counted again
+
+        Returns:
+            bool: False if the session's round was already recorded
+        """
+        scores = {OVERALL: overall_score}
+        scores.update(category_scores or {})
+        scores = {category: score for category, score in scores.items() if score is not None}
+        merged = get_storage().run_in_transaction(
+            lambda conn: self._merge_stored(conn, session_id, round_type, scores))
+        if merged is None:
+            return False
+        with self._lock:
+            sketches = self._load()
+            for key, sketch in merged.items():
+                # A concurrent record may already have installed a newer copy
+                if key not in sketches or sketches[key].n <= sketch.n:
+                    sketches[key] = sketch
+        return True
+
+    def percentile(self, round_type, score, category=OVERALL):
+        """Percentile (0-100) of score within the cohort, or None without data"""
+        with self._lock:
+            sketch = self._load().get((round_type, category))
+            if sketch is None or score is None:
+                return None
+            rank = sketch.rank(score)
+        return None if rank is None else round(rank * 100.0, 1)
+
+    def percentiles(self, round_type, overall_score, category_scores=None):
+        """Overall and per-category percentiles for a scored round"""
+        return {
+            OVERALL: self.percentile(round_type, overall_score),
+            'categories': {
+                category: self.percentile(round_type, score, category)
+                for category, score in (category_scores or {}).items()
+            },
+            'cohort_size': self.cohort_size(round_type)
+        }
+
+    def cohort_size(self, round_type, category=OVERALL):
+        with self._lock:
+            sketch = self._load().get((round_type, category))
+            return sketch.n if sketch is not None else 0
+
+
+_cohort = None
+_cohort_lock = threading.Lock()
+
+
+def get_cohort_percentiles():
+    """Return the process-wide CohortPercentiles"""
+    global _cohort
+    with _cohort_lock:
+        if _cohort is None:
+            _cohort = CohortPercentiles()
+    return _cohort
@@ -0,0 +1,209 @@
+import argparse
+import io
+import logging
+import os
+import sys
+
+from services.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+# Exportable tables and whether they carry a round_type column
+EXPORT_TABLES = {
+    'question_responses': True,
+    'speech_metrics': True,
+    'proctoring_incidents': False,
+    'proctoring_incident_intervals': False,
+    'round_completions': True,
+    'sessions': False
+}
+
+FORMATS = {'parquet': '.parquet', 'arrow': '.arrow'}
+
+
+def _arrow_type(name, declared_type):
+    import pyarrow as pa
+
+    declared_type = (declared_type or '').upper()
+    if name == 'session_id':
+        return pa.string()  # declared INTEGER in older tables but holds UUIDs
+    if 'INT' in declared_type or 'BOOL' in declared_type:
+        return pa.int64()
+    if 'FLOAT' in declared_type or 'REAL' in declared_type or 'DOUBLE' in declared_type:
+        return pa.float64()
+    return pa.string()
+
+
+def _build_query(table, start=None, end=None, rounds=None):
+    """SQL with the date and round predicates pushed down into SQLite.
+
+    Only session_activity carries a timestamp for every session, so the date
+    range is applied to its last_seen and every row is joined to it.
+    """
+    if table == 'sessions':
+        sql = "SELECT a.* FROM session_activity a"
+    else:
+        sql = (f"SELECT t.*, a.first_seen AS session_first_seen, a.last_seen AS session_last_seen "
+               f"FROM {table} t JOIN session_activity a ON a.session_id = t.session_id")
+
+    conditions, params = [], []
+    if start:
+        conditions.append("a.last_seen >= ?")
+        params.append(start)
+    if end:
+        conditions.append("a.last_seen < ?")
+        params.append(end)
+    if rounds:
+        placeholders = ','.join('?' * len(rounds))
+        if EXPORT_TABLES[table]:
+            conditions.append(f"t.round_type IN ({placeholders})")
+        else:
+            # Session-level tables: keep sessions that took part in any of the rounds
+            conditions.append(f"a.session_id IN (SELECT session_id FROM round_summary WHERE round_type IN ({placeholders}) "
+                              f"UNION SELECT session_id FROM speech_round_summary WHERE round_type IN ({placeholders}))")
+            params.extend(rounds)
+        params.extend(rounds)
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY a.session_id" if table == 'sessions' else " ORDER BY t.session_id, t.id"
+    return sql, params
+
+
+def _schema(conn, table):
+    import pyarrow as pa
+
+    source = 'session_activity' if table == 'sessions' else table
+    fields = [pa.field(name, _arrow_type(name, declared)) for _, name, declared, *_ in
+              conn.execute(f"PRAGMA table_info({source})").fetchall()]
+    if table != 'sessions':
+        fields += [pa.field('session_first_seen', pa.string()), pa.field('session_last_seen', pa.string())]
+    return pa.schema(fields)
+
+
+def iter_record_batches(table, start=None, end=None, rounds=None, chunk_size=50000):
+    """Yield the Arrow schema, then RecordBatches of at most chunk_size rows.
+
+    Rows are pulled from a cursor with fetchmany, so memory stays bounded by
+    the chunk size no matter how many rows match. The scan runs on its own
+    read-only connection, not a pooled reader, because a streamed download
+    keeps it open for as long as the client takes.
+    """
+    import pyarrow as pa
+
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Unknown export table: {table}")
+
+    storage = get_storage()
+    storage.flush()
+    with storage.dedicated_reader() as conn:
+        sql, params = _build_query(table, start, end, rounds)
+        schema = _schema(conn, table)
+        yield schema
+
+        cursor = conn.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            columns = list(zip(*rows))
+            arrays = []
+            for field, values in zip(schema, columns):
+                if pa.types.is_string(field.type):
+                    values = [None if value is None else str(value) for value in values]
+                arrays.append(pa.array(values, type=field.type))
+            yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _open_writer(sink, schema, fmt):
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.ParquetWriter(sink, schema, compression='zstd')
+    import pyarrow as pa
+    if isinstance(sink, str):
+        return pa.ipc.new_file(sink, schema)
+    return pa.ipc.new_stream(sink, schema)
+
+
+def _write_batch(writer, batch, fmt):
+    if fmt == 'parquet':
+        import pyarrow as pa
+        writer.write_table(pa.Table.from_batches([batch]))
+    else:
+        writer.write_batch(batch)
+
+
+def export_table(table, path, fmt='parquet', start=None, end=None, rounds=None, chunk_size=50000):
+    """Write one table to a Parquet or Arrow file; returns the row count"""
+    batches = iter_record_batches(table, start, end, rounds, chunk_size)
+    schema = next(batches)
+    rows = 0
+    writer = _open_writer(path, schema, fmt)
+    try:
+        for batch in batches:
+            _write_batch(writer, batch, fmt)
+            rows += batch.num_rows
+    finally:
+        writer.close()
+    return rows
+
+
+def export_results(output_dir, fmt='parquet', start=None, end=None, rounds=None, chunk_size=50000, tables=None):
+    """Export every result table into output_dir, one file per table"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    os.makedirs(output_dir, exist_ok=True)
+    counts = {}
+    for table in tables or EXPORT_TABLES:
+        path = os.path.join(output_dir, f"{table}{FORMATS[fmt]}")
+        counts[table] = export_table(table, path, fmt, start, end, rounds, chunk_size)
+        logger.info(f"Exported {counts[table]} rows from {table} to {path}")
+    return counts
+
+
+def stream_table(table, fmt='arrow', start=None, end=None, rounds=None, chunk_size=50000):
+    """Yield the encoded export of a table chunk by chunk, for HTTP streaming.
+
+    Arrow uses the IPC stream format; Parquet row groups are flushed as they
+    are written, so only one chunk is held in memory at a time.
+    """
+    batches = iter_record_batches(table, start, end, rounds, chunk_size)
+    schema = next(batches)
+    sink = io.BytesIO()
+    writer = _open_writer(sink, schema, fmt)
+
+    def drain():
+        data = sink.getvalue()
+        sink.seek(0)
+        sink.truncate()
+        return data
+
+    for batch in batches:
+        _write_batch(writer, batch, fmt)
+        data = drain()
+        if data:
+            yield data
+    writer.close()
+    yield drain()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk export interview results to Parquet or Arrow")
+    parser.add_argument('--out', default='exports', help="Output directory")
+    parser.add_argument('--format', choices=sorted(FORMATS), default='parquet')
+    parser.add_argument('--start', help="Only sessions last active on or after this date (YYYY-MM-DD)")
+    parser.add_argument('--end', help="Only sessions last active before this date (YYYY-MM-DD)")
+    parser.add_argument('--round', dest='rounds', action='append', help="Round type to include (repeatable)")
+    parser.add_argument('--table', dest='tables', action='append', choices=sorted(EXPORT_TABLES))
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    counts = export_results(args.out, args.format, args.start, args.end, args.rounds,
+                            args.chunk_size, args.tables)
+    for table, rows in counts.items():
+        print(f"{table}: {rows} rows")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
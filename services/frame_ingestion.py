@@ -0,0 +1,126 @@
+import base64
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+def decode_frame(frame_data):
+    """Decode a base64 JPEG (optionally a data URL) into a BGR numpy image"""
+    # Imported here so app.py can import this module without pulling in cv2
+    import cv2
+    import numpy as np
+
+    if isinstance(frame_data, str):
+        if frame_data.startswith('data:'):
+            frame_data = frame_data.split(',', 1)[1]
+        frame_bytes = base64.b64decode(frame_data)
+    else:
+        frame_bytes = bytes(frame_data)
+
+    frame = cv2.imdecode(np.frombuffer(frame_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        raise ValueError("Could not decode frame")
+    return frame
+
+
+class FrameIngestionPipeline:
+    """Bounded, per-session frame queue feeding a shared analysis worker pool.
+
+    The Socket.IO handler only appends the raw payload and returns. Each
+    session keeps at most ``queue_size`` pending frames (older ones are
+    dropped) and has at most one frame in analysis at a time, so slow
+    inference never accumulates frames in memory or starves other sessions.
+    """
+
+    def __init__(self, analyze_fn, emit_fn, max_workers=2, queue_size=1,
+                 max_frame_age=2.0, max_frame_bytes=2 * 1024 * 1024):
+        self.analyze_fn = analyze_fn
+        self.emit_fn = emit_fn
+        self.queue_size = queue_size
+        self.max_frame_age = max_frame_age
+        self.max_frame_bytes = max_frame_bytes
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='frame-worker')
+        self._queues = {}
+        self._scheduled = set()
+        self._lock = threading.Lock()
+        self.stats = {'received': 0, 'dropped': 0, 'rejected': 0, 'processed': 0, 'failed': 0}
+
+    def submit(self, session_id, frame_data, sid=None):
+        """Queue a frame for analysis; never blocks on inference"""
+        if frame_data is None or len(frame_data) > self.max_frame_bytes:
+            with self._lock:
+                self.stats['rejected'] += 1
+            return False
+
+        with self._lock:
+            self.stats['received'] += 1
+            pending = self._queues.get(session_id)
+            if pending is None:
+                pending = deque()
+                self._queues[session_id] = pending
+            if len(pending) >= self.queue_size:
+                pending.popleft()
+                self.stats['dropped'] += 1
+            pending.append((frame_data, sid, time.monotonic()))
+
+            if session_id in self._scheduled:
+                return True
+            self._scheduled.add(session_id)
+
+        self.executor.submit(self._process_next, session_id)
+        return True
+
+    def _process_next(self, session_id):
+        with self._lock:
+            pending = self._queues.get(session_id)
+            item = pending.popleft() if pending else None
+            if item is None:
+                self._scheduled.discard(session_id)
+                return
+
+        frame_data, sid, received_at = item
+        try:
+            if time.monotonic() - received_at > self.max_frame_age:
+                with self._lock:
+                    self.stats['dropped'] += 1
+            else:
+                frame = decode_frame(frame_data)
+                incidents = self.analyze_fn(session_id, frame)
+                with self._lock:
+                    self.stats['processed'] += 1
+                if incidents:
+                    self.emit_fn(sid, incidents)
+        except Exception as e:
+            with self._lock:
+                self.stats['failed'] += 1
+            logger.error(f"Error analyzing frame for session {session_id}: {str(e)}")
+        finally:
+            # Reschedule rather than loop so other sessions get a fair share of workers
+            with self._lock:
+                pending = self._queues.get(session_id)
+                has_more = bool(pending)
+                if not has_more:
+                    self._scheduled.discard(session_id)
+            if has_more:
+                self.executor.submit(self._process_next, session_id)
+
+    def close_session(self, session_id):
+        """Drop any pending frames for a session"""
+        with self._lock:
+            pending = self._queues.pop(session_id, None)
+            if pending:
+                self.stats['dropped'] += len(pending)
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['active_sessions'] = len(self._queues)
+            stats['pending_frames'] = sum(len(q) for q in self._queues.values())
+        return stats
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
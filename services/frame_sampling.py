@@ -0,0 +1,83 @@
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """Cheap scene-change detector used in front of the heavier proctoring models.
+
+    Frames are reduced to a tiny grayscale thumbnail and compared with the
+    thumbnail from the last frame that was let through. A frame passes when
+    the mean absolute difference exceeds ``threshold`` (0-255 scale), or when
+    ``max_static_seconds`` have passed since the last pass so slow changes
+    are never missed entirely.
+    """
+
+    def __init__(self, threshold=6.0, strong_threshold=25.0, max_static_seconds=2.0, size=(32, 24)):
+        self.threshold = threshold
+        self.strong_threshold = strong_threshold
+        self.max_static_seconds = max_static_seconds
+        self.size = size
+        self._reference = None
+        self._last_pass = 0.0
+        self.last_score = 0.0
+
+    def _thumbnail(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        return cv2.resize(gray, self.size, interpolation=cv2.INTER_AREA).astype(np.int16)
+
+    def check(self, frame, now=None):
+        """Return (changed, strong) for the frame"""
+        now = time.monotonic() if now is None else now
+        thumbnail = self._thumbnail(frame)
+
+        if self._reference is None:
+            self._reference = thumbnail
+            self._last_pass = now
+            self.last_score = 255.0
+            return True, True
+
+        self.last_score = float(np.mean(np.abs(thumbnail - self._reference)))
+        changed = self.last_score >= self.threshold or now - self._last_pass >= self.max_static_seconds
+        if changed:
+            self._reference = thumbnail
+            self._last_pass = now
+        return changed, self.last_score >= self.strong_threshold
+
+
+class AdaptiveSchedule:
+    """Run interval for an expensive check that tightens after suspicious signals.
+
+    The check normally runs every ``base_interval`` seconds. ``escalate``
+    switches to ``min_interval`` for ``escalation_seconds``, after which
+    the interval relaxes back to the base rate.
+    """
+
+    def __init__(self, base_interval=3.0, min_interval=0.5, escalation_seconds=10.0):
+        self.base_interval = base_interval
+        self.min_interval = min_interval
+        self.escalation_seconds = escalation_seconds
+        self._last_run = None
+        self._escalated_until = 0.0
+        self.last_reason = None
+
+    def interval(self, now=None):
+        now = time.monotonic() if now is None else now
+        return self.min_interval if now < self._escalated_until else self.base_interval
+
+    def is_escalated(self, now=None):
+        now = time.monotonic() if now is None else now
+        return now < self._escalated_until
+
+    def due(self, now=None):
+        now = time.monotonic() if now is None else now
+        return self._last_run is None or now - self._last_run >= self.interval(now)
+
+    def mark_run(self, now=None):
+        self._last_run = time.monotonic() if now is None else now
+
+    def escalate(self, reason, now=None):
+        now = time.monotonic() if now is None else now
+        self._escalated_until = now + self.escalation_seconds
+        self.last_reason = reason
@@ -0,0 +1,125 @@
+import threading
+import time
+from datetime import datetime, timezone
+
+from services.storage import get_storage
+
+
+def _utc_timestamp(seconds):
+    # UTC, like CURRENT_TIMESTAMP, so intervals line up with the other tables
+    return datetime.fromtimestamp(seconds, timezone.utc).replace(tzinfo=None).isoformat(sep=' ')
+
+
+class IncidentInterval:
+    """A run of consecutive detections of one incident type"""
+
+    __slots__ = ('incident_type', 'started_at', 'ended_at', 'peak_confidence',
+                 'confidence_sum', 'frame_count', 'details')
+
+    def __init__(self, incident_type, timestamp, confidence, details):
+        self.incident_type = incident_type
+        self.started_at = timestamp
+        self.ended_at = timestamp
+        self.peak_confidence = confidence
+        self.confidence_sum = confidence
+        self.frame_count = 1
+        self.details = details
+
+    def extend(self, timestamp, confidence):
+        self.ended_at = timestamp
+        self.peak_confidence = max(self.peak_confidence, confidence)
+        self.confidence_sum += confidence
+        self.frame_count += 1
+
+    @property
+    def mean_confidence(self):
+        return self.confidence_sum / self.frame_count
+
+    @property
+    def duration(self):
+        return self.ended_at - self.started_at
+
+
+class IncidentAggregator:
+    """Merges per-frame proctoring detections into intervals for one session.
+
+    Detections of the same type less than ``gap_seconds`` apart extend the
+    open interval; a longer gap closes it. Closed intervals are written in
+    batches, when ``flush_size`` are pending or ``flush_interval`` seconds
+    have passed, instead of one row per frame.
+    """
+
+    def __init__(self, session_id, gap_seconds=3.0,
+                 flush_interval=10.0, flush_size=20):
+        self.session_id = session_id
+        self.gap_seconds = gap_seconds
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._open = {}
+        self._pending = []
+        self._last_flush = time.time()
+        self._lock = threading.Lock()
+        self.interval_count = 0
+
+    def record(self, incident_type, confidence, details, timestamp=None):
+        """Add one detection; returns True when it started a new interval"""
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            self._close_stale(timestamp)
+            interval = self._open.get(incident_type)
+            started = interval is None
+            if started:
+                self._open[incident_type] = IncidentInterval(incident_type, timestamp, confidence, details)
+                self.interval_count += 1
+            else:
+                interval.extend(timestamp, confidence)
+
+            should_flush = (len(self._pending) >= self.flush_size or
+                            timestamp - self._last_flush >= self.flush_interval)
+        if should_flush:
+            self.flush()
+        return started
+
+    def _close_stale(self, now):
+        for incident_type, interval in list(self._open.items()):
+            if now - interval.ended_at > self.gap_seconds:
+                self._pending.append(self._open.pop(incident_type))
+
+    def flush(self, close_open=False):
+        """Queue closed intervals for the database writer as one batch"""
+        with self._lock:
+            now = time.time()
+            if close_open:
+                self._pending.extend(self._open.values())
+                self._open.clear()
+            else:
+                self._close_stale(now)
+            batch, self._pending = self._pending, []
+            self._last_flush = now
+        if not batch:
+            return 0
+
+        get_storage().executemany_write("""
+            INSERT INTO proctoring_incident_intervals
+            (session_id, incident_type, started_at, ended_at, peak_confidence,
+             mean_confidence, frame_count, details)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, [(
+            self.session_id,
+            interval.incident_type,
+            _utc_timestamp(interval.started_at),
+            _utc_timestamp(interval.ended_at),
+            interval.peak_confidence,
+            interval.mean_confidence,
+            interval.frame_count,
+            interval.details
+        ) for interval in batch])
+        return len(batch)
+
+    def in_memory_intervals(self):
+        """Intervals not yet written to the database"""
+        with self._lock:
+            return list(self._pending) + list(self._open.values())
+
+    def close(self):
+        self.flush(close_open=True)
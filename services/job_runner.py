@@ -0,0 +1,157 @@
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation has been requested"""
+
+
+class JobQueueFull(Exception):
+    """Raised by submit when the runner already holds max_pending jobs"""
+
+
+class Job:
+    def __init__(self, kind, owner):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.owner = owner
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+        self._future = None
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        """Call at safe points in the job body to honour cancellation"""
+        if self._cancel.is_set():
+            raise JobCancelled(f"Job {self.id} was cancelled")
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+class JobRunner:
+    """Runs background jobs on a bounded worker pool.
+
+    Each job gets an id and a status that moves queued -> running ->
+    succeeded/failed/cancelled. The job function is called as
+    ``fn(job, *args, **kwargs)``; cancelling a queued job removes it, and a
+    running job stops at its next ``job.check_cancelled()``. At most
+    ``max_pending`` jobs may be queued or running. Finished jobs are kept
+    for ``retention`` seconds so their status can still be read.
+    """
+
+    def __init__(self, max_workers=4, max_pending=100, retention=3600.0, name='jobs'):
+        self.max_pending = max_pending
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind, fn, *args, owner=None, **kwargs):
+        job = Job(kind, owner)
+        with self._lock:
+            self._prune()
+            pending = sum(1 for existing in self._jobs.values() if existing.status not in FINISHED_STATES)
+            if pending >= self.max_pending:
+                raise JobQueueFull(f"{pending} jobs already pending")
+            self._jobs[job.id] = job
+        job._future = self._executor.submit(self._run, job, fn, args, kwargs)
+        logger.info(f"Queued {kind} job {job.id}")
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        if job.cancel_requested:
+            job.status, job.finished_at = CANCELLED, time.time()
+            return None
+        job.status, job.started_at = RUNNING, time.time()
+        try:
+            job.result = fn(job, *args, **kwargs)
+            job.status = SUCCEEDED
+        except JobCancelled:
+            job.status = CANCELLED
+        except Exception as e:
+            logger.error(f"{job.kind} job {job.id} failed: {str(e)}")
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+        return job.result
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def find(self, owner, kind=None, active_only=True):
+        """Most recent job for an owner (optionally of a kind), or None"""
+        with self._lock:
+            jobs = [job for job in self._jobs.values()
+                    if job.owner == owner and (kind is None or job.kind == kind)
+                    and (not active_only or job.status not in FINISHED_STATES)]
+        return max(jobs, key=lambda job: job.created_at) if jobs else None
+
+    def cancel(self, job_id):
+        """Request cancellation; returns False if the job is unknown or finished"""
+        job = self.get(job_id)
+        if job is None or job.status in FINISHED_STATES:
+            return False
+        job._cancel.set()
+        if job._future is not None and job._future.cancel():
+            job.status, job.finished_at = CANCELLED, time.time()
+        return True
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.status in FINISHED_STATES and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def get_stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_runner = None
+_runner_lock = threading.Lock()
+
+
+def get_job_runner(max_workers=4, max_pending=100):
+    """Return the process-wide job runner"""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = JobRunner(max_workers, max_pending)
+    return _runner
@@ -0,0 +1,338 @@
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from services.llm_scheduler import PRIORITY_NAMES, QueueTimeout, current_llm_context, get_llm_scheduler
+from services.llm_usage import get_llm_usage
+
+logger = logging.getLogger(__name__)
+
+
+class LLMError(Exception):
+    """An LLM call failed after its retries"""
+
+
+class LLMTimeout(LLMError):
+    """No good response arrived before the call's deadline"""
+
+
+class CircuitOpenError(LLMError):
+    """The circuit breaker is open; callers should use their fallback path"""
+
+
+class LatencyTracker:
+    """Recent successful call latencies, for the hedging threshold"""
+
+    def __init__(self, size=256):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q, min_samples=20):
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitBreaker:
+    """Error-rate circuit breaker over a sliding time window.
+
+    The breaker opens when at least ``min_calls`` outcomes in the last
+    ``window`` seconds include an error fraction of ``error_rate`` or more.
+    After ``cooldown`` seconds it lets a single probe through (half-open);
+    the probe's outcome closes or re-opens it.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, error_rate=0.5, window=30.0, min_calls=10, cooldown=30.0):
+        self.error_rate = error_rate
+        self.window = window
+        self.min_calls = min_calls
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self._outcomes = deque()  # (monotonic time, ok)
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record(self, ok):
+        now = time.monotonic()
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probing = False
+                if ok:
+                    self.state = self.CLOSED
+                    self._outcomes.clear()
+                    logger.info("LLM circuit closed")
+                else:
+                    self._open(now)
+                return
+            self._outcomes.append((now, ok))
+            while self._outcomes and self._outcomes[0][0] < now - self.window:
+                self._outcomes.popleft()
+            errors = sum(1 for _, outcome in self._outcomes if not outcome)
+            if (self.state == self.CLOSED and len(self._outcomes) >= self.min_calls
+                    and errors / len(self._outcomes) >= self.error_rate):
+                self._open(now)
+
+    def _open(self, now):
+        self.state = self.OPEN
+        self._opened_at = now
+        logger.warning(f"LLM circuit opened for {self.cooldown}s")
+
+
+class _Call:
+    """One logical generate() call, shared by its attempts and hedges"""
+    __slots__ = ('model', 'prompt', 'until', 'priority', 'session', 'label', 'generation_config')
+
+    def __init__(self, model, prompt, until, priority, session, label, generation_config):
+        self.model = model
+        self.prompt = prompt
+        self.until = until
+        self.priority = priority
+        self.session = session
+        self.label = label
+        self.generation_config = generation_config
+
+
+class LLMClient:
+    """Gemini calls with deadlines, jittered retries, hedging and circuit breaking.
+
+    ``generate`` spends at most ``deadline`` seconds. Each attempt sends a
+    request; if it has not answered by the recent p95 latency, a hedged
+    duplicate is sent and the first good response wins. A failed attempt is
+    retried after a full-jitter exponential backoff while the deadline
+    allows. When errors spike the breaker opens and calls fail fast with
+    CircuitOpenError, so callers take their fallback path right away.
+
+    Every request first takes a slot from the scheduler at the call's
+    priority; hedges only use a slot that is free at once. Token counts and
+    latency of every request are recorded under the call's label.
+
+    Calls may name a model; latency percentiles and breakers are kept per
+    model, so a slow or failing tier does not affect the others.
+    """
+
+    def __init__(self, model_factory=None, default_model=None, deadline=30.0, max_attempts=3,
+                 hedge_quantile=0.95, hedge_delay=None, backoff_base=0.5, backoff_cap=4.0, max_workers=32,
+                 breaker_factory=CircuitBreaker, scheduler=None, usage=None):
+        self._model_factory = model_factory  # model name -> GenerativeModel
+        self.default_model = default_model
+        self._models = {}
+        self._latency = {}
+        self._breakers = {}
+        self._model_lock = threading.Lock()
+        self.breaker_factory = breaker_factory
+        self.deadline = deadline
+        self.max_attempts = max_attempts
+        self.hedge_quantile = hedge_quantile
+        self.hedge_delay = hedge_delay  # used until enough latencies are recorded
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.scheduler = scheduler or get_llm_scheduler()
+        self.usage = usage or get_llm_usage()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='llm')
+        self._stats_lock = threading.Lock()
+        self.stats = {'calls': 0, 'requests': 0, 'hedges': 0, 'hedge_wins': 0,
+                      'retries': 0, 'failures': 0, 'rejected': 0}
+
+    def _get_model(self, name):
+        with self._model_lock:
+            if self._model_factory is None:
+                from components.model_configuration import model_config
+                self._model_factory = model_config
+            model = self._models.get(name)
+            if model is None:
+                model = self._models[name] = self._model_factory(name)
+                self._latency[name] = LatencyTracker()
+                self._breakers[name] = self.breaker_factory()
+            return model
+
+    def _resolve(self, model):
+        if model is not None:
+            return model
+        if self.default_model is None:
+            from components.model_configuration import DEFAULT_MODEL
+            self.default_model = DEFAULT_MODEL
+        return self.default_model
+
+    def breaker(self, model=None):
+        model = self._resolve(model)
+        self._get_model(model)
+        return self._breakers[model]
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def _request(self, call, ticket, hedge):
+        self._count('requests')
+        started = time.monotonic()
+        response = None
+        try:
+            response = self._get_model(call.model).generate_content(
+                call.prompt, generation_config=call.generation_config,
+                request_options={'timeout': max(call.until - started, 1.0)})
+            text = response.text
+            if not text or not text.strip():
+                raise LLMError("Empty response")
+        except Exception:
+            self._breakers[call.model].record(False)
+            self._record_usage(call, response, time.monotonic() - started, False, hedge)
+            raise
+        finally:
+            self.scheduler.release(ticket)
+        latency = time.monotonic() - started
+        self._breakers[call.model].record(True)
+        self._latency[call.model].record(latency)
+        self._record_usage(call, response, latency, True, hedge)
+        return text
+
+    def _record_usage(self, call, response, latency, ok, hedge):
+        self.usage.record(call.label, call.model, PRIORITY_NAMES.get(call.priority), call.session,
+                          getattr(response, 'usage_metadata', None), latency, ok, hedge)
+
+    def _hedge_after(self, model):
+        threshold = self._latency[model].quantile(self.hedge_quantile)
+        return threshold if threshold is not None else self.hedge_delay
+
+    def _submit(self, call, hedge):
+        self._get_model(call.model)
+        # A hedge only takes a slot that is free right now
+        ticket = self.scheduler.acquire(call.model, call.priority, call.session,
+                                        timeout=0 if hedge else call.until - time.monotonic())
+        try:
+            return self._executor.submit(self._request, call, ticket, hedge)
+        except BaseException:
+            self.scheduler.release(ticket)
+            raise
+
+    def _attempt(self, call, hedge):
+        """One attempt: a request plus at most one hedge; returns text or raises the last error"""
+        until = call.until
+        primary = self._submit(call, False)
+        in_flight = {primary}
+        hedge_after = self._hedge_after(call.model) if hedge else None
+        last_error = None
+        while in_flight:
+            remaining = until - time.monotonic()
+            if remaining <= 0:
+                break
+            timeout = min(remaining, hedge_after) if hedge_after is not None else remaining
+            done, in_flight = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is not primary:
+                        self._count('hedge_wins')
+                    return future.result()
+                last_error = future.exception()
+            if not done and hedge_after is not None:
+                # Slower than p95: race a duplicate and take whichever answers first
+                hedge_after = None
+                if self._breakers[call.model].state == CircuitBreaker.CLOSED:
+                    try:
+                        in_flight.add(self._submit(call, True))
+                        self._count('hedges')
+                    except QueueTimeout:
+                        pass  # no spare capacity; a hedge must not queue behind real work
+        if in_flight or last_error is None:
+            raise LLMTimeout("LLM call exceeded its deadline")
+        raise last_error
+
+    def generate(self, prompt, deadline=None, hedge=True, priority=None, session=None,
+                 generation_config=None, label='unlabelled', model=None):
+        """Return the response text for prompt within deadline seconds
+
+        ``priority`` and ``session`` default to the enclosing llm_context.
+        ``generation_config`` is passed through to generate_content, e.g.
+        to request schema-constrained JSON. ``label`` names the caller
+        (e.g. 'generate_aptitude') in the usage accounting. ``model``
+        defaults to the client's default model.
+        """
+        self._count('calls')
+        context_priority, context_session = current_llm_context()
+        breaker = self.breaker(model)
+        call = _Call(self._resolve(model), prompt, time.monotonic() + (deadline or self.deadline),
+                     context_priority if priority is None else priority,
+                     context_session if session is None else session,
+                     label, generation_config)
+        until = call.until
+        last_error = None
+        for attempt in range(self.max_attempts):
+            if not breaker.allow():
+                self._count('rejected')
+                raise CircuitOpenError(f"LLM circuit for {call.model} is open")
+            try:
+                return self._attempt(call, hedge)
+            except LLMTimeout:
+                self._count('failures')
+                raise
+            except QueueTimeout as e:
+                self._count('failures')
+                raise LLMTimeout(str(e))
+            except Exception as e:
+                last_error = e
+                logger.warning(f"LLM attempt {attempt + 1}/{self.max_attempts} failed: {str(e)}")
+            backoff = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+            if attempt + 1 >= self.max_attempts or time.monotonic() + backoff >= until:
+                break
+            self._count('retries')
+            time.sleep(backoff)
+        self._count('failures')
+        raise LLMError(f"LLM call failed: {str(last_error)}")
+
+    def get_stats(self):
+        with self._stats_lock:
+            stats = dict(self.stats)
+        with self._model_lock:
+            models = list(self._models)
+        stats['models'] = {model: {'breaker': self._breakers[model].state,
+                                   'hedge_after': self._hedge_after(model)} for model in models}
+        stats['scheduler'] = self.scheduler.get_stats()
+        stats['usage'] = self.usage.summary()
+        return stats
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client():
+    """Return the process-wide LLM client"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient(
+                deadline=float(os.getenv('NEUROPREP_LLM_DEADLINE', '30')),
+                max_attempts=int(os.getenv('NEUROPREP_LLM_MAX_ATTEMPTS', '3')),
+                hedge_quantile=float(os.getenv('NEUROPREP_LLM_HEDGE_QUANTILE', '0.95')),
+                hedge_delay=float(os.getenv('NEUROPREP_LLM_HEDGE_DELAY', '5')),
+                breaker_factory=lambda: CircuitBreaker(
+                    error_rate=float(os.getenv('NEUROPREP_LLM_BREAKER_ERROR_RATE', '0.5')),
+                    window=float(os.getenv('NEUROPREP_LLM_BREAKER_WINDOW', '30')),
+                    cooldown=float(os.getenv('NEUROPREP_LLM_BREAKER_COOLDOWN', '30'))
+                )
+            )
+    return _client
@@ -0,0 +1,226 @@
+import contextlib
+import contextvars
+import itertools
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, most urgent first
+INTERACTIVE = 0  # grading a candidate's answer while they wait
+REFILL = 1  # generating questions for a candidate who is about to start
+BACKGROUND = 2  # late upgrades and anything nobody is waiting on
+PRIORITY_NAMES = {INTERACTIVE: 'interactive', REFILL: 'refill', BACKGROUND: 'background'}
+
+_context = contextvars.ContextVar('llm_context', default=(BACKGROUND, None))
+
+
+@contextlib.contextmanager
+def llm_context(priority, session=None):
+    """Tag LLM calls made inside the block (and in stages it starts) with a priority and session"""
+    token = _context.set((priority, session))
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def current_llm_context():
+    return _context.get()
+
+
+class QueueTimeout(Exception):
+    """No slot was granted before the caller's deadline"""
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate  # tokens per second
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now):
+        """Seconds until a token is available (0 if one is)"""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class _Ticket:
+    __slots__ = ('id', 'model', 'priority', 'session', 'enqueued_at')
+
+    def __init__(self, ticket_id, model, priority, session):
+        self.id = ticket_id
+        self.model = model
+        self.priority = priority
+        self.session = session
+        self.enqueued_at = time.monotonic()
+
+
+class _ModelState:
+    def __init__(self, rate, burst):
+        self.bucket = TokenBucket(rate, burst)
+        self.in_flight = 0
+        # priority -> session -> waiting tickets; session order is the round-robin order
+        self.queues = {priority: OrderedDict() for priority in PRIORITY_NAMES}
+
+    def head(self):
+        """The ticket that should be granted next: highest priority, then next session in turn"""
+        for priority in sorted(self.queues):
+            for tickets in self.queues[priority].values():
+                return tickets[0]
+        return None
+
+    def depth(self):
+        return {PRIORITY_NAMES[priority]: sum(len(tickets) for tickets in sessions.values())
+                for priority, sessions in self.queues.items()}
+
+
+class LLMScheduler:
+    """Process-wide admission control for LLM requests.
+
+    Every request takes a slot from its model's token bucket (``rate``
+    requests per minute with ``burst`` headroom) and counts against
+    ``max_in_flight``. Waiting requests are served strictly by priority
+    class; within a class, sessions take turns, so one candidate's burst
+    of generation calls cannot crowd out another's.
+    """
+
+    def __init__(self, rates=None, default_rpm=60.0, burst=None, max_in_flight=16):
+        self.rates = dict(rates or {})  # model -> requests per minute
+        self.default_rpm = default_rpm
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self._models = {}
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+        self._waits = {priority: deque(maxlen=512) for priority in PRIORITY_NAMES}
+        self._granted = {priority: 0 for priority in PRIORITY_NAMES}
+        self._timeouts = {priority: 0 for priority in PRIORITY_NAMES}
+
+    def _model(self, model):
+        state = self._models.get(model)
+        if state is None:
+            rpm = self.rates.get(model, self.default_rpm)
+            burst = self.burst if self.burst is not None else max(1, int(rpm // 6))
+            state = self._models[model] = _ModelState(rpm / 60.0, burst)
+        return state
+
+    def _dequeue(self, state, ticket):
+        sessions = state.queues[ticket.priority]
+        tickets = sessions.get(ticket.session)
+        if tickets is None:
+            return
+        try:
+            tickets.remove(ticket)
+        except ValueError:
+            return
+        del sessions[ticket.session]
+        if tickets:
+            sessions[ticket.session] = tickets  # re-append: this session goes to the back
+
+    def acquire(self, model, priority=BACKGROUND, session=None, timeout=None):
+        """Block until a slot is granted; returns a ticket to pass to release.
+
+        ``timeout=0`` only succeeds if the model is idle enough to grant at
+        once without overtaking anyone, which suits speculative requests.
+        """
+        until = None if timeout is None else time.monotonic() + max(timeout, 0)
+        with self._cond:
+            state = self._model(model)
+            ticket = _Ticket(next(self._ids), model, priority, session)
+            state.queues[priority].setdefault(session, deque()).append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = None
+                    if state.head() is ticket and state.in_flight < self.max_in_flight:
+                        wait = state.bucket.wait_time(now)
+                        if wait == 0:
+                            state.bucket.take()
+                            state.in_flight += 1
+                            self._dequeue(state, ticket)
+                            self._granted[priority] += 1
+                            self._waits[priority].append(now - ticket.enqueued_at)
+                            self._cond.notify_all()
+                            return ticket
+                    if until is not None and now >= until:
+                        self._timeouts[priority] += 1
+                        raise QueueTimeout(f"No {model} slot within {timeout:.1f}s")
+                    limit = [w for w in (wait, None if until is None else until - now) if w is not None]
+                    self._cond.wait(timeout=min(limit) if limit else None)
+            except BaseException:
+                self._dequeue(state, ticket)
+                self._cond.notify_all()
+                raise
+
+    def release(self, ticket):
+        with self._cond:
+            self._models[ticket.model].in_flight -= 1
+            self._cond.notify_all()
+
+    @contextlib.contextmanager
+    def slot(self, model, priority=BACKGROUND, session=None, timeout=None):
+        ticket = self.acquire(model, priority, session, timeout)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def get_stats(self):
+        with self._cond:
+            models = {}
+            for model, state in self._models.items():
+                state.bucket.wait_time(time.monotonic())
+                models[model] = {
+                    'queued': state.depth(),
+                    'in_flight': state.in_flight,
+                    'tokens': round(state.bucket.tokens, 2),
+                    'sessions_waiting': len({session for sessions in state.queues.values() for session in sessions})
+                }
+            classes = {}
+            for priority, name in PRIORITY_NAMES.items():
+                waits = sorted(self._waits[priority])
+                classes[name] = {
+                    'granted': self._granted[priority],
+                    'timeouts': self._timeouts[priority],
+                    'wait_p50_ms': round(waits[len(waits) // 2] * 1000, 1) if waits else None,
+                    'wait_p95_ms': round(waits[min(len(waits) - 1, int(0.95 * len(waits)))] * 1000, 1) if waits else None
+                }
+        return {'models': models, 'classes': classes, 'max_in_flight': self.max_in_flight}
+
+
+def _parse_rates(value):
+    """'gemini-2.0-flash=60,gemini-1.5-pro=5' -> {model: requests per minute}"""
+    rates = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        model, _, rpm = item.partition('=')
+        rates[model.strip()] = float(rpm)
+    return rates
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_llm_scheduler():
+    """Return the process-wide LLM scheduler"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler(
+                rates=_parse_rates(os.getenv('NEUROPREP_LLM_RATE_LIMITS', '')),
+                default_rpm=float(os.getenv('NEUROPREP_LLM_RPM', '60')),
+                max_in_flight=int(os.getenv('NEUROPREP_LLM_MAX_IN_FLIGHT', '16'))
+            )
+    return _scheduler
@@ -0,0 +1,76 @@
+import logging
+import threading
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class LLMUsage:
+    """Token and latency accounting for LLM requests.
+
+    Every request is written to the llm_calls table through the storage
+    writer queue, so recording never blocks on the database, and folded
+    into in-memory per-label totals for the stats endpoint.
+    """
+
+    def __init__(self, latency_samples=256):
+        self.latency_samples = latency_samples
+        self._labels = {}
+        self._lock = threading.Lock()
+
+    def record(self, label, model, priority, session, usage, latency, ok, hedge=False):
+        input_tokens = getattr(usage, 'prompt_token_count', None) if usage is not None else None
+        output_tokens = getattr(usage, 'candidates_token_count', None) if usage is not None else None
+        cached_tokens = getattr(usage, 'cached_content_token_count', None) if usage is not None else None
+
+        with self._lock:
+            totals = self._labels.get(label)
+            if totals is None:
+                totals = self._labels[label] = {
+                    'requests': 0, 'errors': 0, 'hedges': 0, 'input_tokens': 0,
+                    'output_tokens': 0, 'cached_tokens': 0, 'latencies': deque(maxlen=self.latency_samples)
+                }
+            totals['requests'] += 1
+            totals['errors'] += 0 if ok else 1
+            totals['hedges'] += 1 if hedge else 0
+            totals['input_tokens'] += input_tokens or 0
+            totals['output_tokens'] += output_tokens or 0
+            totals['cached_tokens'] += cached_tokens or 0
+            totals['latencies'].append(latency)
+
+        try:
+            from services.storage import get_storage
+            get_storage().execute_write("""
+                INSERT INTO llm_calls
+                (label, model, priority, session_id, input_tokens, output_tokens, cached_tokens,
+                 latency_ms, ok, hedge)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (label, model, priority, session, input_tokens, output_tokens, cached_tokens,
+                  round(latency * 1000, 1), int(ok), int(hedge)))
+        except Exception as e:
+            logger.error(f"Error recording LLM usage: {str(e)}")
+
+    def summary(self):
+        """Per-label totals since process start"""
+        with self._lock:
+            summary = {}
+            for label, totals in self._labels.items():
+                latencies = sorted(totals['latencies'])
+                summary[label] = {key: value for key, value in totals.items() if key != 'latencies'}
+                summary[label]['latency_p50_ms'] = round(latencies[len(latencies) // 2] * 1000, 1)
+                summary[label]['latency_p95_ms'] = round(
+                    latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] * 1000, 1)
+        return summary
+
+
+_usage = None
+_usage_lock = threading.Lock()
+
+
+def get_llm_usage():
+    """Return the process-wide LLM usage recorder"""
+    global _usage
+    with _usage_lock:
+        if _usage is None:
+            _usage = LLMUsage()
+    return _usage
@@ -0,0 +1,264 @@
+import argparse
+import gzip
+import io
+import json
+import logging
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+
+from services.storage import BASE_DIR, get_storage
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = os.getenv('NEUROPREP_ARCHIVE_DIR', os.path.join(BASE_DIR, 'archive'))
+DEFAULT_RETENTION_DAYS = int(os.getenv('NEUROPREP_RETENTION_DAYS', '180'))
+
+# Every table holding per-session rows, in the order they are archived and deleted
+SESSION_TABLES = [
+    'question_responses',
+    'speech_metrics',
+    'proctoring_incidents',
+    'proctoring_incident_intervals',
+    'round_completions',
+    'round_summary',
+    'speech_round_summary',
+    'speech_emotion_counts',
+    'incident_summary',
+    'session_activity',
+    'cohort_samples',
+    'session_users'
+]
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def _archive_suffix():
+    return '.jsonl.zst' if zstandard is not None else '.jsonl.gz'
+
+
+def _append_records(path, records):
+    """Append JSONL records as a new compressed frame/member (both formats allow concatenation)"""
+    payload = ''.join(json.dumps(record, default=str) + '\n' for record in records).encode('utf-8')
+    with open(path, 'ab') as f:
+        if path.endswith('.zst'):
+            with zstandard.ZstdCompressor(level=10).stream_writer(f, closefd=False) as writer:
+                writer.write(payload)
+        else:
+            with gzip.GzipFile(fileobj=f, mode='ab', compresslevel=6) as writer:
+                writer.write(payload)
+
+
+def _iter_records(path):
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError(f"zstandard is required to read {path}")
+        raw = open(path, 'rb')
+        stream = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+    else:
+        raw = None
+        stream = gzip.open(path, 'rb')
+    try:
+        for line in io.TextIOWrapper(stream, encoding='utf-8'):
+            if line.strip():
+                yield json.loads(line)
+    finally:
+        stream.close()
+        if raw is not None:
+            raw.close()
+
+
+def _fetch_rows(storage, table, session_ids):
+    placeholders = ','.join('?' * len(session_ids))
+    with storage.reader() as conn:
+        cursor = conn.execute(f"SELECT * FROM {table} WHERE session_id IN ({placeholders})", session_ids)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def archive_old_sessions(retention_days=DEFAULT_RETENTION_DAYS, batch_size=100, dry_run=False,
+                         archive_dir=ARCHIVE_DIR):
+    """Move sessions idle for longer than the retention window into monthly archives.
+
+    Each batch is written to ``sessions-YYYY-MM`` files (by last activity),
+    recorded in archived_sessions and then deleted from the live tables.
+    Returns the number of sessions archived.
+    """
+    storage = get_storage()
+    cutoff = (datetime.utcnow() - timedelta(days=retention_days)).strftime('%Y-%m-%d %H:%M:%S')
+    if dry_run:
+        return storage.query_one("SELECT COUNT(*) FROM session_activity WHERE last_seen < ?",
+                                 (cutoff,), wait_for_writes=True)[0]
+
+    os.makedirs(archive_dir, exist_ok=True)
+    archived = 0
+
+    while True:
+        sessions = storage.query("""
+            SELECT session_id, last_seen FROM session_activity
+            WHERE last_seen < ?
+            ORDER BY last_seen
+            LIMIT ?
+        """, (cutoff, batch_size), wait_for_writes=True)
+        if not sessions:
+            break
+
+        session_ids = [session_id for session_id, _ in sessions]
+        rows_by_table = {table: _fetch_rows(storage, table, session_ids) for table in SESSION_TABLES}
+
+        by_month = {}
+        for session_id, last_seen in sessions:
+            month = str(last_seen)[:7]
+            by_month.setdefault(month, []).append({
+                'session_id': session_id,
+                'last_seen': last_seen,
+                'archived_at': datetime.utcnow().isoformat(),
+                'tables': {
+                    table: [row for row in rows if row['session_id'] == session_id]
+                    for table, rows in rows_by_table.items()
+                }
+            })
+
+        index_rows = []
+        for month, records in by_month.items():
+            path = os.path.join(archive_dir, f"sessions-{month}{_archive_suffix()}")
+            _append_records(path, records)
+            index_rows.extend((record['session_id'], os.path.basename(path), record['last_seen'])
+                              for record in records)
+
+        # Index first, then delete; a crash in between only leaves a duplicate archive record
+        storage.executemany_write("""
+            INSERT OR REPLACE INTO archived_sessions (session_id, archive_file, last_seen)
+            VALUES (?, ?, ?)
+        """, index_rows, wait=True)
+        placeholders = ','.join('?' * len(session_ids))
+        for table in SESSION_TABLES:
+            storage.execute_write(f"DELETE FROM {table} WHERE session_id IN ({placeholders})", session_ids)
+        storage.flush()
+
+        archived += len(session_ids)
+        logger.info(f"Archived {archived} sessions so far")
+
+    return archived
+
+
+def compact_database(max_pages=None):
+    """Reclaim free pages and truncate the WAL.
+
+    The first run switches the database to auto_vacuum=INCREMENTAL, which
+    needs one full VACUUM; later runs only release free pages.
+    """
+    storage = get_storage()
+    mode = storage.query_one("PRAGMA auto_vacuum", wait_for_writes=True)[0]
+    if mode != 2:
+        logger.info("Enabling incremental auto_vacuum (one-time full VACUUM)")
+        storage.executescript("PRAGMA auto_vacuum = INCREMENTAL; VACUUM;")
+    else:
+        pages = '' if max_pages is None else f"({int(max_pages)})"
+        storage.executescript(f"PRAGMA incremental_vacuum{pages};")
+    storage.executescript("PRAGMA wal_checkpoint(TRUNCATE);")
+    return storage.query_one("PRAGMA freelist_count")[0]
+
+
+def get_archived_session(session_id, archive_dir=ARCHIVE_DIR):
+    """Fetch an archived session record, or None if it was never archived"""
+    entry = get_storage().query_one(
+        "SELECT archive_file FROM archived_sessions WHERE session_id = ?", (session_id,))
+    if entry is None:
+        return None
+    found = None
+    for record in _iter_records(os.path.join(archive_dir, entry[0])):
+        if record['session_id'] == session_id:
+            found = record  # keep the last copy if a batch was retried
+    return found
+
+
+def get_session_record(session_id):
+    """Read-through lookup: live tables first, then the archive"""
+    storage = get_storage()
+    if storage.query_one("SELECT 1 FROM session_activity WHERE session_id = ?", (session_id,), wait_for_writes=True):
+        return {
+            'session_id': session_id,
+            'archived': False,
+            'tables': {table: _fetch_rows(storage, table, [session_id]) for table in SESSION_TABLES}
+        }
+    record = get_archived_session(session_id)
+    if record is not None:
+        record['archived'] = True
+    return record
+
+
+def run_maintenance(retention_days=DEFAULT_RETENTION_DAYS):
+    archived = archive_old_sessions(retention_days)
+    free_pages = compact_database()
+    logger.info(f"Maintenance done: {archived} sessions archived, {free_pages} free pages left")
+    return archived
+
+
+class MaintenanceScheduler:
+    """Runs archival and compaction periodically in a daemon thread"""
+
+    def __init__(self, interval_hours=24.0, retention_days=DEFAULT_RETENTION_DAYS):
+        self.interval = interval_hours * 3600
+        self.retention_days = retention_days
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name='db-maintenance', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                run_maintenance(self.retention_days)
+            except Exception as e:
+                logger.error(f"Scheduled maintenance failed: {str(e)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Retention, archival and compaction for interview.db")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    archive_parser = subparsers.add_parser('archive', help="Archive sessions older than the retention window")
+    archive_parser.add_argument('--retention-days', type=int, default=DEFAULT_RETENTION_DAYS)
+    archive_parser.add_argument('--batch-size', type=int, default=100)
+    archive_parser.add_argument('--dry-run', action='store_true')
+
+    vacuum_parser = subparsers.add_parser('vacuum', help="Run incremental VACUUM")
+    vacuum_parser.add_argument('--max-pages', type=int)
+
+    run_parser = subparsers.add_parser('run', help="Archive then vacuum")
+    run_parser.add_argument('--retention-days', type=int, default=DEFAULT_RETENTION_DAYS)
+
+    fetch_parser = subparsers.add_parser('fetch', help="Print a session record (live or archived)")
+    fetch_parser.add_argument('session_id')
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.command == 'archive':
+        count = archive_old_sessions(args.retention_days, args.batch_size, args.dry_run)
+        print(f"{'Would archive' if args.dry_run else 'Archived'} {count} sessions")
+    elif args.command == 'vacuum':
+        print(f"{compact_database(args.max_pages)} free pages left")
+    elif args.command == 'run':
+        run_maintenance(args.retention_days)
+    elif args.command == 'fetch':
+        record = get_session_record(args.session_id)
+        if record is None:
+            print(f"Session {args.session_id} not found")
+            return 1
+        print(json.dumps(record, indent=2, default=str))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,39 @@
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MIGRATIONS_DIR = os.path.join(BASE_DIR, 'database', 'migrations')
+
+_MIGRATION_FILE = re.compile(r'^(\d+)_.*\.sql$')
+
+
+def list_migrations(migrations_dir=MIGRATIONS_DIR):
+    """Return (version, path) pairs for the migration scripts, in order"""
+    migrations = []
+    for name in os.listdir(migrations_dir):
+        match = _MIGRATION_FILE.match(name)
+        if match:
+            migrations.append((int(match.group(1)), os.path.join(migrations_dir, name)))
+    return sorted(migrations)
+
+
+def apply_migrations(storage, migrations_dir=MIGRATIONS_DIR):
+    """Bring the database schema up to date.
+
+    The applied version is tracked in PRAGMA user_version; each newer script
+    runs in its own transaction together with the version bump.
+    """
+    current = storage.query_one("PRAGMA user_version", wait_for_writes=True)[0]
+    applied = []
+    for version, path in list_migrations(migrations_dir):
+        if version <= current:
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            script = f.read()
+        logger.info(f"Applying migration {os.path.basename(path)}")
+        storage.executescript(f"BEGIN;\n{script}\nPRAGMA user_version = {version};\nCOMMIT;")
+        applied.append(version)
+    return applied
@@ -0,0 +1,322 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import tempfile
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MANIFEST_PATH = os.path.join(BASE_DIR, 'models', 'manifest.json')
+STORE_DIR = os.getenv('NEUROPREP_MODEL_STORE', os.path.join(BASE_DIR, 'models', 'store'))
+
+# Marker written next to a fully verified artifact inside the store
+COMPLETE_MARKER = '.complete'
+# Hugging Face revisions must be full commit hashes; branch and tag names move
+_COMMIT_RE = re.compile(r'^[0-9a-f]{40}$')
+
+
+class ArtifactError(Exception):
+    """Raised when a model artifact is unknown, missing or fails verification."""
+
+
+def _sha256_file(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _tree_files(root):
+    """List files under root as sorted relative paths, ignoring the store marker."""
+    files = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            rel = os.path.relpath(os.path.join(dirpath, name), root)
+            if rel != COMPLETE_MARKER and not rel.startswith('.cache'):
+                files.append(rel.replace(os.sep, '/'))
+    return sorted(files)
+
+
+def _sha256_tree(root):
+    """Digest a directory as the hash of its (relative path, file hash) listing."""
+    digest = hashlib.sha256()
+    for rel in _tree_files(root):
+        digest.update(rel.encode('utf-8'))
+        digest.update(b'\0')
+        digest.update(_sha256_file(os.path.join(root, rel)).encode('ascii'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+class ArtifactManager:
+    """Content-addressed local cache for the model weights used by the services.
+
+    Artifacts are declared in ``models/manifest.json`` with their source and a
+    pinned sha256. ``prefetch`` downloads and verifies them into
+    ``models/store/<sha256>/``; ``resolve`` only ever reads from the store, so
+    loading a model never touches the network unless explicitly allowed.
+    """
+
+    def __init__(self, manifest_path=MANIFEST_PATH, store_dir=STORE_DIR):
+        self.manifest_path = manifest_path
+        self.store_dir = store_dir
+        self.allow_download = os.getenv('NEUROPREP_ALLOW_MODEL_DOWNLOAD', '0') == '1'
+        self._manifest = None
+
+    @property
+    def manifest(self):
+        if self._manifest is None:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self._manifest = json.load(f)
+        return self._manifest
+
+    def _entry(self, name):
+        entry = self.manifest.get(name)
+        if entry is None:
+            raise ArtifactError(f"Unknown model artifact: {name}")
+        return entry
+
+    def _is_pinned(self, entry):
+        if not entry.get('sha256'):
+            return False
+        return entry['kind'] != 'huggingface' or bool(_COMMIT_RE.match(entry.get('revision') or ''))
+
+    def _artifact_dir(self, sha256):
+        return os.path.join(self.store_dir, sha256)
+
+    def _artifact_path(self, entry, sha256):
+        if entry['kind'] == 'file':
+            return os.path.join(self._artifact_dir(sha256), entry['filename'])
+        return self._artifact_dir(sha256)
+
+    def resolve(self, name):
+        """Return the local path of a verified artifact.
+
+        Raises ArtifactError when the artifact has not been prefetched, unless
+        NEUROPREP_ALLOW_MODEL_DOWNLOAD=1 is set, in which case it is fetched now.
+        """
+        entry = self._entry(name)
+        sha256 = entry.get('sha256')
+        if self._is_pinned(entry) and self._is_complete(sha256):
+            return self._artifact_path(entry, sha256)
+
+        if not self._is_pinned(entry):
+            raise ArtifactError(
+                f"Model artifact '{name}' is not pinned in {self.manifest_path}. "
+                f"Run 'python -m services.model_artifacts prefetch --pin {name}' and commit the manifest."
+            )
+        if not self.allow_download:
+            raise ArtifactError(
+                f"Model artifact '{name}' is not in the local store. "
+                f"Run 'python -m services.model_artifacts prefetch {name}' first."
+            )
+        logger.warning(f"Model artifact '{name}' missing locally, downloading at runtime")
+        return self.prefetch(name)
+
+    def _is_complete(self, sha256):
+        return os.path.exists(os.path.join(self._artifact_dir(sha256), COMPLETE_MARKER))
+
+    def prefetch(self, name, pin=False):
+        """Download an artifact, verify its checksum and move it into the store.
+
+        With pin=True an unpinned manifest entry gets the computed digest
+        recorded, and a Hugging Face revision given as a branch or tag is
+        replaced by the commit it currently points to, so later loads are
+        verified against both.
+        """
+        entry = self._entry(name)
+        if entry['kind'] == 'huggingface' and not _COMMIT_RE.match(entry.get('revision') or ''):
+            if not pin:
+                raise ArtifactError(
+                    f"Model artifact '{name}' revision '{entry.get('revision')}' is not a commit hash; "
+                    f"re-run prefetch with --pin to record the commit"
+                )
+            from huggingface_hub import HfApi
+            entry['revision'] = HfApi().model_info(entry['repo_id'], revision=entry.get('revision')).sha
+            # A digest recorded for a floating revision does not describe this commit
+            entry['sha256'] = None
+            logger.info(f"{name}: pinned revision {entry['revision']}")
+        expected = entry.get('sha256')
+        if expected and self._is_complete(expected):
+            logger.info(f"{name}: already present ({expected[:12]})")
+            return self._artifact_path(entry, expected)
+
+        os.makedirs(self.store_dir, exist_ok=True)
+        staging = tempfile.mkdtemp(prefix=f'.{name}-', dir=self.store_dir)
+        try:
+            if entry['kind'] == 'file':
+                target = os.path.join(staging, entry['filename'])
+                logger.info(f"{name}: downloading {entry['url']}")
+                urllib.request.urlretrieve(entry['url'], target)
+                actual = _sha256_file(target)
+            elif entry['kind'] == 'huggingface':
+                from huggingface_hub import snapshot_download
+                logger.info(f"{name}: downloading {entry['repo_id']}@{entry['revision']}")
+                snapshot_download(
+                    repo_id=entry['repo_id'],
+                    revision=entry['revision'],
+                    local_dir=staging,
+                    allow_patterns=entry.get('allow_patterns')
+                )
+                actual = _sha256_tree(staging)
+            else:
+                raise ArtifactError(f"Unsupported artifact kind: {entry['kind']}")
+
+            if expected and actual != expected:
+                raise ArtifactError(
+                    f"Checksum mismatch for '{name}': expected {expected}, got {actual}"
+                )
+            if not expected:
+                if not pin:
+                    raise ArtifactError(
+                        f"Model artifact '{name}' has no pinned sha256; "
+                        f"re-run prefetch with --pin to record {actual}"
+                    )
+                entry['sha256'] = actual
+                self._write_manifest()
+                logger.info(f"{name}: pinned sha256 {actual}")
+
+            final_dir = self._artifact_dir(actual)
+            if os.path.exists(final_dir):
+                shutil.rmtree(final_dir)
+            with open(os.path.join(staging, COMPLETE_MARKER), 'w', encoding='utf-8') as f:
+                f.write(actual)
+            os.replace(staging, final_dir)
+            logger.info(f"{name}: stored at {final_dir}")
+            return self._artifact_path(entry, actual)
+        finally:
+            if os.path.exists(staging):
+                shutil.rmtree(staging, ignore_errors=True)
+
+    def verify(self, name):
+        """Re-hash a stored artifact and compare it with the pinned digest."""
+        entry = self._entry(name)
+        sha256 = entry.get('sha256')
+        if not sha256 or not self._is_complete(sha256):
+            return False
+        if entry['kind'] == 'file':
+            actual = _sha256_file(self._artifact_path(entry, sha256))
+        else:
+            actual = _sha256_tree(self._artifact_dir(sha256))
+        return actual == sha256
+
+    def status(self):
+        return {
+            name: {
+                'kind': entry['kind'],
+                'feature': entry.get('feature'),
+                'pinned': self._is_pinned(entry),
+                'present': self._is_pinned(entry) and self._is_complete(entry['sha256'])
+            }
+            for name, entry in self.manifest.items()
+        }
+
+    def unavailable(self):
+        """{name: reason} for every artifact that resolve() would refuse right now"""
+        missing = {}
+        for name, info in self.status().items():
+            if not info['pinned']:
+                missing[name] = 'not pinned in the manifest'
+            elif not info['present'] and not self.allow_download:
+                missing[name] = 'not prefetched into the local store'
+        return missing
+
+    def _write_manifest(self):
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=2)
+            f.write('\n')
+        os.replace(tmp_path, self.manifest_path)
+
+
+_default_manager = None
+
+
+def get_artifact_manager():
+    """Return the process-wide ArtifactManager."""
+    global _default_manager
+    if _default_manager is None:
+        _default_manager = ArtifactManager()
+    return _default_manager
+
+
+def resolve_model(name):
+    """Shortcut for get_artifact_manager().resolve(name)."""
+    return get_artifact_manager().resolve(name)
+
+
+_reported_unavailable = False
+
+
+def report_unavailable_models():
+    """Log once per process which features run without their model; returns the status"""
+    global _reported_unavailable
+    manager = get_artifact_manager()
+    try:
+        missing = manager.unavailable()
+    except (OSError, ValueError) as e:
+        logger.error(f"Cannot read model manifest {manager.manifest_path}: {str(e)}")
+        return {'available': False, 'error': str(e)}
+
+    status = manager.status()
+    if missing and not _reported_unavailable:
+        for name, reason in missing.items():
+            logger.error(f"{status[name]['feature'] or name} is DISABLED: model artifact '{name}' is {reason}. "
+                         f"Run 'python -m services.model_artifacts prefetch --pin {name}'.")
+    _reported_unavailable = True
+    return {
+        'available': not missing,
+        'disabled_features': sorted(status[name]['feature'] or name for name in missing),
+        'artifacts': {name: dict(info, problem=missing.get(name)) for name, info in status.items()}
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage locally cached model artifacts")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    prefetch_parser = subparsers.add_parser('prefetch', help="Download and verify artifacts")
+    prefetch_parser.add_argument('names', nargs='*', help="Artifacts to fetch (default: all)")
+    prefetch_parser.add_argument('--pin', action='store_true',
+                                 help="Record the digest of artifacts that are not pinned yet")
+
+    verify_parser = subparsers.add_parser('verify', help="Re-hash stored artifacts")
+    verify_parser.add_argument('names', nargs='*', help="Artifacts to verify (default: all)")
+
+    subparsers.add_parser('list', help="Show manifest entries and local status")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    manager = get_artifact_manager()
+
+    if args.command == 'list':
+        for name, info in manager.status().items():
+            print(f"{name:45} {info['kind']:12} pinned={info['pinned']} present={info['present']}")
+        return 0
+
+    names = args.names or list(manager.manifest)
+    failed = False
+    for name in names:
+        try:
+            if args.command == 'prefetch':
+                manager.prefetch(name, pin=args.pin)
+            elif not manager.verify(name):
+                print(f"{name}: verification FAILED")
+                failed = True
+            else:
+                print(f"{name}: OK")
+        except Exception as e:
+            print(f"{name}: {str(e)}")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,184 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from services.llm_client import LLMError, get_llm_client
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIERS = {
+    'fast': 'gemini-2.0-flash-lite',
+    'standard': 'gemini-2.0-flash',
+    'strong': 'gemini-2.5-pro'
+}
+
+# task (or task prefix before '_') -> tiers tried in order
+DEFAULT_ROUTES = {
+    'generate': ['standard'],
+    'grade': ['fast', 'standard'],
+    'default': ['standard']
+}
+
+VERDICT_SCHEMA = {
+    'type': 'OBJECT',
+    'properties': {
+        'verdict': {'type': 'STRING', 'enum': ['correct', 'incorrect']},
+        'confidence': {'type': 'NUMBER'}
+    },
+    'required': ['verdict', 'confidence']
+}
+
+
+def _parse_routes(value):
+    """'grade=fast>standard,generate=standard' -> {task: [tier, ...]}"""
+    routes = {}
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        task, _, tiers = item.partition('=')
+        routes[task.strip()] = [tier.strip() for tier in tiers.split('>') if tier.strip()]
+    return routes
+
+
+def _parse_verdict(text):
+    """(is_correct, confidence) from a verdict JSON object, or (None, None)"""
+    try:
+        data = json.loads(text)
+        verdict = str(data['verdict']).strip().lower()
+        confidence = min(max(float(data['confidence']), 0.0), 1.0)
+    except (ValueError, KeyError, TypeError):
+        return None, None
+    if verdict not in ('correct', 'incorrect'):
+        return None, None
+    return verdict == 'correct', confidence
+
+
+class ModelRouter:
+    """Sends each LLM task to a configured model tier.
+
+    A route lists tiers in order. ``generate`` uses the first tier that
+    answers; ``judge`` asks for a verdict with a confidence and moves to
+    the next (stronger) tier only while confidence is below
+    ``confidence_threshold``. Every decision is logged to the
+    model_routing table for tuning.
+    """
+
+    def __init__(self, client=None, tiers=None, routes=None, confidence_threshold=0.8):
+        self.client = client or get_llm_client()
+        self.tiers = dict(DEFAULT_TIERS, **(tiers or {}))
+        self.routes = dict(DEFAULT_ROUTES, **(routes or {}))
+        self.confidence_threshold = confidence_threshold
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def models_for(self, task):
+        tiers = self.routes.get(task) or self.routes.get(task.split('_')[0]) or self.routes['default']
+        return [self.tiers.get(tier, tier) for tier in tiers]
+
+    def generate(self, task, prompt, **kwargs):
+        """Response text from the first tier of the task's route that answers"""
+        started = time.monotonic()
+        models = self.models_for(task)
+        tried, last_error = [], None
+        for model in models:
+            tried.append(model)
+            try:
+                text = self.client.generate(prompt, model=model, label=task, **kwargs)
+            except LLMError as e:
+                last_error = e
+                continue
+            self.record(task, kwargs.get('session'), tried, model, None,
+                        'answered' if len(tried) == 1 else 'fallback_after_error', started)
+            return text
+        self.record(task, kwargs.get('session'), tried, None, None, 'all_failed', started)
+        raise last_error
+
+    def judge(self, task, prompt, deadline=None, **kwargs):
+        """
+        Cascade a correct/incorrect verdict up the task's tiers
+
+        Returns:
+            bool or None: the verdict, or None if no tier produced one
+        """
+        started = time.monotonic()
+        until = started + (deadline or self.client.deadline)
+        best, reason, tried = None, None, []
+        for model in self.models_for(task):
+            remaining = until - time.monotonic()
+            if remaining <= 0:
+                reason = 'deadline'
+                break
+            tried.append(model)
+            try:
+                text = self.client.generate(
+                    prompt, model=model, label=task, deadline=remaining,
+                    generation_config={'response_mime_type': 'application/json',
+                                       'response_schema': VERDICT_SCHEMA}, **kwargs)
+            except LLMError:
+                reason = 'error'
+                continue
+            verdict, confidence = _parse_verdict(text)
+            if verdict is None:
+                reason = 'unparseable'
+                continue
+            best = (verdict, confidence, model)
+            if confidence >= self.confidence_threshold:
+                reason = 'confident'
+                break
+            reason = 'low_confidence'
+
+        if best is None:
+            self.record(task, kwargs.get('session'), tried, None, None, reason or 'no_route', started)
+            return None
+        verdict, confidence, model = best
+        self.record(task, kwargs.get('session'), tried, model, confidence, reason, started)
+        return verdict
+
+    def record(self, task, session, tried, model, confidence, reason, started):
+        """Log one routing decision; also used for answers decided without an LLM"""
+        latency = time.monotonic() - started
+        escalated = len(tried) > 1
+        with self._lock:
+            stats = self._stats.setdefault(task, {'decisions': 0, 'escalations': 0, 'by_model': {}})
+            stats['decisions'] += 1
+            stats['escalations'] += int(escalated)
+            key = model or 'none'
+            stats['by_model'][key] = stats['by_model'].get(key, 0) + 1
+        logger.info(f"Routed {task} via {' > '.join(tried) or 'none'} -> {model} ({reason})")
+        try:
+            from services.storage import get_storage
+            get_storage().execute_write("""
+                INSERT INTO model_routing
+                (task, session_id, models_tried, model, confidence, escalated, reason, latency_ms)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (task, session, ','.join(tried), model, confidence, int(escalated), reason,
+                  round(latency * 1000, 1)))
+        except Exception as e:
+            logger.error(f"Error recording routing decision: {str(e)}")
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'routes': {task: self.models_for(task) for task in self.routes},
+                'confidence_threshold': self.confidence_threshold,
+                'tasks': json.loads(json.dumps(self._stats))
+            }
+
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_model_router():
+    """Return the process-wide model router"""
+    global _router
+    with _router_lock:
+        if _router is None:
+            tiers = {tier: os.getenv(f'NEUROPREP_MODEL_{tier.upper()}', model)
+                     for tier, model in DEFAULT_TIERS.items()}
+            _router = ModelRouter(
+                tiers=tiers,
+                routes=_parse_routes(os.getenv('NEUROPREP_MODEL_ROUTES', '')),
+                confidence_threshold=float(os.getenv('NEUROPREP_GRADE_CONFIDENCE', '0.8'))
+            )
+    return _router
@@ -0,0 +1,180 @@
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from services.model_artifacts import resolve_model
+
+logger = logging.getLogger(__name__)
+
+PHONE_CLASS_ID = 67  # COCO class index for cell phones
+
+
+class BatchingInferenceServer:
+    """Collects frames from many sessions and runs them through a model together.
+
+    The first queued frame opens a batch; the batch is closed when it reaches
+    ``max_batch_size`` or ``max_wait_ms`` has passed, then ``infer_batch_fn``
+    is called once with the list of frames and must return one result per
+    frame. Callers get a Future, or block on ``infer``.
+    """
+
+    def __init__(self, infer_batch_fn, max_batch_size=8, max_wait_ms=20.0, name='batch-inference'):
+        self.infer_batch_fn = infer_batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._requests = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'batches': 0,
+            'frames': 0,
+            'failed_batches': 0,
+            'inference_seconds': 0.0,
+            'latency_seconds_total': 0.0,
+            'latency_seconds_max': 0.0
+        }
+        self._started_at = time.monotonic()
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, session_id, frame):
+        """Queue a frame and return a Future resolving to that frame's result"""
+        future = Future()
+        self._requests.put((session_id, frame, future, time.monotonic()))
+        with self._stats_lock:
+            self._stats['requests'] += 1
+        return future
+
+    def infer(self, session_id, frame, timeout=5.0):
+        return self.submit(session_id, frame).result(timeout=timeout)
+
+    def _collect_batch(self):
+        try:
+            first = self._requests.get(timeout=0.5)
+        except queue.Empty:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _serve(self):
+        while self._running:
+            batch = self._collect_batch()
+            if not batch:
+                continue
+
+            frames = [item[1] for item in batch]
+            start = time.monotonic()
+            try:
+                results = self.infer_batch_fn(frames)
+                if len(results) != len(frames):
+                    raise RuntimeError(f"Expected {len(frames)} results, got {len(results)}")
+            except Exception as e:
+                logger.error(f"Batched inference failed for {len(frames)} frames: {str(e)}")
+                with self._stats_lock:
+                    self._stats['failed_batches'] += 1
+                for _, _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            finished = time.monotonic()
+            for (_, _, future, queued_at), result in zip(batch, results):
+                future.set_result(result)
+
+            latencies = [finished - queued_at for _, _, _, queued_at in batch]
+            with self._stats_lock:
+                self._stats['batches'] += 1
+                self._stats['frames'] += len(batch)
+                self._stats['inference_seconds'] += finished - start
+                self._stats['latency_seconds_total'] += sum(latencies)
+                self._stats['latency_seconds_max'] = max(self._stats['latency_seconds_max'], max(latencies))
+
+    def get_stats(self):
+        """Throughput and latency counters since the server started"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        elapsed = max(time.monotonic() - self._started_at, 1e-9)
+        frames = stats['frames']
+        stats.update({
+            'queue_depth': self._requests.qsize(),
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000.0,
+            'avg_batch_size': frames / stats['batches'] if stats['batches'] else 0.0,
+            'avg_latency_ms': stats['latency_seconds_total'] / frames * 1000.0 if frames else 0.0,
+            'frames_per_second': frames / elapsed,
+            'inference_frames_per_second': frames / stats['inference_seconds'] if stats['inference_seconds'] else 0.0
+        })
+        return stats
+
+    def shutdown(self):
+        self._running = False
+        self._thread.join(timeout=1.0)
+
+
+def _load_torch_batch_fn(img_size=640):
+    import yolov5
+
+    model = yolov5.load(resolve_model('yolov5s'))
+    model.classes = [PHONE_CLASS_ID]
+
+    def infer_batch(frames):
+        # AutoShape treats numpy input as RGB; frames arrive as BGR from OpenCV
+        results = model([frame[..., ::-1] for frame in frames], size=img_size)
+        # One [x1, y1, x2, y2, conf, cls] list per frame
+        return [pred.tolist() for pred in results.pred]
+
+    return infer_batch
+
+
+def load_phone_detector_batch_fn(backend='torch', img_size=640, int8=False, intra_op_threads=0):
+    """Build a batch inference function for the requested backend.
+
+    'torch' runs the yolov5 package; 'onnx' runs an exported (optionally
+    INT8-quantized) model on ONNX Runtime with matching post-processing.
+    """
+    if backend == 'torch':
+        return _load_torch_batch_fn(img_size)
+    if backend == 'onnx':
+        from services.phone_detector_onnx import load_onnx_batch_fn
+        return load_onnx_batch_fn(img_size=img_size, int8=int8, intra_op_threads=intra_op_threads)
+    raise ValueError(f"Unknown phone detector backend: {backend}")
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def get_phone_detection_server():
+    """Return the process-wide batched phone detector, loading the model once"""
+    global _server
+    with _server_lock:
+        if _server is None:
+            batch_fn = load_phone_detector_batch_fn(
+                backend=os.getenv('NEUROPREP_PHONE_BACKEND', 'torch'),
+                img_size=int(os.getenv('NEUROPREP_PHONE_IMG_SIZE', '640')),
+                int8=os.getenv('NEUROPREP_PHONE_INT8', '0') == '1'
+            )
+            _server = BatchingInferenceServer(
+                batch_fn,
+                max_batch_size=int(os.getenv('NEUROPREP_PHONE_BATCH_SIZE', '8')),
+                max_wait_ms=float(os.getenv('NEUROPREP_PHONE_BATCH_WINDOW_MS', '20')),
+                name='phone-detector'
+            )
+            logger.info("Phone detection server started")
+    return _server
+
+
+def get_phone_detection_stats():
+    return _server.get_stats() if _server is not None else None
@@ -0,0 +1,155 @@
+import logging
+import os
+
+import cv2
+import numpy as np
+
+from services.model_artifacts import get_artifact_manager, resolve_model, STORE_DIR
+
+logger = logging.getLogger(__name__)
+
+# Exported/quantized models are derived from the pinned weights and kept beside the store
+DERIVED_DIR = os.path.join(STORE_DIR, 'derived')
+
+
+def _derived_path(img_size, int8):
+    source_digest = get_artifact_manager().manifest['yolov5s'].get('sha256') or 'unpinned'
+    suffix = '-int8' if int8 else ''
+    return os.path.join(DERIVED_DIR, f"yolov5s-{source_digest[:12]}-{img_size}{suffix}.onnx")
+
+
+def export_onnx(img_size=640, int8=False):
+    """Export the pinned yolov5s weights to ONNX (dynamic batch), optionally INT8.
+
+    Returns the path of the exported model; existing exports are reused.
+    """
+    weights_path = resolve_model('yolov5s')
+    fp32_path = _derived_path(img_size, int8=False)
+    target_path = _derived_path(img_size, int8=int8)
+    if os.path.exists(target_path):
+        return target_path
+
+    os.makedirs(DERIVED_DIR, exist_ok=True)
+    if not os.path.exists(fp32_path):
+        from yolov5.export import run as yolov5_export
+        logger.info(f"Exporting yolov5s to ONNX at {img_size}px")
+        exported = yolov5_export(weights=weights_path, imgsz=[img_size, img_size],
+                                 include=['onnx'], dynamic=True, simplify=False)
+        os.replace(str(exported[0]), fp32_path)
+
+    if int8:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        logger.info("Quantizing ONNX phone detector to INT8")
+        quantize_dynamic(fp32_path, target_path, weight_type=QuantType.QUInt8)
+    return target_path
+
+
+def letterbox(frame, img_size, color=(114, 114, 114)):
+    """Resize keeping aspect ratio and pad to a square, like yolov5's letterbox"""
+    height, width = frame.shape[:2]
+    ratio = min(img_size / height, img_size / width)
+    new_width, new_height = int(round(width * ratio)), int(round(height * ratio))
+    pad_x, pad_y = (img_size - new_width) / 2, (img_size - new_height) / 2
+
+    if (width, height) != (new_width, new_height):
+        frame = cv2.resize(frame, (new_width, new_height), interpolation=cv2.INTER_LINEAR)
+    top, bottom = int(round(pad_y - 0.1)), int(round(pad_y + 0.1))
+    left, right = int(round(pad_x - 0.1)), int(round(pad_x + 0.1))
+    frame = cv2.copyMakeBorder(frame, top, bottom, left, right, cv2.BORDER_CONSTANT, value=color)
+    return frame, ratio, (left, top)
+
+
+def nms(boxes, scores, iou_threshold):
+    """Greedy non-maximum suppression over xyxy boxes, returns kept indices"""
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size > 0:
+        i = order[0]
+        keep.append(i)
+        xx1 = np.maximum(x1[i], x1[order[1:]])
+        yy1 = np.maximum(y1[i], y1[order[1:]])
+        xx2 = np.minimum(x2[i], x2[order[1:]])
+        yy2 = np.minimum(y2[i], y2[order[1:]])
+        inter = np.clip(xx2 - xx1, 0, None) * np.clip(yy2 - yy1, 0, None)
+        iou = inter / (areas[i] + areas[order[1:]] - inter + 1e-9)
+        order = order[1:][iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+class OnnxPhoneDetector:
+    """YOLOv5 phone detector running on ONNX Runtime.
+
+    Post-processing mirrors yolov5's AutoShape/non_max_suppression as used
+    with ``classes=[67]``: conf = objectness * class score, the best class
+    per box must be the phone class, then NMS. Candidates are cut on
+    objectness first so the per-class work only touches a handful of rows.
+    """
+
+    def __init__(self, model_path, img_size=640, conf_threshold=0.25, iou_threshold=0.45,
+                 classes=(67,), max_det=1000, intra_op_threads=0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+        self.img_size = img_size
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+        self.classes = np.array(classes)
+        self.max_det = max_det
+
+    def _preprocess(self, frames):
+        batch, meta = [], []
+        for frame in frames:
+            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            padded, ratio, pad = letterbox(rgb, self.img_size)
+            batch.append(padded)
+            meta.append((ratio, pad, frame.shape[:2]))
+        batch = np.ascontiguousarray(np.stack(batch).transpose(0, 3, 1, 2), dtype=np.float32) / 255.0
+        return batch, meta
+
+    def _postprocess(self, prediction, ratio, pad, shape):
+        candidates = prediction[prediction[:, 4] > self.conf_threshold]
+        if not len(candidates):
+            return []
+
+        class_scores = candidates[:, 5:] * candidates[:, 4:5]
+        best_class = class_scores.argmax(axis=1)
+        best_conf = class_scores[np.arange(len(candidates)), best_class]
+        mask = (best_conf > self.conf_threshold) & np.isin(best_class, self.classes)
+        if not mask.any():
+            return []
+
+        xywh, conf, cls = candidates[mask, :4], best_conf[mask], best_class[mask]
+        boxes = np.empty_like(xywh)
+        boxes[:, 0] = xywh[:, 0] - xywh[:, 2] / 2
+        boxes[:, 1] = xywh[:, 1] - xywh[:, 3] / 2
+        boxes[:, 2] = xywh[:, 0] + xywh[:, 2] / 2
+        boxes[:, 3] = xywh[:, 1] + xywh[:, 3] / 2
+
+        keep = nms(boxes, conf, self.iou_threshold)[:self.max_det]
+        boxes, conf, cls = boxes[keep], conf[keep], cls[keep]
+
+        # Undo the letterbox to get coordinates in the original frame
+        boxes[:, [0, 2]] = (boxes[:, [0, 2]] - pad[0]) / ratio
+        boxes[:, [1, 3]] = (boxes[:, [1, 3]] - pad[1]) / ratio
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, shape[1])
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, shape[0])
+
+        return [[*map(float, box), float(c), float(k)] for box, c, k in zip(boxes, conf, cls)]
+
+    def __call__(self, frames):
+        """Return one [x1, y1, x2, y2, conf, cls] list per frame, like results.pred"""
+        batch, meta = self._preprocess(frames)
+        predictions = self.session.run(None, {self.input_name: batch})[0]
+        return [self._postprocess(prediction, *frame_meta) for prediction, frame_meta in zip(predictions, meta)]
+
+
+def load_onnx_batch_fn(img_size=640, int8=False, intra_op_threads=0):
+    model_path = export_onnx(img_size=img_size, int8=int8)
+    return OnnxPhoneDetector(model_path, img_size=img_size, intra_op_threads=intra_op_threads)
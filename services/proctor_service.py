@@ -1,13 +1,13 @@
 import cv2
 import mediapipe as mp
 import numpy as np
-import torch
-from datetime import datetime
-import sqlite3
+from services.storage import get_storage
 from threading import Thread
 import time
-import os
 from utils import TryExcept
+from services.phone_detection import get_phone_detection_server, PHONE_CLASS_ID
+from services.frame_sampling import MotionGate, AdaptiveSchedule
+from services.incident_aggregator import IncidentAggregator
 
 class ProctorService:
     def __init__(self, session_id):
@@ -15,6 +15,7 @@ class ProctorService:
         self.cap = None
         self.is_monitoring = False
         self.incident_count = 0
+        self.incident_aggregator = IncidentAggregator(session_id)
         
         # Initialize MediaPipe
         self.mp_face_mesh = mp.solutions.face_mesh
@@ -24,25 +25,9 @@ class ProctorService:
             min_tracking_confidence=0.5
         )
         
-        # Load YOLOv5 model for phone detection
+        # Phone detection runs on a shared YOLOv5 model that batches frames across sessions
         try:
-            import yolov5
-            # Create models directory if it doesn't exist
-            if not os.path.exists('models'):
-                os.makedirs('models')
-            
-            # Download YOLOv5s if not exists
-            model_path = 'models/yolov5s.pt'
-            if not os.path.exists(model_path):
-                print("Downloading YOLOv5s model...")
-                torch.hub.download_url_to_file(
-                    'https://github.com/ultralytics/yolov5/releases/download/v6.1/yolov5s.pt',
-                    model_path
-                )
-            
-            # Load the model
-            self.phone_detector = yolov5.load(model_path)
-            self.phone_detector.classes = [67]  # Class index for cell phones
+            self.phone_detector = get_phone_detection_server()
             print("YOLOv5 model loaded successfully")
         except Exception as e:
             print(f"Error loading YOLOv5 model: {str(e)}")
@@ -53,6 +38,14 @@ class ProctorService:
         self.eye_threshold = 0.3
         self.distraction_threshold = 2.0  # seconds
         self.last_focused_time = time.time()
+        self._gaze_away = False  # last FaceMesh verdict, None when no face was found
+        
+        # Analysis cascade: motion gate -> FaceMesh on scene change -> YOLO on an
+        # adaptive schedule that speeds up after suspicious signals
+        self.motion_gate = MotionGate()
+        self.phone_schedule = AdaptiveSchedule(base_interval=3.0, min_interval=0.5, escalation_seconds=10.0)
+        self._scene_active = True
+        self.cascade_stats = {'frames': 0, 'face_mesh_runs': 0, 'phone_detector_runs': 0, 'escalations': 0}
         
     def start_monitoring(self):
         """Start webcam monitoring in a separate thread"""
@@ -74,11 +67,65 @@ class ProctorService:
                 continue
             
             # Process frame for various checks
-            self._check_eye_gaze(frame)
-            if self.phone_detector is not None:
-                self._detect_phone(frame)
+            self._process_frame(frame)
             
-            time.sleep(0.1)  # Reduce CPU usage
+            # Sample faster while the scene is changing or after suspicious signals
+            if self._scene_active or self.phone_schedule.is_escalated():
+                time.sleep(0.1)
+            else:
+                time.sleep(0.3)
+    
+    def analyze_frame(self, frame):
+        """Run the proctoring checks on a single decoded frame.
+        
+        Returns the details of any incidents logged for this frame.
+        """
+        return self._process_frame(frame)
+    
+    def _process_frame(self, frame):
+        """Run the analysis cascade on a frame and return incident details"""
+        now = time.monotonic()
+        incidents = []
+        self.cascade_stats['frames'] += 1
+        
+        # FaceMesh only when the scene changed; otherwise reuse the last verdict
+        changed, strong_motion = self.motion_gate.check(frame, now)
+        self._scene_active = changed
+        if changed:
+            self.cascade_stats['face_mesh_runs'] += 1
+            gaze_incident = self._check_eye_gaze(frame)
+        else:
+            gaze_incident = self._update_gaze_state(self._gaze_away)
+        if gaze_incident:
+            incidents.append(gaze_incident)
+        
+        if self._gaze_away is None:
+            self._escalate("no face visible", now)
+        elif self._gaze_away:
+            self._escalate("looking away", now)
+        if strong_motion:
+            self._escalate("sudden movement", now)
+        
+        if self.phone_detector is not None and self.phone_schedule.due(now):
+            self.phone_schedule.mark_run(now)
+            self.cascade_stats['phone_detector_runs'] += 1
+            phone_incidents = self._detect_phone(frame)
+            if phone_incidents:
+                self._escalate("phone detected", now)
+            incidents.extend(phone_incidents)
+        
+        return incidents
+    
+    def _escalate(self, reason, now):
+        if not self.phone_schedule.is_escalated(now):
+            self.cascade_stats['escalations'] += 1
+        self.phone_schedule.escalate(reason, now)
+    
+    def close(self):
+        """Release the monitoring resources held by this session"""
+        self.stop_monitoring()
+        self.face_mesh.close()
+        self.incident_aggregator.close()
     
     def _check_eye_gaze(self, frame):
         """Check eye gaze direction and detect distractions"""
@@ -93,25 +140,40 @@ class ProctorService:
             right_eye = self._get_eye_aspect_ratio(face_landmarks, "right")
             
             # Check if looking away
-            if left_eye < self.eye_threshold or right_eye < self.eye_threshold:
-                current_time = time.time()
-                if current_time - self.last_focused_time > self.distraction_threshold:
-                    self._log_incident("eye_distraction", 0.8, "User looking away from screen")
-            else:
-                self.last_focused_time = time.time()
+            self._gaze_away = left_eye < self.eye_threshold or right_eye < self.eye_threshold
+        else:
+            self._gaze_away = None
+        
+        return self._update_gaze_state(self._gaze_away)
+    
+    def _update_gaze_state(self, looking_away):
+        """Track how long the user has been looking away and log distractions"""
+        if looking_away:
+            current_time = time.time()
+            if current_time - self.last_focused_time > self.distraction_threshold:
+                details = "User looking away from screen"
+                self._log_incident("eye_distraction", 0.8, details)
+                return details
+        elif looking_away is not None:
+            self.last_focused_time = time.time()
+        return None
     
     def _detect_phone(self, frame):
         """Detect phones or other devices in frame"""
+        incidents = []
         if self.phone_detector is None:
-            return
+            return incidents
             
-        results = self.phone_detector(frame)
+        detections = self.phone_detector.infer(self.session_id, frame)
         
         # Check if any phones detected
-        if len(results.pred[0]) > 0:
-            for *box, conf, cls in results.pred[0]:
-                if cls == 67 and conf > 0.5:  # Phone detected with high confidence
-                    self._log_incident("phone_detected", float(conf), "Phone detected in frame")
+        if len(detections) > 0:
+            for *box, conf, cls in detections:
+                if cls == PHONE_CLASS_ID and conf > 0.5:  # Phone detected with high confidence
+                    details = "Phone detected in frame"
+                    self._log_incident("phone_detected", float(conf), details)
+                    incidents.append(details)
+        return incidents
     
     def _get_eye_aspect_ratio(self, landmarks, eye_side):
         """Calculate eye aspect ratio to detect eye closure/gaze"""
@@ -134,47 +196,51 @@ class ProctorService:
         return (v1 + v2) / (2.0 * h)
     
     def _log_incident(self, incident_type, confidence, details):
-        """Log proctoring incidents to database"""
+        """Record a proctoring detection; consecutive detections are merged into intervals"""
         self.incident_count += 1
-        
-        conn = sqlite3.connect('interview.db')
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            INSERT INTO proctoring_incidents 
-            (session_id, timestamp, incident_type, confidence_score, details)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            self.session_id,
-            datetime.now(),
-            incident_type,
-            confidence,
-            details
-        ))
-        
-        conn.commit()
-        conn.close()
+        self.incident_aggregator.record(incident_type, confidence, details)
     
     def get_incident_summary(self):
-        """Get summary of incidents for the session"""
-        conn = sqlite3.connect('interview.db')
-        cursor = conn.cursor()
+        """Get summary of incident intervals for the session"""
+        self.incident_aggregator.flush()
         
-        cursor.execute("""
-            SELECT incident_type, COUNT(*) as count, AVG(confidence_score) as avg_confidence
-            FROM proctoring_incidents
+        rows = get_storage().query("""
+            SELECT incident_type, intervals, frames, peak_confidence, avg_confidence, duration_seconds
+            FROM incident_summary
             WHERE session_id = ?
-            GROUP BY incident_type
-        """, (self.session_id,))
-        
-        summary = cursor.fetchall()
-        conn.close()
+        """, (self.session_id,), wait_for_writes=True)
+        
+        breakdown = {}
+        for incident_type, intervals, frames, peak, avg_confidence, duration in rows:
+            breakdown[incident_type] = {
+                'count': intervals,
+                'frames': frames,
+                'peak_confidence': peak,
+                'confidence_sum': (avg_confidence or 0.0) * frames,
+                'duration_seconds': duration or 0.0
+            }
+        
+        # Include intervals that are still open or waiting for the next flush
+        for interval in self.incident_aggregator.in_memory_intervals():
+            entry = breakdown.setdefault(interval.incident_type, {
+                'count': 0, 'frames': 0, 'peak_confidence': 0.0,
+                'confidence_sum': 0.0, 'duration_seconds': 0.0
+            })
+            entry['count'] += 1
+            entry['frames'] += interval.frame_count
+            entry['peak_confidence'] = max(entry['peak_confidence'], interval.peak_confidence)
+            entry['confidence_sum'] += interval.confidence_sum
+            entry['duration_seconds'] += interval.duration
         
         return {
-            'total_incidents': self.incident_count,
+            'total_incidents': sum(entry['count'] for entry in breakdown.values()),
+            'flagged_frames': self.incident_count,
             'incident_breakdown': [{
-                'type': incident[0],
-                'count': incident[1],
-                'avg_confidence': incident[2]
-            } for incident in summary]
-        } 
\ No newline at end of file
+                'type': incident_type,
+                'count': entry['count'],
+                'frames': entry['frames'],
+                'avg_confidence': entry['confidence_sum'] / entry['frames'] if entry['frames'] else 0.0,
+                'peak_confidence': entry['peak_confidence'],
+                'duration_seconds': entry['duration_seconds']
+            } for incident_type, entry in breakdown.items()]
+        }
@@ -0,0 +1,149 @@
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_PREFIXES = ('ERROR:', 'REDIRECT:')
+
+
+class _Topic:
+    __slots__ = ('events', 'subscribers', 'last_activity', 'closed')
+
+    def __init__(self, history):
+        self.events = deque(maxlen=history)
+        self.subscribers = {}
+        self.last_activity = time.monotonic()
+        self.closed = False
+
+
+class ProgressBus:
+    """In-process pub/sub for progress messages, one topic per session.
+
+    Each topic keeps its last ``history`` events so a client that connects
+    late or reconnects can replay what it missed by passing the last seq
+    it saw. Delivery is push: subscribers are callbacks invoked on publish
+    (e.g. a Socket.IO emit), so no thread waits on a queue per client.
+    Callbacks run under the bus lock to keep replay and live events in
+    order, so they must not block. Topics without subscribers that have
+    been idle for ``ttl`` seconds are dropped by ``sweep``.
+    """
+
+    def __init__(self, history=50, ttl=900.0):
+        self.history = history
+        self.ttl = ttl
+        self._topics = {}
+        self._seq = itertools.count(1)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._sweeper = None
+
+    def publish(self, topic, message):
+        with self._lock:
+            event = {'seq': next(self._seq), 'message': message, 'ts': time.time()}
+            state = self._topics.get(topic)
+            if state is None:
+                state = self._topics[topic] = _Topic(self.history)
+            state.events.append(event)
+            state.last_activity = time.monotonic()
+            state.closed = message.startswith(TERMINAL_PREFIXES)
+            for callback in state.subscribers.values():
+                self._deliver(topic, callback, event)
+        return event
+
+    @staticmethod
+    def _deliver(topic, callback, event):
+        try:
+            callback(event)
+        except Exception as e:
+            logger.error(f"Error delivering progress event on {topic}: {str(e)}")
+
+    def replay(self, topic, after_seq=0):
+        """Retained events newer than after_seq"""
+        with self._lock:
+            state = self._topics.get(topic)
+            if state is None:
+                return []
+            state.last_activity = time.monotonic()
+            return [event for event in state.events if event['seq'] > after_seq]
+
+    def subscribe(self, topic, callback, after_seq=0):
+        """Replay missed events to callback, then deliver new ones; returns an unsubscribe id"""
+        with self._lock:
+            state = self._topics.get(topic)
+            if state is None:
+                state = self._topics[topic] = _Topic(self.history)
+            subscription_id = next(self._ids)
+            # Replay and register under the lock so no event is missed or reordered
+            for event in state.events:
+                if event['seq'] > after_seq:
+                    self._deliver(topic, callback, event)
+            state.subscribers[subscription_id] = callback
+            state.last_activity = time.monotonic()
+        return subscription_id
+
+    def unsubscribe(self, topic, subscription_id):
+        with self._lock:
+            state = self._topics.get(topic)
+            if state is not None:
+                state.subscribers.pop(subscription_id, None)
+                state.last_activity = time.monotonic()
+
+    def reset(self, topic):
+        """Start a topic afresh, e.g. when generation is retried"""
+        with self._lock:
+            state = self._topics.get(topic)
+            if state is not None:
+                state.events.clear()
+                state.closed = False
+
+    def is_closed(self, topic):
+        with self._lock:
+            state = self._topics.get(topic)
+            return state is not None and state.closed
+
+    def sweep(self):
+        """Drop abandoned topics; returns how many were removed"""
+        cutoff = time.monotonic() - self.ttl
+        with self._lock:
+            stale = [topic for topic, state in self._topics.items()
+                     if not state.subscribers and state.last_activity < cutoff]
+            for topic in stale:
+                del self._topics[topic]
+        return len(stale)
+
+    def start_sweeper(self, interval=60.0):
+        def loop():
+            while True:
+                time.sleep(interval)
+                removed = self.sweep()
+                if removed:
+                    logger.info(f"Progress bus dropped {removed} idle topics")
+
+        if self._sweeper is None:
+            self._sweeper = threading.Thread(target=loop, name='progress-bus-sweeper', daemon=True)
+            self._sweeper.start()
+        return self
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'topics': len(self._topics),
+                'subscribers': sum(len(state.subscribers) for state in self._topics.values()),
+                'retained_events': sum(len(state.events) for state in self._topics.values())
+            }
+
+
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_progress_bus(history=50, ttl=900.0):
+    """Return the process-wide progress bus"""
+    global _bus
+    with _bus_lock:
+        if _bus is None:
+            _bus = ProgressBus(history, ttl).start_sweeper()
+    return _bus
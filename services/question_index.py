@@ -0,0 +1,221 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BANK_PATH = os.getenv('NEUROPREP_TECHNICAL_BANK',
+                      os.path.join(BASE_DIR, 'database', 'question_bank', 'technical.json'))
+INDEX_DIR = os.getenv('NEUROPREP_INDEX_DIR', os.path.join(BASE_DIR, 'index'))
+# Latent dimensions of the LSA space (capped by the bank's size)
+DIMENSIONS = int(os.getenv('NEUROPREP_INDEX_DIMENSIONS', '64'))
+# Part of the index key: bump when documents or vectorizer settings change
+INDEX_VERSION = 1
+
+# Names that the default tokenizer would mangle ('c++' -> 'c'), mapped to single tokens
+_ALIASES = [
+    (re.compile(r'c\+\+'), ' cplusplus '),
+    (re.compile(r'c#'), ' csharp '),
+    (re.compile(r'\.net\b'), ' dotnet '),
+    (re.compile(r'node\.js'), ' nodejs '),
+    (re.compile(r'\bscikit-learn\b'), ' sklearn ')
+]
+
+
+def _normalize(text):
+    text = text.lower()
+    for pattern, replacement in _ALIASES:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def _vectorizer(vocabulary=None):
+    return TfidfVectorizer(preprocessor=_normalize, stop_words='english', ngram_range=(1, 2),
+                           sublinear_tf=True, vocabulary=vocabulary)
+
+
+def _document(item):
+    # Tags and the category are what skills match against, so they count twice
+    keywords = ' '.join(item.get('tags', []) + [item.get('category', '').replace('_', ' ')])
+    return f"{item['question']} {item['answer']} {keywords} {keywords}"
+
+
+def _unit_rows(matrix):
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class QuestionIndex:
+    """LSA vector index over a question bank.
+
+    Bank items are embedded with TF-IDF followed by truncated SVD and stored
+    as unit-length float32 rows, so a search is a single matrix-vector product
+    plus a partial sort. The vectors and the SVD projection are saved as
+    .npy files and memory-mapped on load; the index directory is named after
+    the bank's digest, so editing the bank builds a fresh index next to the
+    old one instead of overwriting it under a reader.
+    """
+
+    def __init__(self, items, vectorizer, components, vectors):
+        self.items = items
+        self.vectorizer = vectorizer
+        self.components = components
+        self.vectors = vectors
+
+    @classmethod
+    def build(cls, items, directory):
+        """Fit the embedding on items and persist it to directory"""
+        vectorizer = _vectorizer()
+        tfidf = vectorizer.fit_transform([_document(item) for item in items])
+        dimensions = max(1, min(DIMENSIONS, tfidf.shape[0] - 1, tfidf.shape[1] - 1))
+        svd = TruncatedSVD(n_components=dimensions, random_state=0)
+        vectors = _unit_rows(svd.fit_transform(tfidf)).astype(np.float32)
+
+        parent = os.path.dirname(directory)
+        os.makedirs(parent, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=parent, prefix='.tmp-')
+        try:
+            np.save(os.path.join(tmp_dir, 'vectors.npy'), vectors)
+            np.save(os.path.join(tmp_dir, 'components.npy'), svd.components_.astype(np.float32))
+            np.save(os.path.join(tmp_dir, 'idf.npy'), vectorizer.idf_)
+            with open(os.path.join(tmp_dir, 'vocabulary.json'), 'w', encoding='utf-8') as f:
+                json.dump({term: int(column) for term, column in vectorizer.vocabulary_.items()}, f)
+            with open(os.path.join(tmp_dir, 'items.json'), 'w', encoding='utf-8') as f:
+                json.dump(items, f)
+            os.rename(tmp_dir, directory)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            # Another worker published the same index first; theirs is identical
+            if not os.path.isdir(directory):
+                raise
+        logger.info(f"Built question index of {len(items)} items x {dimensions} dimensions in {directory}")
+        return cls.load(directory)
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, 'vocabulary.json'), 'r', encoding='utf-8') as f:
+            vectorizer = _vectorizer(json.load(f))
+        vectorizer.idf_ = np.load(os.path.join(directory, 'idf.npy'))
+        with open(os.path.join(directory, 'items.json'), 'r', encoding='utf-8') as f:
+            items = json.load(f)
+        return cls(
+            items,
+            vectorizer,
+            np.load(os.path.join(directory, 'components.npy'), mmap_mode='r'),
+            np.load(os.path.join(directory, 'vectors.npy'), mmap_mode='r')
+        )
+
+    @classmethod
+    def open(cls, bank_path=BANK_PATH, index_dir=INDEX_DIR):
+        """Load the index for the bank's current contents, building it if needed"""
+        with open(bank_path, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw + f':{INDEX_VERSION}:{DIMENSIONS}'.encode('ascii')).hexdigest()
+        directory = os.path.join(index_dir, f"{os.path.splitext(os.path.basename(bank_path))[0]}-{digest[:16]}")
+        if os.path.isdir(directory):
+            return cls.load(directory)
+        return cls.build(json.loads(raw), directory)
+
+    def embed(self, texts):
+        """Unit-length rows in the index space, one per text"""
+        projected = self.vectorizer.transform(texts) @ self.components.T
+        return _unit_rows(np.asarray(projected, dtype=np.float32))
+
+    def scores(self, queries):
+        """Cosine similarity of every item to each query row: shape (queries, items)"""
+        return queries @ self.vectors.T
+
+    def search(self, text, k=10):
+        """[(score, item)] for the k items most similar to text, best first"""
+        scores = self.scores(self.embed([text]))[0]
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), self.items[i]) for i in top]
+
+    def for_candidate(self, skills, resume_text=None, max_per_category=None):
+        """
+        Rank every item by relevance to a candidate
+
+        The skills string and the resume text are embedded separately and
+        an item's score is the mean of its similarity to each, so a short
+        skills list is not drowned out by a long resume.
+
+        Args:
+            skills (str): The candidate's skills, tools and languages
+            resume_text (str, optional): Text from parse_to_text
+            max_per_category (int, optional): Cap per category; items over
+                the cap are moved behind all others
+
+        Returns:
+            list: [(score, item)] for every item, best first
+        """
+        queries = [skills or ''] + ([resume_text] if resume_text else [])
+        scores = self.scores(self.embed(queries)).mean(axis=0)
+
+        ranked = [(float(scores[i]), self.items[i]) for i in np.argsort(-scores, kind='stable')]
+        if not max_per_category:
+            return ranked
+        kept, overflow, per_category = [], [], {}
+        for score, item in ranked:
+            category = item.get('category')
+            per_category[category] = per_category.get(category, 0) + 1
+            (kept if per_category[category] <= max_per_category else overflow).append((score, item))
+        return kept + overflow
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_question_index():
+    """Return the process-wide technical question index, or None if it cannot be loaded"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            started = time.monotonic()
+            try:
+                _index = QuestionIndex.open()
+            except Exception as e:
+                logger.error(f"Error loading question index: {str(e)}")
+                return None
+            logger.info(f"Question index ready in {(time.monotonic() - started) * 1000:.1f} ms")
+    return _index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the technical question index")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('build', help="Build the index for the current bank if it is missing")
+    query_parser = subparsers.add_parser('query', help="Show the questions closest to a text")
+    query_parser.add_argument('text', help="Skills or resume text to match")
+    query_parser.add_argument('-k', type=int, default=10, help="Number of results")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    index = QuestionIndex.open()
+    if args.command == 'query':
+        started = time.perf_counter()
+        results = index.search(args.text, args.k)
+        for score, item in results:
+            print(f"{score:6.3f}  [{item['category']}] {item['question']}")
+        print(f"{len(results)} results in {(time.perf_counter() - started) * 1000:.2f} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,290 @@
+import atexit
+import glob
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future
+
+from services.storage import BASE_DIR
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_DIR = os.getenv('NEUROPREP_JOURNAL_DIR', os.path.join(BASE_DIR, 'journal'))
+
+_SEGMENT_FILE = re.compile(r'^segment-(\d+)\.jsonl$')
+_SNAPSHOT_FILE = re.compile(r'^snapshot-(\d+)\.json$')
+_STOP = object()
+
+
+def apply_event(state, event):
+    """Fold one event into the per-session state.
+
+    Every reducer sets values rather than accumulating them, so replaying an
+    event that a snapshot already covers leaves the state unchanged.
+    """
+    session = state.setdefault(event['sid'], {})
+    session['updated_at'] = event['ts']
+    kind, data = event['type'], event['data']
+
+    if kind == 'session_started':
+        session['db_session_id'] = data['db_session_id']
+    elif kind == 'resume_uploaded':
+        session['resume_path'] = data['resume_path']
+    elif kind == 'questions_assigned':
+        session['questions'] = data['questions']
+    elif kind == 'voice_cursor':
+        session['voice'] = {'round_type': data['round_type'], 'index': data['index']}
+    elif kind == 'answer':
+        answers = session.setdefault('answers', {}).setdefault(data['round_type'], {})
+        answers[str(data['question_number'])] = data['answer']
+    elif kind == 'round_completed':
+        session.setdefault('completed_rounds', {})[data['round_type']] = event['ts']
+    elif kind == 'round_scored':
+        session.setdefault('scores', {})[data['round_type']] = data['score']
+    elif kind == 'coding_progress':
+        session['coding'] = {'current_index': data['current_index'], 'submissions': data['submissions']}
+    else:
+        logger.warning(f"Unknown journal event type: {kind}")
+    return state
+
+
+class SessionJournal:
+    """Append-only, segmented journal of interview session events.
+
+    Events are JSONL records ``{"seq", "ts", "sid", "type", "data"}``. A
+    writer thread appends them in order and fsyncs once per batch, so many
+    concurrent events share one fsync. The writer also folds events into
+    the in-memory state and every ``snapshot_every`` events writes a
+    snapshot, after which older segments are deleted. ``recover`` loads the
+    newest snapshot and replays only the events after it.
+    """
+
+    def __init__(self, journal_dir=JOURNAL_DIR, segment_bytes=16 * 1024 * 1024,
+                 fsync_window_ms=5.0, snapshot_every=5000, session_ttl_hours=48.0):
+        self.journal_dir = journal_dir
+        self.segment_bytes = segment_bytes
+        self.fsync_window = fsync_window_ms / 1000.0
+        self.snapshot_every = snapshot_every
+        self.session_ttl = session_ttl_hours * 3600
+        self.state = {}
+        self.seq = 0
+        self._state_lock = threading.Lock()
+        self._events = queue.Queue()
+        self._segment = None
+        self._segment_path = None
+        self._since_snapshot = 0
+        self._writer = None
+        os.makedirs(journal_dir, exist_ok=True)
+
+    # Recovery
+
+    def _files(self, pattern):
+        found = []
+        for path in glob.glob(os.path.join(self.journal_dir, '*')):
+            match = pattern.match(os.path.basename(path))
+            if match:
+                found.append((int(match.group(1)), path))
+        return sorted(found)
+
+    def _read_segment(self, path):
+        """Yield (event, end offset) for every complete record in a segment"""
+        offset = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                offset += len(line)
+                if not line.endswith(b'\n'):
+                    # A torn write can only be the tail of the last segment
+                    logger.warning(f"Stopping replay of {os.path.basename(path)} at a partial record")
+                    return
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Skipping a corrupt record in {os.path.basename(path)}")
+                    continue
+                yield event, offset
+
+    def _truncate(self, path, size):
+        with open(path, 'r+b') as f:
+            f.truncate(size)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def recover(self):
+        """Rebuild session state from the newest snapshot plus later events.
+
+        A partial record left at the end of the last segment by a crash is
+        cut off, so events appended after the restart start on a new line.
+        """
+        start = time.perf_counter()
+        state, seq = {}, 0
+        for snapshot_seq, path in reversed(self._files(_SNAPSHOT_FILE)):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    state, seq = json.load(f)['state'], snapshot_seq
+                break
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Skipping unreadable snapshot {path}: {str(e)}")
+
+        segments = self._files(_SEGMENT_FILE)
+        replayed = 0
+        for index, (first_seq, path) in enumerate(segments):
+            next_first = segments[index + 1][0] if index + 1 < len(segments) else None
+            if next_first is not None and next_first <= seq + 1:
+                continue  # fully covered by the snapshot
+            complete = 0
+            for event, complete in self._read_segment(path):
+                if event['seq'] <= seq:
+                    continue
+                apply_event(state, event)
+                seq = event['seq']
+                replayed += 1
+            if next_first is None and os.path.getsize(path) > complete:
+                logger.warning(f"Truncating {os.path.basename(path)} to its last complete record")
+                self._truncate(path, complete)
+
+        with self._state_lock:
+            self.state, self.seq = state, seq
+        logger.info(f"Journal recovered {len(state)} sessions up to seq {seq} "
+                    f"({replayed} events replayed in {time.perf_counter() - start:.2f}s)")
+        return state
+
+    # Appending
+
+    def start(self):
+        """Start the writer; new events go to a fresh segment"""
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._write_loop, name='session-journal', daemon=True)
+            self._writer.start()
+        return self
+
+    def append(self, session_id, event_type, data, sync=False):
+        """Queue an event; with sync=True wait until it is fsynced"""
+        future = Future()
+        self._events.put(({'sid': session_id, 'type': event_type, 'data': data, 'ts': time.time()}, future))
+        return future.result(timeout=10) if sync else future
+
+    def _open_segment(self, first_seq):
+        if self._segment is not None:
+            self._segment.close()
+        self._segment_path = os.path.join(self.journal_dir, f"segment-{first_seq:012d}.jsonl")
+        self._segment = open(self._segment_path, 'ab')
+
+    def _write_loop(self):
+        while True:
+            batch = [self._events.get()]
+            # Give concurrent events a moment to join this fsync
+            deadline = time.monotonic() + self.fsync_window
+            while len(batch) < 1024:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._events.get(timeout=max(remaining, 0)) if remaining > 0
+                                 else self._events.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(item is _STOP for item in batch)
+            batch = [item for item in batch if item is not _STOP]
+            if batch:
+                self._write_batch(batch)
+            if stop:
+                if self._segment is not None:
+                    self._segment.close()
+                return
+
+    def _write_batch(self, batch):
+        try:
+            if self._segment is None or self._segment.tell() >= self.segment_bytes:
+                self._open_segment(self.seq + 1)
+            events = []
+            for event, _ in batch:
+                self.seq += 1
+                event['seq'] = self.seq
+                events.append(event)
+            self._segment.write(b''.join(
+                json.dumps(event, separators=(',', ':'), default=str).encode('utf-8') + b'\n'
+                for event in events))
+            self._segment.flush()
+            os.fsync(self._segment.fileno())
+        except Exception as e:
+            logger.error(f"Error writing journal batch: {str(e)}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        with self._state_lock:
+            for event in events:
+                apply_event(self.state, event)
+        for event, future in batch:
+            future.set_result(event['seq'])
+
+        self._since_snapshot += len(events)
+        if self._since_snapshot >= self.snapshot_every:
+            self.snapshot()
+
+    # Snapshots
+
+    def snapshot(self):
+        """Write the current state atomically and drop what it supersedes.
+
+        Called from the writer thread, so the state matches ``seq`` exactly.
+        """
+        cutoff = time.time() - self.session_ttl
+        with self._state_lock:
+            for session_id in [sid for sid, session in self.state.items()
+                               if session.get('updated_at', 0) < cutoff]:
+                del self.state[session_id]
+            payload = json.dumps({'seq': self.seq, 'state': self.state}, default=str)
+            seq = self.seq
+
+        path = os.path.join(self.journal_dir, f"snapshot-{seq:012d}.json")
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self._since_snapshot = 0
+
+        # Later events go to a new segment, so every existing segment is covered
+        self._open_segment(seq + 1)
+        for _, old in self._files(_SEGMENT_FILE):
+            if old != self._segment_path:
+                os.remove(old)
+        for _, old in self._files(_SNAPSHOT_FILE)[:-2]:
+            os.remove(old)
+        logger.info(f"Journal snapshot at seq {seq} ({len(payload)} bytes)")
+
+    def get_session(self, session_id):
+        with self._state_lock:
+            session = self.state.get(session_id)
+            return json.loads(json.dumps(session)) if session is not None else None
+
+    def close(self):
+        if self._writer is not None:
+            self._events.put(_STOP)
+            self._writer.join(timeout=10)
+            self._writer = None
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def get_session_journal():
+    """Return the process-wide journal, recovering state on first use"""
+    global _journal
+    with _journal_lock:
+        if _journal is None:
+            journal = SessionJournal(
+                fsync_window_ms=float(os.getenv('NEUROPREP_JOURNAL_FSYNC_MS', '5')),
+                snapshot_every=int(os.getenv('NEUROPREP_JOURNAL_SNAPSHOT_EVERY', '5000')),
+                session_ttl_hours=float(os.getenv('NEUROPREP_JOURNAL_SESSION_TTL_HOURS', '48'))
+            )
+            journal.recover()
+            _journal = journal.start()
+            atexit.register(_journal.close)
+    return _journal
@@ -2,17 +2,29 @@ import librosa
 import numpy as np
 from transformers import pipeline
 import speech_recognition as sr
-import sqlite3
+from services.storage import get_storage
 from datetime import datetime
+import logging
+from services.model_artifacts import ArtifactError, resolve_model
+
+logger = logging.getLogger(__name__)
 
 class SpeechAnalyzer:
     def __init__(self, session_id):
         self.session_id = session_id
-        self.emotion_classifier = pipeline(
-            "text-classification",
-            model="j-hartmann/emotion-english-distilroberta-base",
-            return_all_scores=True
-        )
+        # Loaded from the local model store so no hub request happens here;
+        # without it the other speech metrics still work
+        try:
+            model_dir = resolve_model('emotion-english-distilroberta-base')
+            self.emotion_classifier = pipeline(
+                "text-classification",
+                model=model_dir,
+                tokenizer=model_dir,
+                return_all_scores=True
+            )
+        except ArtifactError as e:
+            logger.error(f"Emotion analysis disabled: {str(e)}")
+            self.emotion_classifier = None
         self.recognizer = sr.Recognizer()
         
     def analyze_response(self, audio_data, question_number, round_type):
@@ -56,7 +68,7 @@ class SpeechAnalyzer:
     
     def _analyze_emotion(self, text):
         """Analyze emotion in text"""
-        if not text:
+        if not text or self.emotion_classifier is None:
             return {'dominant_emotion': 'unknown', 'confidence': 0.0}
         
         # Get emotion predictions
@@ -106,10 +118,7 @@ class SpeechAnalyzer:
     
     def _store_metrics(self, metrics, question_number, round_type):
         """Store speech metrics in database"""
-        conn = sqlite3.connect('interview.db')
-        cursor = conn.cursor()
-        
-        cursor.execute("""
+        get_storage().execute_write("""
             INSERT INTO speech_metrics 
             (session_id, question_number, round_type, emotion, confidence_level, 
              speech_rate, clarity_score, volume_variation)
@@ -124,42 +133,25 @@ class SpeechAnalyzer:
             metrics['clarity_score'],
             metrics['volume_variation']
         ))
-        
-        conn.commit()
-        conn.close()
     
     def get_speech_summary(self):
         """Get summary of speech metrics for the session"""
-        conn = sqlite3.connect('interview.db')
-        cursor = conn.cursor()
+        storage = get_storage()
         
         # Get average metrics
-        cursor.execute("""
-            SELECT 
-                round_type,
-                AVG(confidence_level) as avg_confidence,
-                AVG(speech_rate) as avg_speech_rate,
-                AVG(clarity_score) as avg_clarity,
-                AVG(volume_variation) as avg_volume_var
-            FROM speech_metrics
+        metrics = storage.query("""
+            SELECT round_type, avg_confidence, avg_speech_rate, avg_clarity, avg_volume_variation
+            FROM speech_round_summary
             WHERE session_id = ?
-            GROUP BY round_type
-        """, (self.session_id,))
-        
-        metrics = cursor.fetchall()
+        """, (self.session_id,), wait_for_writes=True)
         
         # Get emotion distribution
-        cursor.execute("""
-            SELECT emotion, COUNT(*) as count
-            FROM speech_metrics
+        emotions = storage.query("""
+            SELECT emotion, count
+            FROM speech_emotion_counts
             WHERE session_id = ?
-            GROUP BY emotion
         """, (self.session_id,))
         
-        emotions = cursor.fetchall()
-        
-        conn.close()
-        
         return {
             'metrics_by_round': [{
                 'round': m[0],
@@ -0,0 +1,248 @@
+import atexit
+import logging
+import os
+import pathlib
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DB_PATH = os.path.abspath(os.getenv('NEUROPREP_DB_PATH', os.path.join(BASE_DIR, 'interview.db')))
+
+_STOP = object()
+
+
+class Storage:
+    """Shared SQLite access: one writer thread with group commit, pooled readers.
+
+    Writes are queued and applied by a single thread that drains up to
+    ``batch_size`` statements per transaction, so concurrent interviews
+    share one fsync instead of paying a connect/commit each and never
+    contend for the write lock. The database runs in WAL mode so readers
+    from the pool are not blocked by the writer.
+    """
+
+    def __init__(self, db_path=DB_PATH, read_pool_size=4, batch_size=256):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self._writes = queue.Queue()
+        self._closed = False
+        # Held while queueing so nothing can be queued behind the writer's stop marker
+        self._queue_lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._writer_conn = self._connect()
+        self._writer_conn.execute("PRAGMA journal_mode=WAL")
+        self._writer = threading.Thread(target=self._write_loop, name='sqlite-writer', daemon=True)
+        self._writer.start()
+
+        self._readers = queue.Queue()
+        for _ in range(read_pool_size):
+            self._readers.put(self._connect())
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA busy_timeout=30000")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # Writes
+
+    def execute_write(self, sql, params=(), wait=False):
+        """Queue a write; with wait=True block until committed and return lastrowid"""
+        return self._enqueue(('execute', sql, params), wait)
+
+    def executemany_write(self, sql, seq_of_params, wait=False):
+        """Queue a batched write of many rows"""
+        return self._enqueue(('executemany', sql, list(seq_of_params)), wait)
+
+    def executescript(self, script):
+        """Run a multi-statement script on the writer thread and wait for it"""
+        return self._enqueue(('script', script, None), wait=True)
+
+    def run_in_transaction(self, fn, wait=True):
+        """Run fn(conn) on the writer thread inside a write transaction.
+
+        For read-modify-write updates that must not interleave with another
+        process's writer. fn's changes are rolled back alone if it raises;
+        with wait=True its return value is returned.
+        """
+        return self._enqueue(('call', fn, None), wait)
+
+    def _enqueue(self, operation, wait):
+        future = Future()
+        with self._queue_lock:
+            if self._closed:
+                raise RuntimeError("Storage is closed")
+            self._writes.put((operation, future))
+        return future.result() if wait else future
+
+    def flush(self, timeout=None):
+        """Block until every write queued so far has been committed"""
+        future = Future()
+        with self._queue_lock:
+            if self._closed:
+                return  # close() already committed everything
+            self._writes.put((None, future))
+        future.result(timeout=timeout)
+
+    def _write_loop(self):
+        conn = self._writer_conn
+        while True:
+            batch = [self._writes.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(item is _STOP for item in batch)
+            batch = [item for item in batch if item is not _STOP]
+            self._apply(conn, batch)
+            if stop:
+                conn.close()
+                return
+
+    def _apply(self, conn, batch):
+        # Statements are grouped into one transaction; scripts (which manage
+        # their own transactions) split the groups so queue order is kept
+        group = []
+        for operation, future in batch:
+            if operation is not None and operation[0] == 'script':
+                self._commit_group(conn, group)
+                group = []
+                try:
+                    conn.executescript(operation[1])
+                    future.set_result(None)
+                except Exception as e:
+                    logger.error(f"Error running SQL script: {str(e)}")
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    future.set_exception(e)
+            else:
+                group.append((operation, future))
+        self._commit_group(conn, group)
+
+    def _commit_group(self, conn, group):
+        if not group:
+            return
+        results = []
+        try:
+            # IMMEDIATE takes the write lock up front, so reads made by a
+            # run_in_transaction callback cannot go stale before its write
+            conn.execute("BEGIN IMMEDIATE")
+            for operation, future in group:
+                if operation is None:
+                    results.append((future, None, None))
+                    continue
+                kind, sql, params = operation
+                if kind == 'call':
+                    results.append(self._call(conn, future, sql))
+                    continue
+                try:
+                    if kind == 'execute':
+                        cursor = conn.execute(sql, params)
+                    else:
+                        cursor = conn.executemany(sql, params)
+                    results.append((future, cursor.lastrowid, None))
+                except Exception as e:
+                    logger.error(f"Error executing queued write: {str(e)}")
+                    results.append((future, None, e))
+            conn.execute("COMMIT")
+        except Exception as e:
+            logger.error(f"Error committing write batch: {str(e)}")
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
+            results = [(future, None, e) for future, _, _ in results]
+
+        for future, value, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(value)
+
+    def _call(self, conn, future, fn):
+        conn.execute("SAVEPOINT queued_call")
+        try:
+            value = fn(conn)
+        except Exception as e:
+            logger.error(f"Error running queued transaction: {str(e)}")
+            conn.execute("ROLLBACK TO queued_call")
+            conn.execute("RELEASE queued_call")
+            return future, None, e
+        conn.execute("RELEASE queued_call")
+        return future, value, None
+
+    # Reads
+
+    @contextmanager
+    def reader(self):
+        """Borrow a read connection from the pool"""
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+
+    @contextmanager
+    def dedicated_reader(self):
+        """Open a private read-only connection for long scans such as exports.
+
+        A streamed scan can last as long as a slow client takes to download it,
+        so it must not hold one of the pooled readers that every request needs.
+        """
+        conn = sqlite3.connect(f"{pathlib.Path(self.db_path).as_uri()}?mode=ro", uri=True,
+                               timeout=30, check_same_thread=False, isolation_level=None)
+        try:
+            conn.execute("PRAGMA busy_timeout=30000")
+            yield conn
+        finally:
+            conn.close()
+
+    def query(self, sql, params=(), wait_for_writes=False):
+        """Run a read query and return all rows.
+
+        wait_for_writes=True flushes queued writes first so the caller sees
+        its own earlier inserts.
+        """
+        if wait_for_writes:
+            self.flush()
+        with self.reader() as conn:
+            return conn.execute(sql, params).fetchall()
+
+    def query_one(self, sql, params=(), wait_for_writes=False):
+        rows = self.query(sql, params, wait_for_writes)
+        return rows[0] if rows else None
+
+    def close(self):
+        """Flush pending writes and close all connections"""
+        with self._queue_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._writes.put(_STOP)
+        self._writer.join(timeout=30)
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    """Return the process-wide Storage, created on first use"""
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            from services.migrations import apply_migrations
+            _storage = Storage()
+            atexit.register(_storage.close)
+            apply_migrations(_storage)
+    return _storage
@@ -1,16 +1,46 @@
-from components.model_configuration import model_config
-import sqlite3
+from services.llm_scheduler import INTERACTIVE
+from services.model_router import get_model_router
+from services.storage import get_storage
 from datetime import datetime
 import subprocess
 import tempfile
+import logging
+import time
 import os
 
+logger = logging.getLogger(__name__)
+
+# Grading is interactive, so it gets a shorter budget than question generation
+GRADING_DEADLINE = float(os.getenv('NEUROPREP_GRADING_DEADLINE', '8'))
+
 class ValidationService:
     def __init__(self, session_id):
         self.session_id = session_id
-        self.model = model_config()
+        self.router = get_model_router()
+
+    def _judge(self, prompt, label):
+        """Cascade a correct/incorrect verdict from the fast tier up; None if no tier gave one"""
+        is_correct = self.router.judge(label, prompt, deadline=GRADING_DEADLINE,
+                                       priority=INTERACTIVE, session=self.session_id)
+        if is_correct is None:
+            logger.warning(f"LLM grading unavailable for {label}, using fallback")
+        return is_correct
+
+    def _grade_mcq(self, prompt, label, user_answer, correct_answer):
+        # Picking the keyed option is decisive; only other answers need a model's judgement
+        if self._matches(user_answer, correct_answer):
+            self.router.record(label, self.session_id, [], None, 1.0, 'exact_match', time.monotonic())
+            return True
+        # With no verdict from any tier, a non-matching answer counts as incorrect
+        return bool(self._judge(prompt, label))
+
+    @staticmethod
+    def _matches(user_answer, correct_answer):
+        """Compare the chosen MCQ option with the answer key"""
+        normalize = lambda value: ' '.join(str(value).lower().split()).rstrip('.')
+        return normalize(user_answer) == normalize(correct_answer)
         
-    def validate_aptitude_answer(self, question, user_answer, correct_answer):
+    def validate_aptitude_answer(self, question, user_answer, correct_answer, category=None, question_number=None):
         """Validate aptitude answer using Gemini LLM"""
         prompt = f"""You are an AI validating an aptitude test answer.
 
@@ -24,10 +54,9 @@ class ValidationService:
         3. Numerical precision
         4. Logical equivalence
 
-        Respond with ONLY "correct" or "incorrect"."""
+        Respond with JSON: {{"verdict": "correct" or "incorrect", "confidence": 0.0-1.0}}."""
 
-        response = self.model.generate_content(prompt)
-        is_correct = response.text.strip().lower() == "correct"
+        is_correct = self._grade_mcq(prompt, 'grade_aptitude', user_answer, correct_answer)
         
         # Store the result
         self._store_question_response(
@@ -35,12 +64,14 @@ class ValidationService:
             question_text=question,
             user_answer=user_answer,
             correct_answer=correct_answer,
-            is_correct=is_correct
+            is_correct=is_correct,
+            category=category,
+            question_number=question_number
         )
         
         return is_correct
 
-    def validate_technical_answer(self, question, user_answer, correct_answer):
+    def validate_technical_answer(self, question, user_answer, correct_answer, category=None, question_number=None):
         """Validate technical answer using Gemini LLM"""
         prompt = f"""You are an AI validating a technical interview answer.
 
@@ -54,10 +85,9 @@ class ValidationService:
         3. Alternative valid approaches
         4. Level of detail
 
-        Respond with ONLY "correct" or "incorrect"."""
+        Respond with JSON: {{"verdict": "correct" or "incorrect", "confidence": 0.0-1.0}}."""
 
-        response = self.model.generate_content(prompt)
-        is_correct = response.text.strip().lower() == "correct"
+        is_correct = self._grade_mcq(prompt, 'grade_technical', user_answer, correct_answer)
         
         # Store the result
         self._store_question_response(
@@ -65,15 +95,15 @@ class ValidationService:
             question_text=question,
             user_answer=user_answer,
             correct_answer=correct_answer,
-            is_correct=is_correct
+            is_correct=is_correct,
+            category=category,
+            question_number=question_number
         )
         
         return is_correct
 
-    def validate_coding_solution(self, question, code, language):
-        """Validate coding solution using Gemini LLM and code execution"""
-        # First, validate the code structure and logic
-        prompt = f"""You are an AI validating a coding solution.
+    def _coding_prompt(self, question, code, language=''):
+        return f"""You are an AI validating a coding solution.
 
         Question: {question}
         Code:
@@ -87,15 +117,24 @@ class ValidationService:
         3. Time and space complexity
         4. Code quality and best practices
 
-        Respond with ONLY "correct" or "incorrect"."""
+        Respond with JSON: {{"verdict": "correct" or "incorrect", "confidence": 0.0-1.0}}."""
+
+    def validate_coding_solution(self, question, code, language):
+        """
+        Validate coding solution using Gemini LLM and code execution
+
+        Returns:
+            bool or None: the verdict, or None if the code runs but no model
+                reviewed it; such answers are stored ungraded and count as
+                incorrect until regrade_pending() grades them
+        """
+        # First, validate the code structure and logic
+        is_correct = self._judge(self._coding_prompt(question, code, language), 'grade_coding')
+
+        # Code that fails to run is incorrect whatever the review says
+        if is_correct is not False and not self._execute_code(code, language):
+            is_correct = False
 
-        response = self.model.generate_content(prompt)
-        is_correct = response.text.strip().lower() == "correct"
-        
-        # If the code is logically correct, try to execute it
-        if is_correct:
-            is_correct = self._execute_code(code, language)
-        
         # Store the result
         self._store_question_response(
             round_type="coding",
@@ -107,6 +146,24 @@ class ValidationService:
         
         return is_correct
 
+    def regrade_pending(self):
+        """Grade coding answers stored while no model could review them; returns how many were graded"""
+        pending = get_storage().query("""
+            SELECT id, question_text, user_answer
+            FROM question_responses
+            WHERE session_id = ? AND round_type = 'coding' AND is_correct IS NULL
+        """, (self.session_id,), wait_for_writes=True)
+
+        graded = 0
+        for response_id, question, code in pending:
+            is_correct = self._judge(self._coding_prompt(question, code), 'grade_coding')
+            if is_correct is None:
+                break  # Still no model available; try again on the next summary
+            get_storage().execute_write(
+                "UPDATE question_responses SET is_correct = ? WHERE id = ?", (is_correct, response_id))
+            graded += 1
+        return graded
+
     def _execute_code(self, code, language):
         """Execute code in a safe environment"""
         try:
@@ -144,42 +201,34 @@ class ValidationService:
             print(f"Error executing code: {str(e)}")
             return False
 
-    def _store_question_response(self, round_type, question_text, user_answer, correct_answer, is_correct):
+    def _store_question_response(self, round_type, question_text, user_answer, correct_answer, is_correct,
+                                 category=None, question_number=None):
         """Store question response in database"""
-        conn = sqlite3.connect('interview.db')
-        cursor = conn.cursor()
-        
-        cursor.execute("""
+        get_storage().execute_write("""
             INSERT INTO question_responses 
-            (session_id, round_type, question_text, user_answer, correct_answer, is_correct)
-            VALUES (?, ?, ?, ?, ?, ?)
+            (session_id, round_type, question_number, question_text, user_answer, correct_answer,
+             is_correct, category)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         """, (
             self.session_id,
             round_type,
+            question_number,
             question_text,
             user_answer,
             correct_answer,
-            is_correct
+            is_correct,
+            category
         ))
-        
-        conn.commit()
-        conn.close()
 
     def get_round_summary(self, round_type):
         """Get summary of round performance"""
-        conn = sqlite3.connect('interview.db')
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT 
-                COUNT(*) as total_questions,
-                SUM(CASE WHEN is_correct = 1 THEN 1 ELSE 0 END) as correct_answers
-            FROM question_responses
+        if round_type == 'coding':
+            self.regrade_pending()
+        result = get_storage().query_one("""
+            SELECT total_questions, correct_answers
+            FROM round_summary
             WHERE session_id = ? AND round_type = ?
-        """, (self.session_id, round_type))
-        
-        result = cursor.fetchone()
-        conn.close()
+        """, (self.session_id, round_type), wait_for_writes=True)
         
         if result and result[0] > 0:
             return {
@@ -195,14 +244,8 @@ class ValidationService:
 
     def _store_round_completion(self, round_type):
         """Store round completion in database"""
-        conn = sqlite3.connect('interview.db')
-        cursor = conn.cursor()
-        
-        cursor.execute("""
+        get_storage().execute_write("""
             INSERT INTO round_completions 
             (session_id, round_type, completed_at)
             VALUES (?, ?, datetime('now'))
-        """, (self.session_id, round_type))
-        
-        conn.commit()
-        conn.close() 
\ No newline at end of file
+        """, (self.session_id, round_type)) 
\ No newline at end of file
@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+# Tests import the app's packages (services, components, ...) from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    """A migrated Storage on a temporary database, installed as the process-wide one"""
+    from services import storage as storage_module
+    from services.migrations import apply_migrations
+
+    store = storage_module.Storage(db_path=str(tmp_path / 'interview.db'), read_pool_size=2)
+    apply_migrations(store)
+    monkeypatch.setattr(storage_module, '_storage', store)
+    yield store
+    store.close()
@@ -0,0 +1,29 @@
+import pytest
+from flask import Flask
+
+from utils.admin_auth import admin_required
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+
+    @app.route('/secret')
+    @admin_required
+    def secret():
+        return 'ok'
+
+    return app.test_client()
+
+
+def test_disabled_without_configured_token(client, monkeypatch):
+    monkeypatch.delenv('NEUROPREP_ADMIN_TOKEN', raising=False)
+    assert client.get('/secret', headers={'Authorization': 'Bearer anything'}).status_code == 403
+
+
+def test_requires_matching_token(client, monkeypatch):
+    monkeypatch.setenv('NEUROPREP_ADMIN_TOKEN', 's3cret')
+    assert client.get('/secret').status_code == 401
+    assert client.get('/secret', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert client.get('/secret', headers={'Authorization': 'Bearer s3cret'}).data == b'ok'
+    assert client.get('/secret', headers={'X-Admin-Token': 's3cret'}).data == b'ok'
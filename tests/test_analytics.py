@@ -0,0 +1,62 @@
+import uuid
+
+import pytest
+
+pytest.importorskip('pandas')
+
+from services.analytics import CohortAnalytics
+
+
+def _candidate(storage, incidents):
+    """Rows keyed the way app.py writes them: the Flask user id for proctoring
+    and speech, a separate interview session uuid for responses and rounds"""
+    user_id, session_id = str(uuid.uuid4()), str(uuid.uuid4())
+    storage.execute_write("INSERT INTO session_users (session_id, user_id) VALUES (?, ?)", (session_id, user_id))
+    storage.executemany_write(
+        "INSERT INTO round_completions (session_id, round_type, completed_at) VALUES (?, ?, ?)",
+        [(session_id, 'aptitude', '2024-01-01 10:10:00'), (session_id, 'technical', '2024-01-01 10:30:00')])
+    storage.execute_write(
+        "INSERT INTO question_responses (session_id, round_type, question_number, is_correct) VALUES (?, ?, ?, ?)",
+        (session_id, 'aptitude', 1, 1))
+    storage.execute_write(
+        "INSERT INTO speech_metrics (session_id, round_type, emotion, confidence_level) VALUES (?, ?, ?, ?)",
+        (user_id, 'hr', 'neutral', 0.5))
+    storage.executemany_write(
+        "INSERT INTO proctoring_incident_intervals (session_id, incident_type, started_at, ended_at, "
+        "peak_confidence, mean_confidence, frame_count) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(user_id, incident_type, started_at, started_at, 0.9, 0.8, 3) for incident_type, started_at in incidents])
+    return user_id, session_id
+
+
+def test_incidents_are_attributed_to_rounds_through_the_session_mapping(storage):
+    _candidate(storage, [('phone_detected', '2024-01-01 10:05:00'),
+                         ('eye_distraction', '2024-01-01 10:20:00'),
+                         ('eye_distraction', '2024-01-01 10:45:00')])
+    _candidate(storage, [('phone_detected', '2024-01-01 10:25:00')])
+    storage.flush()
+
+    analytics = CohortAnalytics()
+    analytics.refresh(force=True)
+    rates = {row['round_type']: row for row in analytics.incident_rates()}
+    assert set(rates) == {'aptitude', 'technical', 'unattributed'}
+    assert rates['aptitude']['incidents'] == 1
+    assert rates['aptitude']['sessions'] == 2
+    assert rates['aptitude']['by_type'] == {'phone_detected': 1}
+    assert rates['technical']['incidents'] == 2
+    assert rates['technical']['sessions_with_incidents'] == 2
+    assert rates['technical']['incidents_per_session'] == 1.0
+    assert rates['unattributed']['incidents'] == 1
+
+
+def test_incidents_of_a_user_with_two_sessions_are_counted_once(storage):
+    user_id, _ = _candidate(storage, [('phone_detected', '2024-01-01 10:05:00')])
+    later = str(uuid.uuid4())
+    storage.execute_write("INSERT INTO session_users (session_id, user_id) VALUES (?, ?)", (later, user_id))
+    storage.execute_write("INSERT INTO round_completions (session_id, round_type, completed_at) VALUES (?, ?, ?)",
+                          (later, 'aptitude', '2024-02-01 10:10:00'))
+    storage.flush()
+
+    analytics = CohortAnalytics()
+    analytics.refresh(force=True)
+    rates = analytics.incident_rates()
+    assert [(row['round_type'], row['incidents']) for row in rates] == [('aptitude', 1)]
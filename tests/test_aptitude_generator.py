@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from components.aptitude_generator import (CATEGORIES, OPTION_COUNT, _LEXICON, _LEXICON_GROUP, _TEMPLATES,
+                                           _stands_out, generate_aptitude_items, generate_aptitude_questions)
+
+TEMPLATES = [(category, template) for category in CATEGORIES for template in _TEMPLATES[category]]
+
+
+@pytest.mark.parametrize('difficulty', [1, 2, 3])
+@pytest.mark.parametrize('category,template', TEMPLATES, ids=[t.__name__ for _, t in TEMPLATES])
+def test_every_template_keys_exactly_one_of_its_options(category, template, difficulty):
+    rng = random.Random(f"{template.__name__}:{difficulty}")
+    for _ in range(300):
+        question, answer, distractors = template(rng, difficulty)
+        assert len(distractors) >= OPTION_COUNT - 1, question
+        options = [answer] + distractors[:OPTION_COUNT - 1]
+        assert len(set(options)) == OPTION_COUNT, question
+        assert all(str(option).strip() for option in options), question
+
+
+@pytest.mark.parametrize('difficulty', [1, 2, 3])
+def test_odd_one_out_has_a_single_defensible_answer(difficulty):
+    template = next(t for _, t in TEMPLATES if t.__name__ == '_odd_one_out')
+    rng = random.Random(difficulty)
+    for _ in range(2000):
+        question, answer, distractors = template(rng, difficulty)
+        numbers = [int(answer)] + [int(n) for n in distractors]
+        assert _stands_out(numbers, int(answer)) or difficulty > 1, question
+        assert not any(_stands_out(numbers, int(n)) for n in distractors), question
+
+
+@pytest.mark.parametrize('difficulty', [1, 2, 3])
+@pytest.mark.parametrize('name,column', [('_synonym', 1), ('_antonym', 2)])
+def test_verbal_distractors_never_answer_the_question(name, column, difficulty):
+    template = next(t for _, t in TEMPLATES if t.__name__ == name)
+    by_word = {entry[0]: entry for entry in _LEXICON}
+    # Words that answer (or nearly answer) a question about a word in the same group
+    answers = {}
+    for entry in _LEXICON:
+        answers.setdefault(_LEXICON_GROUP[entry[0]], set()).update(entry[1:3])
+    rng = random.Random(difficulty)
+    for _ in range(1000):
+        question, answer, distractors = template(rng, difficulty)
+        word = question.rsplit(' ', 1)[1]
+        assert answer == by_word[word][column], question
+        trap = by_word[word][3 - column]
+        related = answers[_LEXICON_GROUP[word]] - {trap}
+        assert not related.intersection(distractors), question
+
+
+def test_items_are_balanced_distinct_and_reproducible():
+    items = generate_aptitude_items(200, seed='candidate')
+    assert len(items) == 200
+    assert len({item['question'] for item in items}) == 200
+    assert {item['category'] for item in items} == set(CATEGORIES)
+    for item in items:
+        assert item['answer'] in item['options']
+        assert len(set(item['options'])) == OPTION_COUNT
+    assert generate_aptitude_items(200, seed='candidate') == items
+
+
+def test_level_keeps_difficulty_near_its_base():
+    questions = generate_aptitude_questions(30, seed=1, level='beginner')
+    assert len(questions) == 30
+    items = generate_aptitude_items(100, seed=1, difficulty=1)
+    assert {item['difficulty'] for item in items} <= {1, 2}
@@ -0,0 +1,50 @@
+import random
+
+from services.cohort_percentiles import OVERALL, CohortPercentiles, KLLSketch
+
+
+def test_kll_rank_error_stays_within_bounds():
+    random.seed(7)
+    values = [random.gauss(60, 15) for _ in range(50000)]
+    sketch = KLLSketch(k=200)
+    for value in values:
+        sketch.update(value)
+    values.sort()
+    assert sketch.n == len(values)
+    assert sum(len(items) for items in sketch.compactors) < 1000
+    worst = max(abs(sketch.rank(values[i]) - (i + 0.5) / len(values))
+                for i in range(0, len(values), 250))
+    assert worst < 0.02
+
+
+def test_merged_sketches_answer_like_one_sketch():
+    random.seed(3)
+    left, right = KLLSketch(k=200), KLLSketch(k=200)
+    for value in range(10000):
+        (left if random.random() < 0.5 else right).update(value)
+    merged = left.merge(right)
+    assert merged.n == 10000
+    assert abs(merged.quantile(0.5) - 5000) < 200
+    assert abs(merged.rank(2500) - 0.25) < 0.02
+
+
+def test_round_is_recorded_once_per_session(storage):
+    cohort = CohortPercentiles()
+    assert cohort.record('aptitude', 70.0, {'verbal_ability': 50.0}, session_id=1)
+    assert not cohort.record('aptitude', 90.0, {'verbal_ability': 100.0}, session_id=1)
+    assert cohort.record('technical', 80.0, session_id=1)
+    assert cohort.cohort_size('aptitude') == 1
+    assert cohort.cohort_size('aptitude', 'verbal_ability') == 1
+    assert cohort.percentile('aptitude', 70.0) == 50.0
+
+
+def test_writers_sharing_a_database_merge_instead_of_overwriting(storage):
+    # Two instances stand in for two server processes
+    first, second = CohortPercentiles(), CohortPercentiles()
+    first.cohort_size('hr'), second.cohort_size('hr')
+    for session_id in range(10):
+        (first if session_id % 2 else second).record('hr', float(session_id), session_id=session_id)
+
+    assert CohortPercentiles().cohort_size('hr') == 10
+    assert storage.query_one("SELECT count FROM score_sketches WHERE round_type = 'hr' AND category = ?",
+                             (OVERALL,), wait_for_writes=True) == (10,)
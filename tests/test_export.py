@@ -0,0 +1,36 @@
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+
+from services.export import iter_record_batches, stream_table
+
+
+def _insert_responses(storage, sessions, per_session):
+    storage.executemany_write(
+        "INSERT INTO question_responses (session_id, round_type, question_number, question_text, "
+        "user_answer, correct_answer, is_correct, category) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        [(f"s{s}", 'aptitude', q, f"Q{q}", 'a', 'a', 1, 'numerical_ability')
+         for s in range(sessions) for q in range(per_session)])
+    storage.flush()
+
+
+def test_export_streams_every_row_in_chunks(storage):
+    _insert_responses(storage, sessions=3, per_session=5)
+    batches = iter_record_batches('question_responses', chunk_size=4)
+    schema = next(batches)
+    sizes = [batch.num_rows for batch in batches]
+    assert 'session_last_seen' in schema.names
+    assert sizes == [4, 4, 4, 3]
+
+    data = b''.join(stream_table('question_responses', fmt='arrow', chunk_size=4))
+    assert pa.ipc.open_stream(data).read_all().num_rows == 15
+
+
+def test_export_does_not_hold_a_pooled_reader(storage):
+    _insert_responses(storage, sessions=2, per_session=3)
+    chunks = stream_table('question_responses', fmt='arrow', chunk_size=1)
+    next(chunks)
+    # A download in progress must leave the whole pool to ordinary queries
+    assert storage._readers.qsize() == 2
+    assert storage.query_one("SELECT COUNT(*) FROM question_responses")[0] == 6
+    chunks.close()
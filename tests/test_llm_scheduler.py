@@ -0,0 +1,69 @@
+import threading
+import time
+
+import pytest
+
+from services.llm_scheduler import BACKGROUND, INTERACTIVE, REFILL, LLMScheduler, QueueTimeout
+
+MODEL = 'gemini-test'
+
+
+def _queued(scheduler):
+    return sum(scheduler.get_stats()['models'][MODEL]['queued'].values())
+
+
+def _grant_order(waiters):
+    """Queue waiters behind a held slot, one at a time, and return the order they are granted in"""
+    scheduler = LLMScheduler(default_rpm=60000, burst=1000, max_in_flight=1)
+    held = scheduler.acquire(MODEL, INTERACTIVE)
+    order, threads = [], []
+
+    def wait(label, priority, session):
+        with scheduler.slot(MODEL, priority, session, timeout=5):
+            order.append(label)
+
+    for label, priority, session in waiters:
+        expected = _queued(scheduler) + 1
+        thread = threading.Thread(target=wait, args=(label, priority, session))
+        thread.start()
+        threads.append(thread)
+        deadline = time.monotonic() + 5
+        while _queued(scheduler) < expected and time.monotonic() < deadline:
+            time.sleep(0.001)
+
+    scheduler.release(held)
+    for thread in threads:
+        thread.join(timeout=5)
+    return order
+
+
+def test_higher_priority_classes_are_served_first():
+    order = _grant_order([
+        ('background', BACKGROUND, 's1'),
+        ('refill', REFILL, 's2'),
+        ('interactive', INTERACTIVE, 's3')
+    ])
+    assert order == ['interactive', 'refill', 'background']
+
+
+def test_sessions_take_turns_within_a_class():
+    order = _grant_order([
+        ('a1', REFILL, 'a'),
+        ('a2', REFILL, 'a'),
+        ('a3', REFILL, 'a'),
+        ('b1', REFILL, 'b'),
+        ('c1', REFILL, 'c')
+    ])
+    assert order == ['a1', 'b1', 'c1', 'a2', 'a3']
+
+
+def test_zero_timeout_does_not_overtake_waiters():
+    scheduler = LLMScheduler(default_rpm=60000, burst=1000, max_in_flight=1)
+    held = scheduler.acquire(MODEL, INTERACTIVE)
+    with pytest.raises(QueueTimeout):
+        scheduler.acquire(MODEL, INTERACTIVE, timeout=0)
+    scheduler.release(held)
+    scheduler.release(scheduler.acquire(MODEL, BACKGROUND, timeout=0))
+    stats = scheduler.get_stats()
+    assert stats['classes']['interactive']['timeouts'] == 1
+    assert stats['models'][MODEL]['in_flight'] == 0
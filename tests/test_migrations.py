@@ -0,0 +1,86 @@
+import random
+import shutil
+
+import pytest
+
+from services.migrations import MIGRATIONS_DIR, apply_migrations, list_migrations
+from services.storage import Storage
+
+# Summary tables key sessions as TEXT, so the detail side is cast to match
+ROUND_SUMMARY = ("SELECT CAST(session_id AS TEXT), round_type, COUNT(*), "
+                 "SUM(CASE WHEN is_correct = 1 THEN 1 ELSE 0 END) "
+                 "FROM question_responses GROUP BY session_id, round_type ORDER BY 1, 2")
+SPEECH_SUMMARY = ("SELECT CAST(session_id AS TEXT), round_type, COUNT(*), AVG(confidence_level), "
+                  "AVG(speech_rate), AVG(clarity_score), AVG(volume_variation) FROM speech_metrics "
+                  "GROUP BY session_id, round_type ORDER BY 1, 2")
+EMOTION_COUNTS = ("SELECT CAST(session_id AS TEXT), emotion, COUNT(*) FROM speech_metrics "
+                  "WHERE emotion IS NOT NULL GROUP BY session_id, emotion ORDER BY 1, 2")
+INCIDENT_SUMMARY = ("SELECT session_id, incident_type, COUNT(*), SUM(frame_count), MAX(peak_confidence) "
+                    "FROM proctoring_incident_intervals GROUP BY session_id, incident_type ORDER BY 1, 2")
+
+
+def _insert_activity(storage, seed):
+    rng = random.Random(seed)
+    storage.executemany_write(
+        "INSERT INTO question_responses (session_id, round_type, question_number, is_correct) VALUES (?, ?, ?, ?)",
+        [(rng.randint(1, 5), rng.choice(['aptitude', 'technical', 'coding']), n, rng.choice([0, 1, None]))
+         for n in range(300)])
+    storage.executemany_write(
+        "INSERT INTO speech_metrics (session_id, round_type, emotion, confidence_level, speech_rate, "
+        "clarity_score, volume_variation) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(rng.randint(1, 5), rng.choice(['introduction', 'hr']), rng.choice(['happy', 'neutral', None]),
+          rng.random(), rng.uniform(80, 180), rng.random(), rng.random()) for _ in range(300)])
+    storage.executemany_write(
+        "INSERT INTO proctoring_incident_intervals (session_id, incident_type, started_at, ended_at, "
+        "peak_confidence, mean_confidence, frame_count) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(str(rng.randint(1, 5)), rng.choice(['phone_detected', 'eye_distraction']),
+          '2024-01-01 10:00:00', '2024-01-01 10:00:05', rng.random(), rng.random(), rng.randint(1, 20))
+         for _ in range(100)])
+    storage.flush()
+
+
+def _assert_summaries_match_group_by(storage):
+    summary = storage.query("SELECT * FROM round_summary ORDER BY 1, 2")
+    assert [tuple(row) for row in summary] == storage.query(ROUND_SUMMARY)
+
+    speech = storage.query("SELECT * FROM speech_round_summary ORDER BY 1, 2")
+    expected = storage.query(SPEECH_SUMMARY)
+    assert [row[:3] for row in speech] == [row[:3] for row in expected]
+    for row, want in zip(speech, expected):
+        assert row[3:] == pytest.approx(want[3:])
+
+    assert storage.query("SELECT * FROM speech_emotion_counts ORDER BY 1, 2") == storage.query(EMOTION_COUNTS)
+    incidents = storage.query("SELECT session_id, incident_type, intervals, frames, peak_confidence "
+                              "FROM incident_summary ORDER BY 1, 2")
+    assert incidents == storage.query(INCIDENT_SUMMARY)
+
+
+def test_migrations_apply_in_order_and_only_once(storage):
+    latest = list_migrations()[-1][0]
+    assert storage.query_one("PRAGMA user_version")[0] == latest
+    assert apply_migrations(storage) == []
+
+
+def test_triggers_keep_summaries_equal_to_group_by(storage):
+    _insert_activity(storage, seed=1)
+    _assert_summaries_match_group_by(storage)
+
+
+def test_summary_backfill_matches_group_by(tmp_path):
+    early = tmp_path / 'early'
+    early.mkdir()
+    for version, path in list_migrations():
+        if version <= 2:
+            shutil.copy(path, early)
+
+    storage = Storage(db_path=str(tmp_path / 'old.db'), read_pool_size=1)
+    try:
+        assert apply_migrations(storage, str(early)) == [1, 2]
+        _insert_activity(storage, seed=2)
+        apply_migrations(storage, MIGRATIONS_DIR)
+        _assert_summaries_match_group_by(storage)
+        # Rows added after the backfill are maintained by the triggers
+        _insert_activity(storage, seed=3)
+        _assert_summaries_match_group_by(storage)
+    finally:
+        storage.close()
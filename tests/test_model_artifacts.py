@@ -0,0 +1,74 @@
+import hashlib
+import json
+
+import pytest
+
+from services.model_artifacts import ArtifactError, ArtifactManager
+
+
+@pytest.fixture
+def weights(tmp_path):
+    path = tmp_path / 'weights.pt'
+    path.write_bytes(b'model weights')
+    return path
+
+
+def _manager(tmp_path, entries, allow_download=False):
+    manifest = tmp_path / 'manifest.json'
+    manifest.write_text(json.dumps(entries))
+    manager = ArtifactManager(manifest_path=str(manifest), store_dir=str(tmp_path / 'store'))
+    manager.allow_download = allow_download
+    return manager
+
+
+def test_prefetch_pin_records_digest_and_resolves(tmp_path, weights):
+    manager = _manager(tmp_path, {'w': {'kind': 'file', 'url': weights.as_uri(),
+                                        'filename': 'w.pt', 'sha256': None}})
+    with pytest.raises(ArtifactError):
+        manager.prefetch('w')
+
+    path = manager.prefetch('w', pin=True)
+    digest = hashlib.sha256(b'model weights').hexdigest()
+    assert json.loads((tmp_path / 'manifest.json').read_text())['w']['sha256'] == digest
+    assert manager.resolve('w') == path
+    assert manager.verify('w')
+
+
+def test_checksum_mismatch_is_rejected(tmp_path, weights):
+    manager = _manager(tmp_path, {'w': {'kind': 'file', 'url': weights.as_uri(),
+                                        'filename': 'w.pt', 'sha256': '0' * 64}}, allow_download=True)
+    with pytest.raises(ArtifactError, match='Checksum mismatch'):
+        manager.resolve('w')
+
+
+def test_unpinned_entries_never_resolve(tmp_path, weights):
+    manager = _manager(tmp_path, {
+        'w': {'kind': 'file', 'url': weights.as_uri(), 'filename': 'w.pt', 'sha256': None},
+        'hf': {'kind': 'huggingface', 'repo_id': 'org/model', 'revision': 'main', 'sha256': 'a' * 64}
+    }, allow_download=True)
+    with pytest.raises(ArtifactError, match='not pinned'):
+        manager.resolve('w')
+    # A branch name is not a pin even when a digest is recorded
+    with pytest.raises(ArtifactError, match='not pinned'):
+        manager.resolve('hf')
+    assert manager.status()['hf']['pinned'] is False
+
+
+def test_unavailable_lists_each_model_a_feature_would_run_without(tmp_path, weights):
+    manager = _manager(tmp_path, {
+        'w': {'kind': 'file', 'feature': 'phone detection', 'url': weights.as_uri(),
+              'filename': 'w.pt', 'sha256': None},
+        'x': {'kind': 'file', 'feature': 'emotion analysis', 'url': weights.as_uri(),
+              'filename': 'x.pt', 'sha256': hashlib.sha256(b'model weights').hexdigest()}
+    })
+    assert manager.unavailable() == {'w': 'not pinned in the manifest',
+                                     'x': 'not prefetched into the local store'}
+
+    manager.prefetch('w', pin=True)
+    manager.prefetch('x')
+    assert manager.unavailable() == {}
+
+
+def test_shipped_manifest_names_the_feature_of_every_model():
+    manager = ArtifactManager()
+    assert all(info['feature'] for info in manager.status().values())
@@ -0,0 +1,51 @@
+import json
+import os
+
+import numpy as np
+
+from services.question_index import BANK_PATH, QuestionIndex
+
+
+def test_build_then_load_round_trips(tmp_path):
+    with open(BANK_PATH, 'r', encoding='utf-8') as f:
+        items = json.load(f)
+    built = QuestionIndex.build(items, str(tmp_path / 'technical-test'))
+    loaded = QuestionIndex.load(str(tmp_path / 'technical-test'))
+
+    assert loaded.items == items
+    assert isinstance(loaded.vectors, np.memmap)
+    np.testing.assert_allclose(np.linalg.norm(loaded.vectors, axis=1), 1.0, atol=1e-5)
+    query = 'SQL indexes, transactions and query planning'
+    np.testing.assert_allclose(built.embed([query]), loaded.embed([query]), atol=1e-6)
+    assert [item['question'] for _, item in built.search(query, k=5)] == \
+           [item['question'] for _, item in loaded.search(query, k=5)]
+    assert loaded.search(query, k=5)[0][1]['category'] == 'databases'
+
+
+def test_open_reuses_the_index_until_the_bank_changes(tmp_path):
+    bank = tmp_path / 'bank.json'
+    with open(BANK_PATH, 'r', encoding='utf-8') as f:
+        items = json.load(f)
+    bank.write_text(json.dumps(items[:40]), encoding='utf-8')
+    index_dir = tmp_path / 'index'
+
+    QuestionIndex.open(str(bank), str(index_dir))
+    first = os.listdir(index_dir)
+    assert len(QuestionIndex.open(str(bank), str(index_dir)).items) == 40
+    assert os.listdir(index_dir) == first
+
+    bank.write_text(json.dumps(items[:50]), encoding='utf-8')
+    assert len(QuestionIndex.open(str(bank), str(index_dir)).items) == 50
+    assert len(os.listdir(index_dir)) == 2
+
+
+def test_candidate_ranking_caps_each_category(tmp_path):
+    with open(BANK_PATH, 'r', encoding='utf-8') as f:
+        items = json.load(f)
+    index = QuestionIndex.build(items, str(tmp_path / 'technical-test'))
+    ranked = index.for_candidate('PostgreSQL, MySQL, database design', max_per_category=3)
+    assert len(ranked) == len(items)
+    top = [item['category'] for _, item in ranked[:6]]
+    assert top.count('databases') == 3
+    scores = [score for score, _ in ranked[:3]]
+    assert scores == sorted(scores, reverse=True)
@@ -0,0 +1,66 @@
+import os
+
+from services.session_journal import SessionJournal
+
+
+def _restart(journal_dir):
+    journal = SessionJournal(journal_dir=str(journal_dir), fsync_window_ms=0)
+    journal.recover()
+    return journal.start()
+
+
+def _tear(journal_dir):
+    # A crash mid-write leaves a record without its trailing newline
+    segment = sorted(name for name in os.listdir(journal_dir) if name.startswith('segment-'))[-1]
+    with open(os.path.join(journal_dir, segment), 'ab') as f:
+        f.write(b'{"seq":99,"ts":1.0,"sid":"s1","ty')
+
+
+def test_events_after_a_torn_segment_survive_a_second_restart(tmp_path):
+    journal = _restart(tmp_path)
+    journal.append('s1', 'session_started', {'db_session_id': 7}, sync=True)
+    journal.close()
+    _tear(tmp_path)
+
+    journal = _restart(tmp_path)
+    assert journal.get_session('s1')['db_session_id'] == 7
+    journal.append('s1', 'voice_cursor', {'round_type': 'technical', 'index': 3}, sync=True)
+    journal.close()
+
+    journal = _restart(tmp_path)
+    session = journal.get_session('s1')
+    journal.close()
+    assert session['db_session_id'] == 7
+    assert session['voice'] == {'round_type': 'technical', 'index': 3}
+
+
+def test_segment_holding_only_a_partial_record_is_reused_cleanly(tmp_path):
+    with open(tmp_path / 'segment-000000000001.jsonl', 'wb') as f:
+        f.write(b'{"seq":1,"ts":1.0,"sid"')
+
+    journal = _restart(tmp_path)
+    assert journal.seq == 0
+    journal.append('s1', 'voice_cursor', {'round_type': 'hr', 'index': 1}, sync=True)
+    journal.close()
+    _tear(tmp_path)
+
+    journal = _restart(tmp_path)
+    journal.append('s1', 'voice_cursor', {'round_type': 'hr', 'index': 2}, sync=True)
+    journal.close()
+
+    journal = _restart(tmp_path)
+    assert journal.seq == 2
+    assert journal.get_session('s1')['voice'] == {'round_type': 'hr', 'index': 2}
+    journal.close()
+
+
+def test_recovery_replays_only_events_after_the_snapshot(tmp_path):
+    journal = SessionJournal(journal_dir=str(tmp_path), fsync_window_ms=0, snapshot_every=3).start()
+    for index in range(7):
+        journal.append('s1', 'voice_cursor', {'round_type': 'hr', 'index': index}, sync=True)
+    journal.close()
+
+    journal = _restart(tmp_path)
+    assert journal.seq == 7
+    assert journal.get_session('s1')['voice']['index'] == 6
+    journal.close()
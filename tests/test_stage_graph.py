@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+
+from pipelines.stage_graph import StageCache, StageGraph
+
+
+def _graph(calls, fail_once=()):
+    graph = StageGraph(cache=StageCache(), max_workers=4)
+    failures = set(fail_once)
+    lock = threading.Lock()
+
+    def track(name):
+        with lock:
+            calls[name] = calls.get(name, 0) + 1
+            if name in failures:
+                failures.discard(name)
+                raise RuntimeError(f"{name} failed")
+
+    @graph.stage('parsed', deps=['resume'])
+    def parsed(resume):
+        track('parsed')
+        time.sleep(0.05)
+        return resume.upper()
+
+    @graph.stage('coding', deps=['parsed'])
+    def coding(parsed):
+        track('coding')
+        return f"coding:{parsed}"
+
+    @graph.stage('technical', deps=['parsed', 'coding'])
+    def technical(parsed, coding):
+        track('technical')
+        return f"technical:{parsed}:{coding}"
+
+    return graph
+
+
+def test_shared_dependencies_run_once_across_concurrent_runs():
+    calls = {}
+    graph = _graph(calls)
+    runs = [graph.run(['technical', 'coding'], {'resume': 'cv'}) for _ in range(5)]
+    for futures in runs:
+        assert futures['technical'].result(timeout=5) == 'technical:CV:coding:CV'
+        assert futures['coding'].result(timeout=5) == 'coding:CV'
+    assert calls == {'parsed': 1, 'coding': 1, 'technical': 1}
+
+
+def test_cached_targets_skip_their_upstream_stages():
+    calls, done = {}, []
+    graph = _graph(calls)
+    graph.run(['technical'], {'resume': 'cv'})['technical'].result(timeout=5)
+
+    futures = graph.run(['technical'], {'resume': 'cv'},
+                        on_stage_done=lambda name, cached, error: done.append((name, cached)))
+    assert futures['technical'].result(timeout=5).startswith('technical:')
+    assert set(futures) == {'technical'}
+    assert done == [('technical', True)]
+
+    graph.run(['technical'], {'resume': 'other'})['technical'].result(timeout=5)
+    assert calls == {'parsed': 2, 'coding': 2, 'technical': 2}
+
+
+def test_failed_stage_is_retried_on_the_next_run():
+    calls = {}
+    graph = _graph(calls, fail_once=['coding'])
+    futures = graph.run(['technical'], {'resume': 'cv'})
+    with pytest.raises(RuntimeError, match='coding failed'):
+        futures['technical'].result(timeout=5)
+
+    futures = graph.run(['technical'], {'resume': 'cv'})
+    assert futures['technical'].result(timeout=5) == 'technical:CV:coding:CV'
+    # The successful upstream stage stayed cached; only the failed path reran
+    assert calls == {'parsed': 1, 'coding': 2, 'technical': 1}
+
+
+def test_cycles_and_unknown_stages_are_rejected():
+    graph = StageGraph(cache=StageCache())
+    graph.stage('a', deps=['b'])(lambda b: b)
+    graph.stage('b', deps=['a'])(lambda a: a)
+    with pytest.raises(ValueError):
+        graph.run(['a'], {})
+    with pytest.raises(KeyError):
+        graph.run(['missing'], {})
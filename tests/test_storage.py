@@ -0,0 +1,54 @@
+import threading
+
+import pytest
+
+from services.storage import Storage
+
+
+def test_write_after_close_raises_instead_of_hanging(tmp_path):
+    store = Storage(db_path=str(tmp_path / 'closed.db'), read_pool_size=1)
+    store.close()
+    with pytest.raises(RuntimeError):
+        store.execute_write("CREATE TABLE t (x INTEGER)", wait=True)
+    store.flush(timeout=1)
+
+
+def test_writes_racing_close_are_committed_or_rejected(tmp_path):
+    store = Storage(db_path=str(tmp_path / 'race.db'), read_pool_size=1)
+    store.execute_write("CREATE TABLE t (x INTEGER)", wait=True)
+    outcomes = []
+
+    def write(value):
+        try:
+            store.execute_write("INSERT INTO t (x) VALUES (?)", (value,), wait=True)
+            outcomes.append('committed')
+        except RuntimeError:
+            outcomes.append('rejected')
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(50)]
+    for i, thread in enumerate(threads):
+        thread.start()
+        if i == 25:
+            store.close()
+    for thread in threads:
+        thread.join(timeout=5)
+    assert not any(thread.is_alive() for thread in threads)
+    assert len(outcomes) == 50
+
+    reopened = Storage(db_path=str(tmp_path / 'race.db'), read_pool_size=1)
+    assert reopened.query_one("SELECT COUNT(*) FROM t")[0] == outcomes.count('committed')
+    reopened.close()
+
+
+def test_failed_transaction_callback_rolls_back_alone(storage):
+    storage.execute_write("CREATE TABLE t (x INTEGER)", wait=True)
+
+    def failing(conn):
+        conn.execute("INSERT INTO t (x) VALUES (1)")
+        raise ValueError("boom")
+
+    pending = storage.execute_write("INSERT INTO t (x) VALUES (2)")
+    with pytest.raises(ValueError):
+        storage.run_in_transaction(failing)
+    pending.result()
+    assert storage.run_in_transaction(lambda conn: conn.execute("SELECT x FROM t").fetchall()) == [(2,)]
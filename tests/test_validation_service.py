@@ -0,0 +1,47 @@
+from services.validation_service import ValidationService
+
+
+class ScriptedRouter:
+    """Returns queued verdicts; None stands for every tier being unavailable"""
+
+    def __init__(self, verdicts):
+        self.verdicts = list(verdicts)
+
+    def judge(self, task, prompt, **kwargs):
+        return self.verdicts.pop(0)
+
+    def record(self, *args):
+        pass
+
+
+def _service(verdicts, session_id='s1'):
+    service = ValidationService(session_id)
+    service.router = ScriptedRouter(verdicts)
+    return service
+
+
+def test_coding_answer_without_a_verdict_is_pending_then_regraded(storage):
+    service = _service([None])
+    assert service.validate_coding_solution('Print one', 'print(1)', 'python') is None
+    assert storage.query_one("SELECT is_correct FROM question_responses", wait_for_writes=True) == (None,)
+
+    service.router = ScriptedRouter([None])
+    assert service.get_round_summary('coding')['correct_answers'] == 0
+
+    service.router = ScriptedRouter([True])
+    summary = service.get_round_summary('coding')
+    assert summary == {'total_questions': 1, 'correct_answers': 1, 'score': 100.0}
+    assert storage.query_one("SELECT is_correct FROM question_responses", wait_for_writes=True) == (1,)
+
+
+def test_coding_answer_that_fails_to_run_is_incorrect_without_a_verdict(storage):
+    service = _service([None])
+    assert service.validate_coding_solution('Print one', 'raise SystemExit(1)', 'python') is False
+    assert service.get_round_summary('coding')['correct_answers'] == 0
+
+
+def test_mcq_without_a_verdict_is_incorrect(storage):
+    service = _service([None])
+    assert not service.validate_aptitude_answer('2 + 2?', '5', '4', question_number=1)
+    assert service.validate_aptitude_answer('2 + 2?', '4', '4', question_number=2)
+    assert service.get_round_summary('aptitude')['correct_answers'] == 1
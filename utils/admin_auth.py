@@ -0,0 +1,32 @@
+import functools
+import hmac
+import os
+
+from flask import jsonify, request
+
+ADMIN_TOKEN_ENV = 'NEUROPREP_ADMIN_TOKEN'
+
+
+def _presented_token():
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Bearer '):
+        return header[len('Bearer '):].strip()
+    return request.headers.get('X-Admin-Token', '')
+
+
+def admin_required(view):
+    """Restrict a route to operators holding NEUROPREP_ADMIN_TOKEN.
+
+    The token is sent as ``Authorization: Bearer <token>`` (or
+    ``X-Admin-Token``). Without a configured token the route is disabled
+    rather than open, since the server listens on every interface.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        expected = os.getenv(ADMIN_TOKEN_ENV, '')
+        if not expected:
+            return jsonify({'success': False, 'error': 'Admin access is not configured'}), 403
+        if not hmac.compare_digest(_presented_token().encode('utf-8'), expected.encode('utf-8')):
+            return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+        return view(*args, **kwargs)
+    return wrapper
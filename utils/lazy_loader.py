@@ -0,0 +1,99 @@
+import importlib
+import logging
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# module name -> seconds spent importing it (first import only)
+IMPORT_TIMINGS = {}
+_timings_lock = threading.Lock()
+_warmup_state = {'started': False, 'finished': False, 'errors': {}}
+
+
+def timed_import(module_name):
+    """Import a module and record how long the first import took."""
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    elapsed = time.perf_counter() - start
+
+    with _timings_lock:
+        IMPORT_TIMINGS.setdefault(module_name, elapsed)
+    logger.info(f"Imported {module_name} in {elapsed:.2f}s")
+    return module
+
+
+class LazyAttr:
+    """Stand-in for a module attribute that is imported on first use.
+
+    Calling the object forwards to the real attribute, so a class or function
+    can be swapped for a LazyAttr without touching its call sites.
+    """
+
+    def __init__(self, module_name, attr_name):
+        self.module_name = module_name
+        self.attr_name = attr_name
+        self._target = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._target is not None
+
+    def resolve(self):
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    module = timed_import(self.module_name)
+                    self._target = getattr(module, self.attr_name)
+        return self._target
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __repr__(self):
+        state = 'loaded' if self.loaded else 'deferred'
+        return f"<LazyAttr {self.module_name}.{self.attr_name} ({state})>"
+
+
+def start_warmup(lazy_attrs, delay=0.0):
+    """Resolve lazy attributes in a daemon thread so the first real use is cheap.
+
+    The optional delay lets the server bind and answer its first requests
+    before the heavy imports start competing for the GIL.
+    """
+    def _warmup():
+        if delay:
+            time.sleep(delay)
+        for lazy_attr in lazy_attrs:
+            try:
+                lazy_attr.resolve()
+            except Exception as e:
+                _warmup_state['errors'][lazy_attr.module_name] = str(e)
+                logger.error(f"Warmup failed for {lazy_attr.module_name}: {str(e)}")
+        _warmup_state['finished'] = True
+        logger.info("Background warmup completed")
+
+    _warmup_state['started'] = True
+    thread = threading.Thread(target=_warmup, name='lazy-warmup', daemon=True)
+    thread.start()
+    return thread
+
+
+def import_report():
+    """Return import timings and warmup status for diagnostics."""
+    with _timings_lock:
+        timings = dict(IMPORT_TIMINGS)
+    return {
+        'import_seconds': timings,
+        'warmup': {
+            'started': _warmup_state['started'],
+            'finished': _warmup_state['finished'],
+            'errors': dict(_warmup_state['errors'])
+        }
+    }